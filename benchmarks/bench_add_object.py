@@ -0,0 +1,63 @@
+# Compare building a model with add_object using the incremental object index with the previous full rebuild of the
+# object lists after every added object
+#
+# Run from the repository root with: python -m benchmarks.bench_add_object
+import time
+from typing import Dict, List
+
+from pyshop.shopcore.model_builder import ModelBuilderType
+
+from tests.mock_core import MockShopCore
+
+OBJECT_TYPES = ['reservoir', 'plant', 'generator', 'gate']
+
+
+def add_objects_rebuild(core:MockShopCore, n_objects:int) -> Dict[str,List[str]]:
+    # The previous add_object: check the name against all objects in the system, then rebuild the lists of names of
+    # every type, since the core reports that an update is needed
+    types = {object_type: [] for object_type in core.GetObjectTypeNames()}
+    for i in range(n_objects):
+        object_type = OBJECT_TYPES[i % len(OBJECT_TYPES)]
+        name = f'{object_type}_{i}'
+        core.AddObject(object_type, name)
+        if name in core.GetObjectNamesInSystem():
+            types[object_type].append(name)
+        if core.UpdateNeeded():
+            types = {object_type: [] for object_type in core.GetObjectTypeNames()}
+            for object_name, other_type in zip(core.GetObjectNamesInSystem(), core.GetObjectTypesInSystem()):
+                types[other_type].append(object_name)
+        types[object_type].index(name)
+    return types
+
+
+def add_objects_incremental(core:MockShopCore, n_objects:int) -> ModelBuilderType:
+    model = ModelBuilderType(core)
+    for i in range(n_objects):
+        object_type = OBJECT_TYPES[i % len(OBJECT_TYPES)]
+        model[object_type].add_object(f'{object_type}_{i}')
+    return model
+
+
+def main() -> None:
+    for n_objects in [500, 1000, 2000, 3000, 6000]:
+        core = MockShopCore()
+        t0 = time.perf_counter()
+        expected = add_objects_rebuild(core, n_objects)
+        rebuild_time = time.perf_counter() - t0
+        rebuild_calls = sum(core.calls.values())
+
+        core = MockShopCore()
+        t0 = time.perf_counter()
+        model = add_objects_incremental(core, n_objects)
+        incremental_time = time.perf_counter() - t0
+        incremental_calls = sum(core.calls.values())
+
+        for object_type in OBJECT_TYPES:
+            assert model[object_type].get_object_names() == expected[object_type]
+        print(f'{n_objects} objects: rebuild {rebuild_time * 1000:.0f} ms ({rebuild_calls} core calls), incremental '
+              f'{incremental_time * 1000:.0f} ms ({incremental_calls} core calls), '
+              f'speedup {rebuild_time / incremental_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# Drive many remote sessions from one orchestrator: one after the other with ShopSession, with one thread per
+# ShopSession, and concurrently from a single thread with AsyncShopSession. Every session makes the same core calls,
+# and the stand-in server in benchmarks/rest_stand_in.py runs in its own process and adds a latency to every core call
+#
+# Run from the repository root with: python -m benchmarks.bench_async_sessions
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pyshop.async_shop_runner import AsyncShopSession
+from pyshop.shop_runner import ShopSession
+
+from benchmarks.rest_stand_in import start_stand_in_process
+
+N_SESSIONS = 24
+N_OBJECTS = 10
+CALL_LATENCY = 0.005
+
+
+def run_session(port:int) -> float:
+    shop = ShopSession(host='127.0.0.1', port=port)
+    api = shop.shop_api
+    for i in range(N_OBJECTS):
+        api.AddObject('reservoir', f'R{i}')
+        api.SetDoubleValue('reservoir', f'R{i}', 'max_vol', float(i))
+    api.ExecuteCommand('start sim', [], [])
+    return sum(api.GetDoubleValue('reservoir', f'R{i}', 'max_vol') for i in range(N_OBJECTS))
+
+
+async def run_async_session(port:int) -> float:
+    shop = await AsyncShopSession.create('127.0.0.1', port, max_connections=N_SESSIONS)
+    api = shop.shop_api
+    for i in range(N_OBJECTS):
+        await api.AddObject('reservoir', f'R{i}')
+        await api.SetDoubleValue('reservoir', f'R{i}', 'max_vol', float(i))
+    await api.ExecuteCommand('start sim', [], [])
+    return sum([await api.GetDoubleValue('reservoir', f'R{i}', 'max_vol') for i in range(N_OBJECTS)])
+
+
+async def run_async_sessions(port:int) -> list:
+    return await asyncio.gather(*(run_async_session(port) for _ in range(N_SESSIONS)))
+
+
+def main() -> None:
+    process, port = start_stand_in_process(CALL_LATENCY)
+    expected = [float(sum(range(N_OBJECTS)))] * N_SESSIONS
+
+    t0 = time.perf_counter()
+    assert [run_session(port) for _ in range(N_SESSIONS)] == expected
+    sequential_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(N_SESSIONS) as executor:
+        assert list(executor.map(run_session, [port] * N_SESSIONS)) == expected
+    threaded_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    threads = threading.active_count()
+    assert asyncio.run(run_async_sessions(port)) == expected
+    async_time = time.perf_counter() - t0
+
+    print(f'{N_SESSIONS} sessions, {CALL_LATENCY * 1000:.0f} ms per core call: ShopSession one after the other '
+          f'{sequential_time:.2f} s, ShopSession in {N_SESSIONS} threads {threaded_time:.2f} s, AsyncShopSession in '
+          f'{threads} thread {async_time:.2f} s, speedup {sequential_time / async_time:.1f}x')
+    process.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# Compare loading TXY series and static values through the proxies one set() at a time with the same writes queued in a
+# model.batch() block. The last case uses a core that, like the REST client, executes the whole batch in one round trip
+#
+# Run from the repository root with: python -m benchmarks.bench_batch
+import time
+
+import numpy as np
+import pandas as pd
+
+from pyshop.shopcore.model_builder import ModelBuilderType
+
+from tests.mock_core import MockShopCore
+
+
+class BatchingCore(MockShopCore):
+
+    def call_many(self, calls):
+        # One round trip for all calls
+        latency = self.call_latency
+        time.sleep(latency)
+        self.call_latency = 0.0
+        try:
+            return [getattr(self, name)(*args) for name, args in calls]
+        finally:
+            self.call_latency = latency
+
+
+def load(model:ModelBuilderType, n_reservoirs:int) -> None:
+    index = pd.date_range(model.get_time_grid().starttime, periods=24, freq='H')
+    for i in range(n_reservoirs):
+        reservoir = model.reservoir[f'R{i}']
+        reservoir.max_vol.set(100.0 + i)
+        reservoir.lrl.set(10.0)
+        reservoir.inflow.set(pd.Series(np.full(24, float(i)), index=index))
+
+
+def run(core:MockShopCore, n_reservoirs:int, call_latency:float, batch:bool) -> float:
+    model = ModelBuilderType(core)
+    for i in range(n_reservoirs):
+        model.reservoir.add_object(f'R{i}')
+    core.call_latency = call_latency
+    t0 = time.perf_counter()
+    if batch:
+        with model.batch():
+            load(model, n_reservoirs)
+    else:
+        load(model, n_reservoirs)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    # The mock core answers in-process, so the second case adds a round trip latency to every core call as a stand-in for
+    # a remote core
+    for n_reservoirs, call_latency in [(2000, 0.0), (2000, 0.00005)]:
+        direct_time = run(MockShopCore(), n_reservoirs, call_latency, False)
+        batch_time = run(MockShopCore(), n_reservoirs, call_latency, True)
+        round_trip_time = run(BatchingCore(), n_reservoirs, call_latency, True)
+        print(f'{n_reservoirs} reservoirs, {call_latency * 1e6:.0f} us latency: direct {direct_time * 1000:.0f} ms, '
+              f'batch {batch_time * 1000:.0f} ms, batch in one round trip {round_trip_time * 1000:.0f} ms, speedup '
+              f'{direct_time / round_trip_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
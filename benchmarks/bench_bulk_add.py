@@ -0,0 +1,56 @@
+# Compare creating generators and setting their static attributes through the proxies, one add_object() and one set()
+# per attribute, with a single bulk_add() of a DataFrame
+#
+# Run from the repository root with: python -m benchmarks.bench_bulk_add
+import time
+
+import pandas as pd
+
+from pyshop.shopcore.model_builder import ModelBuilderType
+
+from tests.mock_core import MockShopCore
+
+
+def get_generators(n_generators:int) -> pd.DataFrame:
+    return pd.DataFrame({
+        'penstock': [1] * n_generators,
+        'p_min': [10.0] * n_generators,
+        'p_max': [100.0] * n_generators,
+        'p_nom': [90.0] * n_generators,
+        'startcost': [500.0] * n_generators,
+        'gen_eff_curve': [pd.Series([95.0, 98.0], index=[10.0, 100.0], name=0.0)] * n_generators,
+    }, index=[f'G{i}' for i in range(n_generators)])
+
+
+def add_with_proxies(model:ModelBuilderType, df:pd.DataFrame) -> None:
+    for name, row in df.iterrows():
+        model.generator.add_object(name)
+        for attribute_name, value in row.items():
+            model.generator[name][attribute_name].set(value)
+
+
+def main() -> None:
+    for n_generators in [500, 2500]:
+        df = get_generators(n_generators)
+
+        core = MockShopCore()
+        model = ModelBuilderType(core)
+        t0 = time.perf_counter()
+        add_with_proxies(model, df)
+        proxy_time = time.perf_counter() - t0
+        proxy_calls = sum(core.calls.values())
+
+        core = MockShopCore()
+        model = ModelBuilderType(core)
+        core.calls.clear()
+        t0 = time.perf_counter()
+        model.generator.bulk_add(df)
+        bulk_time = time.perf_counter() - t0
+        bulk_calls = sum(core.calls.values())
+
+        print(f'{n_generators} generators: proxies {proxy_time * 1000:.0f} ms ({proxy_calls} core calls), bulk_add '
+              f'{bulk_time * 1000:.0f} ms ({bulk_calls} core calls), speedup {proxy_time / bulk_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
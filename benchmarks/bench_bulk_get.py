@@ -0,0 +1,46 @@
+# Compare the bulk attribute reader with the per-object get loop on a mock core
+#
+# Run from the repository root with: python -m benchmarks.bench_bulk_get
+import time
+
+import pandas as pd
+
+from pyshop.helpers.time import get_shop_timestring
+from pyshop.shopcore.model_builder import ModelBuilderType
+from tests.mock_core import MockShopCore
+
+
+def build_model(n_plants:int, n_hours:int) -> MockShopCore:
+    core = MockShopCore()
+    end = pd.Timestamp('2022-01-01') + pd.Timedelta(hours=n_hours)
+    core.SetTimeResolution('20220101000000', get_shop_timestring(end), 'hour')
+    for i in range(n_plants):
+        core.AddObject('plant', f'plant_{i}')
+    core.ExecuteCommand('start sim', [], [])
+    return core
+
+
+def main() -> None:
+    for n_plants in [1000, 3000]:
+        core = build_model(n_plants, n_hours=168)
+        model = ModelBuilderType(core)
+
+        core.calls.clear()
+        start = time.perf_counter()
+        loop_result = {name: model.plant[name].production.get() for name in model.plant.get_object_names()}
+        loop_time = time.perf_counter() - start
+        loop_calls = sum(core.calls.values())
+
+        core.calls.clear()
+        start = time.perf_counter()
+        bulk_result = model.plant.get_attribute('production')
+        bulk_time = time.perf_counter() - start
+        bulk_calls = sum(core.calls.values())
+
+        assert all((bulk_result[name].values == series.values).all() for name, series in loop_result.items())
+        print(f'{n_plants} plants: per-object loop {loop_time:.3f} s ({loop_calls} core calls), '
+              f'bulk {bulk_time:.3f} s ({bulk_calls} core calls), speedup {loop_time / bulk_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
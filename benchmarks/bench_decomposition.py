@@ -0,0 +1,82 @@
+# Solve a synthetic model of independent watercourses, coupled only through a shared market, as one case and as one
+# sub-case per watercourse in a pool of worker processes. The mock core does not optimize anything, so each solve
+# burns CPU time in proportion to the number of objects as a stand-in for the SHOP solve
+#
+# Run from the repository root with: python -m benchmarks.bench_decomposition
+import os
+import time
+from typing import Tuple
+
+import pandas as pd
+
+from pyshop.shopcore.decomposition import ComponentResults, ModelSnapshot, apply_snapshot, collect_results, \
+    extract_components, solve_components
+from pyshop.shopcore.model_builder import ModelBuilderType
+from pyshop.shopcore.result_cache import ResultCache
+
+from tests.mock_core import MockShopCore
+
+WORK_PER_OBJECT = 100000
+
+
+def build_model(n_watercourses:int, n_plants:int) -> Tuple[MockShopCore,ModelBuilderType]:
+    core = MockShopCore()
+    core.SetTimeResolution('20220101000000', '20220108000000', 'hour')
+    model = ModelBuilderType(core, result_cache=ResultCache())
+    model.market.add_object('market').sale_price.set(40.0)
+    for w in range(n_watercourses):
+        upper = model.reservoir.add_object(f'R{w}_0')
+        upper.inflow.set(pd.Series([10.0 + w], index=[pd.Timestamp('2022-01-01')]))
+        for p in range(n_plants):
+            lower = model.reservoir.add_object(f'R{w}_{p + 1}')
+            plant = model.plant.add_object(f'P{w}_{p}')
+            generator = model.generator.add_object(f'G{w}_{p}')
+            upper.connect_to(plant)
+            plant.connect_to(generator)
+            plant.connect_to(lower)
+            generator.p_max.set(100.0)
+            upper = lower
+    return core, model
+
+
+def simulate_solve(core:MockShopCore, n_objects:int) -> None:
+    total = 0
+    for i in range(n_objects * WORK_PER_OBJECT):
+        total += i
+    core.ExecuteCommand('start sim', [], [])
+
+
+def solve(snapshot:ModelSnapshot) -> ComponentResults:
+    core = MockShopCore()
+    model = ModelBuilderType(core)
+    apply_snapshot(core, model, snapshot)
+    simulate_solve(core, len(snapshot.objects))
+    return collect_results(core, model, snapshot.objects)
+
+
+def main() -> None:
+    n_watercourses = 8
+    core, model = build_model(n_watercourses, n_plants=5)
+    print(f'{len(model.get_object_index())} objects in {n_watercourses} watercourses, {os.cpu_count()} CPUs')
+
+    t0 = time.perf_counter()
+    simulate_solve(core, len(model.get_object_index()))
+    print(f'Single case: {time.perf_counter() - t0:.2f} s')
+
+    t0 = time.perf_counter()
+    snapshots = extract_components(core, model)
+    print(f'Extracted {len(snapshots)} sub-cases in {(time.perf_counter() - t0) * 1000:.0f} ms')
+    for processes in [1, 2, 4, 8]:
+        t0 = time.perf_counter()
+        results = solve_components(snapshots, solve, processes)
+        solve_time = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for component_results in results:
+            model.merge_results(component_results)
+        merge_time = time.perf_counter() - t0
+        print(f'{processes} processes: solve {solve_time:.2f} s, merge {merge_time * 1000:.1f} ms')
+    assert model.plant.P7_4.production.get() is not None
+
+
+if __name__ == '__main__':
+    main()
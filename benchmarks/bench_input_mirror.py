@@ -0,0 +1,53 @@
+# Compare setting the inputs of a model a second time, with a few values changed, with and without an input mirror. This
+# is the rolling case where the same model is rebuilt in a session with mostly unchanged inputs
+#
+# Run from the repository root with: python -m benchmarks.bench_input_mirror
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from pyshop.shopcore.input_mirror import InputMirror
+from pyshop.shopcore.model_builder import ModelBuilderType
+
+from tests.mock_core import MockShopCore
+
+
+def set_inputs(model:ModelBuilderType, n_generators:int, changed:int) -> None:
+    index = pd.date_range(model.get_time_grid().starttime, periods=24, freq='H')
+    for i in range(n_generators):
+        generator = model.generator[f'G{i}']
+        generator.p_min.set(10.0)
+        generator.p_max.set(100.0 + (i < changed))
+        generator.p_nom.set(90.0)
+        generator.startcost.set(pd.Series(np.full(24, 500.0 + i), index=index))
+
+
+def run(n_generators:int, call_latency:float, input_mirror:Optional[InputMirror]) -> float:
+    core = MockShopCore()
+    model = ModelBuilderType(core, input_mirror=input_mirror)
+    for i in range(n_generators):
+        model.generator.add_object(f'G{i}')
+    set_inputs(model, n_generators, 0)
+    core.call_latency = call_latency
+    t0 = time.perf_counter()
+    set_inputs(model, n_generators, n_generators // 20)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    # The mock core answers in-process, so the second case adds a round trip latency to every core call as a stand-in for
+    # a remote core
+    for n_generators, call_latency in [(1000, 0.0), (1000, 0.00005)]:
+        direct_time = run(n_generators, call_latency, None)
+        mirror = InputMirror()
+        mirror_time = run(n_generators, call_latency, mirror)
+        info = mirror.get_info()
+        print(f'{n_generators} generators, {call_latency * 1e6:.0f} us latency: direct {direct_time * 1000:.0f} ms, '
+              f'mirror {mirror_time * 1000:.0f} ms ({info["skipped"]} writes skipped), speedup '
+              f'{direct_time / mirror_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
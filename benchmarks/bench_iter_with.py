@@ -0,0 +1,65 @@
+# Compare a report loop over every plant that reads two output attributes through the proxies with the same loop over
+# iter_with(). The last case uses a core that, like the REST client, executes the calls of a chunk in one round trip
+#
+# Run from the repository root with: python -m benchmarks.bench_iter_with
+import time
+
+from pyshop.shopcore.model_builder import ModelBuilderType
+
+from tests.mock_core import MockShopCore
+
+
+class BatchingCore(MockShopCore):
+
+    def call_many(self, calls):
+        # One round trip for all calls
+        latency = self.call_latency
+        time.sleep(latency)
+        self.call_latency = 0.0
+        try:
+            return [getattr(self, name)(*args) for name, args in calls]
+        finally:
+            self.call_latency = latency
+
+
+def get_model(core:MockShopCore, n_plants:int) -> ModelBuilderType:
+    model = ModelBuilderType(core, output_format='numpy')
+    for i in range(n_plants):
+        model.plant.add_object(f'P{i}')
+    core.ExecuteCommand('start sim', [], [])
+    return model
+
+
+def report_with_proxies(model:ModelBuilderType) -> float:
+    total = 0.0
+    for plant in model.plant:
+        total += plant.production.get().y.sum() - plant.discharge.get().y.sum()
+    return total
+
+
+def report_with_iter_with(model:ModelBuilderType) -> float:
+    total = 0.0
+    for plant, values in model.plant.iter_with(['production', 'discharge']):
+        total += values['production'].y.sum() - values['discharge'].y.sum()
+    return total
+
+
+def main() -> None:
+    # The mock core answers in-process, so the second case adds a round trip latency to every core call as a stand-in for
+    # a remote core
+    for n_plants, call_latency in [(2000, 0.0), (2000, 0.00005)]:
+        times = []
+        for core, report in [(MockShopCore(), report_with_proxies), (MockShopCore(), report_with_iter_with),
+                             (BatchingCore(), report_with_iter_with)]:
+            model = get_model(core, n_plants)
+            core.call_latency = call_latency
+            t0 = time.perf_counter()
+            report(model)
+            times.append(time.perf_counter() - t0)
+        print(f'{n_plants} plants, {call_latency * 1e6:.0f} us latency: proxies {times[0] * 1000:.0f} ms, iter_with '
+              f'{times[1] * 1000:.0f} ms, iter_with in one round trip per chunk {times[2] * 1000:.0f} ms, speedup '
+              f'{times[0] / times[2]:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
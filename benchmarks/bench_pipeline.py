@@ -0,0 +1,83 @@
+# Compare the round trips and time of REST sessions on the local stand-in server in benchmarks/rest_stand_in.py when
+# calls are sent one by one and when they are pipelined: direct core calls inside shop_api.pipeline(), reading txy
+# series through the model, and building a model with bulk_add
+#
+# Run from the repository root with: python -m benchmarks.bench_pipeline
+import time
+
+import numpy as np
+import pandas as pd
+
+from pyshop.shop_runner import ShopSession
+
+from benchmarks.rest_stand_in import start_stand_in
+
+
+def measure(shop:ShopSession, func) -> tuple:
+    round_trips = shop.shop_api.get_transport_info()['round_trips']
+    t0 = time.perf_counter()
+    func()
+    return time.perf_counter() - t0, shop.shop_api.get_transport_info()['round_trips'] - round_trips
+
+
+def report(label:str, one_by_one:tuple, pipelined:tuple) -> None:
+    print(f'{label}: one by one {one_by_one[0] * 1000:.0f} ms ({one_by_one[1]} round trips), pipelined '
+          f'{pipelined[0] * 1000:.0f} ms ({pipelined[1]} round trips), speedup {one_by_one[0] / pipelined[0]:.1f}x')
+
+
+def main() -> None:
+    server = start_stand_in()
+    port = server.server_address[1]
+    n = 500
+
+    shop = ShopSession(host='127.0.0.1', port=port)
+    shop.model.reservoir.add_object('R1')
+    api = shop.shop_api
+
+    def set_values():
+        for i in range(n):
+            api.SetDoubleValue('reservoir', 'R1', 'max_vol', float(i))
+
+    def set_values_in_pipeline():
+        with api.pipeline():
+            set_values()
+
+    report(f'{n} SetDoubleValue calls', measure(shop, set_values), measure(shop, set_values_in_pipeline))
+
+    index = pd.date_range('2022-01-01', periods=24, freq='H')
+    names = [f'R{i}' for i in range(n)]
+    df = pd.DataFrame({'max_vol': np.arange(n, dtype=float), 'inflow': [pd.Series(np.ones(24), index=index)] * n},
+                      index=names)
+    one_by_one = ShopSession(host='127.0.0.1', port=port)
+    pipelined = ShopSession(host='127.0.0.1', port=port)
+
+    def build_one_by_one():
+        # The calls the model made for every object before it pipelined them
+        for name in names:
+            api = one_by_one.shop_api
+            api.AddObject('reservoir', name)
+            api.SetDoubleValue('reservoir', name, 'max_vol', df.max_vol[name])
+            api.SetTxySeries('reservoir', name, 'inflow', '20220101000000000', np.arange(24), np.ones(24))
+
+    report(f'building {n} reservoirs', measure(one_by_one, build_one_by_one),
+           measure(pipelined, lambda: pipelined.model.reservoir.bulk_add(df)))
+
+    def read_one_by_one():
+        # The calls of a txy read before they were sent together
+        api = one_by_one.shop_api
+        for name in names:
+            for call in ['GetTxySeriesStartTime', 'GetTxySeriesT', 'GetTxySeriesY']:
+                getattr(api, call)('reservoir', name, 'inflow')
+
+    attributes = [pipelined.model.reservoir[name].inflow for name in names]
+
+    def read_with_model():
+        for attribute in attributes:
+            attribute.get(output_format='numpy')
+
+    report(f'reading {n} txy series', measure(one_by_one, read_one_by_one), measure(pipelined, read_with_model))
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# Compare the element by element dataframe=False output of XYT curves with the vectorized python and dict formats.
+# Only the conversion of the fetched curves is timed, the time spent in the core is the same for all formats
+#
+# Run from the repository root with: python -m benchmarks.bench_python_output
+import json
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from pyshop.helpers.curve_batch import CurveBatch
+from pyshop.shopcore.datatype_codecs import format_value
+from pyshop.shopcore.shop_api import get_attribute_value, set_attribute
+
+from tests.mock_core import MockShopCore
+
+
+def to_dict_list_elementwise(batch:CurveBatch) -> List[Dict[str,Any]]:
+    # The previous dataframe=False output, building each [x, y] point by indexing the arrays
+    labels = batch.get_labels()
+    return [{'time': label, 'xy': [[batch.x[i], batch.y[i]] for i in range(start, stop)]}
+            for start, stop, label in zip(batch.offsets[:-1], batch.offsets[1:], labels)]
+
+
+def time_call(function, *args, repeat:int=3) -> Any:
+    # The best of a few runs, since the garbage collector adds a lot of noise when this many lists are created
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        value = function(*args)
+        best = min(best, time.perf_counter() - t0)
+    return value, best
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    core = MockShopCore()
+    core.SetTimeResolution('20220101000000', '20220201000000', 'hour')
+    core.AddObject('generator', 'G1')
+
+    for n_curves, n_points in [(1, 100000), (100, 1000), (1000, 100)]:
+        times = pd.date_range('2022-01-01', periods=n_curves, freq='H')
+        batch = CurveBatch.from_n_points(np.full(n_curves, n_points), np.tile(np.arange(n_points, dtype=float), n_curves),
+                                         rng.normal(size=n_curves * n_points), times=times.values)
+        set_attribute(core, 'G1', 'generator', 'xyt_curves', 'xyt', batch)
+        batch = get_attribute_value(core, 'G1', 'generator', 'xyt_curves', 'xyt', raw=True)
+
+        expected, elementwise_time = time_call(to_dict_list_elementwise, batch)
+        value, python_time = time_call(format_value, batch, 'xyt', 'python')
+        compact, dict_time = time_call(format_value, batch, 'xyt', 'dict')
+
+        assert all(a['xy'] == b['xy'] for a, b in zip(value, expected))
+        assert compact['y'][-1] == [y for _, y in value[-1]['xy']]
+        json.dumps(compact)
+        print(f'{n_curves} curves of {n_points} points: element by element {elementwise_time * 1000:.1f} ms, '
+              f'python {python_time * 1000:.1f} ms ({elementwise_time / python_time:.1f}x), '
+              f'dict {dict_time * 1000:.1f} ms ({elementwise_time / dict_time:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+# Compare the step function resampling with the rolling mean implementation for variable time resolution
+#
+# Run from the repository root with: python -m benchmarks.bench_resample
+import time
+
+import numpy as np
+import pandas as pd
+
+from pyshop.helpers.timeseries import resample_resolution, resample_step_function
+
+
+def resample_rolling(time_dict:dict, df:pd.DataFrame, time_resolution:pd.Series) -> pd.DataFrame:
+    # The previous set_attribute pipeline: upsample to minute resolution, then take rolling means per resolution
+    end = time_dict['endtime']
+    df = pd.concat([df, pd.DataFrame(df[-1:].values, index=[end], columns=df.columns)])
+    df = df.asfreq(freq='T', method='ffill')[:-1]
+    return resample_resolution(time_dict, df, 1/60, time_resolution)
+
+
+def main() -> None:
+    start = pd.Timestamp('2022-01-01')
+    end = start + pd.Timedelta(days=14)
+    time_dict = dict(starttime=start, endtime=end)
+    # 15 minute resolution the first two days, hourly the rest of the first week and 4 hours for the second week
+    time_resolution = pd.Series([15, 60, 240], index=[0, 2*24*60, 7*24*60])
+    rng = np.random.default_rng(0)
+    index = pd.date_range(start, end, freq='H', inclusive='left')
+
+    for n_columns in [1, 10, 100]:
+        df = pd.DataFrame(rng.normal(size=(index.size, n_columns)), index=index)
+
+        t0 = time.perf_counter()
+        expected = resample_rolling(time_dict, df.copy(), time_resolution)
+        rolling_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        resampled = resample_step_function(time_dict, df, 1/60, time_resolution)
+        step_time = time.perf_counter() - t0
+
+        assert np.allclose(resampled.values, expected.values)
+        print(f'{n_columns} columns: rolling mean {rolling_time * 1000:.1f} ms, step function '
+              f'{step_time * 1000:.1f} ms, speedup {rolling_time / step_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# Throughput of the reference REST server in pyshop.shopcore.rest_server with thread and process workers: many async
+# sessions make single core calls and batches against a MockShopCore per session, and the metrics of the server are
+# reported. The server runs in the benchmark process, the cores in the workers
+#
+# Run from the repository root with: python -m benchmarks.bench_rest_server
+import asyncio
+import time
+
+from pyshop.async_shop_runner import AsyncShopSession
+from pyshop.shopcore.rest_server import ShopRestServer
+
+from benchmarks.rest_stand_in import start_stand_in
+
+N_SESSIONS = 8
+N_CALLS = 200
+BATCH_SIZE = 50
+
+
+async def run_session(shop:AsyncShopSession) -> None:
+    api = shop.shop_api
+    await api.AddObject('reservoir', 'R1')
+    for i in range(N_CALLS):
+        await api.SetDoubleValue('reservoir', 'R1', 'max_vol', float(i))
+    for i in range(N_CALLS // BATCH_SIZE):
+        await api.call_many([('GetDoubleValue', ('reservoir', 'R1', 'max_vol'))] * BATCH_SIZE)
+
+
+async def run_sessions(server:ShopRestServer) -> tuple:
+    # The sessions, and so the workers, are started before the calls are timed
+    t0 = time.perf_counter()
+    sessions = await asyncio.gather(*(AsyncShopSession.create('127.0.0.1', server.port, max_connections=N_SESSIONS)
+                                      for _ in range(N_SESSIONS)))
+    start_time = time.perf_counter() - t0
+    before = server.get_metrics()
+    t0 = time.perf_counter()
+    await asyncio.gather(*(run_session(shop) for shop in sessions))
+    elapsed = time.perf_counter() - t0
+    after = server.get_metrics()
+    return start_time, elapsed, {key: after[key] - before[key] for key in ['requests', 'core_calls', 'request_time']}
+
+
+def main() -> None:
+    for worker in ['thread', 'process']:
+        server = start_stand_in(worker=worker)
+        start_time, elapsed, metrics = asyncio.run(run_sessions(server))
+        server.stop()
+        print(f'{worker} workers, {N_SESSIONS} sessions: {metrics["requests"] / elapsed:.0f} requests/s, '
+              f'{metrics["core_calls"] / elapsed:.0f} core calls/s, mean request time '
+              f'{metrics["request_time"] / metrics["requests"] * 1000:.2f} ms, session start {start_time:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+# Compare the calls per second of a REST session that opens a new connection for every call, as the client did with
+# requests.post, with the pooled keep-alive transport. The server is the local stand-in in benchmarks/rest_stand_in.py
+#
+# Run from the repository root with: python -m benchmarks.bench_rest_transport
+import json
+import time
+
+import requests
+
+from pyshop.shop_runner import ShopSession
+from pyshop.shopcore.shop_rest import NumpyArrayEncoder
+
+from benchmarks.rest_stand_in import start_stand_in
+
+
+def call_without_pool(shop:ShopSession, name:str, *args) -> object:
+    # The previous client: a module level requests.post, and so a new connection, for every call
+    return requests.post(
+        f'http://{shop._host}:{shop._port}/internal/{name}',
+        headers={'Content-Type': 'application/json', 'session-id': str(shop._id)},
+        data=json.dumps(dict(args=args, kwargs={}), cls=NumpyArrayEncoder)
+    ).json()
+
+
+def main() -> None:
+    server = start_stand_in()
+    shop = ShopSession(host='127.0.0.1', port=server.server_address[1])
+    shop.model.plant.add_object('P1')
+    n_calls = 2000
+
+    t0 = time.perf_counter()
+    for _ in range(n_calls):
+        call_without_pool(shop, 'GetDoubleValue', 'plant', 'P1', 'outlet_line')
+    unpooled_time = time.perf_counter() - t0
+
+    info = shop.shop_api.get_transport_info()
+    t0 = time.perf_counter()
+    for _ in range(n_calls):
+        shop.shop_api.GetDoubleValue('plant', 'P1', 'outlet_line')
+    pooled_time = time.perf_counter() - t0
+    round_trips = shop.shop_api.get_transport_info()['round_trips'] - info['round_trips']
+
+    print(f'{n_calls} calls: new connection per call {n_calls / unpooled_time:.0f} calls/s, pooled '
+          f'{n_calls / pooled_time:.0f} calls/s ({round_trips} round trips), speedup {unpooled_time / pooled_time:.1f}x')
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# Compare walking the relations of a watercourse using the topology index with the previous queries, which read all
+# objects in the system and look up the relation category of every relation on each call
+#
+# Run from the repository root with: python -m benchmarks.bench_topology
+import time
+from typing import List, Tuple
+
+from pyshop.shopcore.model_builder import ModelBuilderType
+
+from tests.mock_core import MockShopCore
+
+
+def build_watercourse(n_plants:int) -> Tuple[MockShopCore,ModelBuilderType]:
+    core = MockShopCore()
+    model = ModelBuilderType(core)
+    upper = model.reservoir.add_object('R0')
+    for i in range(n_plants):
+        lower = model.reservoir.add_object(f'R{i + 1}')
+        plant = model.plant.add_object(f'P{i}')
+        gate = model.gate.add_object(f'S{i}')
+        upper.connect_to(plant)
+        plant.connect_to(lower)
+        upper.connect_to(gate, 'spill')
+        gate.connect_to(lower)
+        for j in range(2):
+            plant.connect_to(model.generator.add_object(f'G{i}_{j}'))
+        upper = lower
+    return core, model
+
+
+def get_relations_previous(core:MockShopCore, object_type:str, object_name:str) -> List[Tuple[str,str]]:
+    # The previous get_relations(direction='both')
+    object_names = core.GetObjectNamesInSystem()
+    object_types = core.GetObjectTypesInSystem()
+    related = []
+    for relation_type in core.GetValidRelationTypes(object_type):
+        for i in core.GetInputRelations(object_type, object_name, relation_type):
+            core.GetRelationInfo(object_types[i], object_type, 'relationCategory')
+            related.append((object_types[i], object_names[i]))
+    for relation_type in core.GetValidRelationTypes(object_type):
+        for i in core.GetRelations(object_type, object_name, relation_type):
+            if core.GetRelationInfo(object_type, object_types[i], 'relationCategory') == 'logical':
+                continue
+            related.append((object_types[i], object_names[i]))
+    return related
+
+
+def get_generators_previous(core:MockShopCore, plant_name:str) -> List[str]:
+    object_names = core.GetObjectNamesInSystem()
+    object_types = core.GetObjectTypesInSystem()
+    return [object_names[i] for i in core.GetRelations('plant', plant_name, 'connection_standard')
+            if object_types[i] == 'generator']
+
+
+def walk_previous(core:MockShopCore, model:ModelBuilderType) -> int:
+    n = 0
+    for name in model.reservoir.get_object_names():
+        n += len(get_relations_previous(core, 'reservoir', name))
+    for name in model.plant.get_object_names():
+        n += len(get_generators_previous(core, name))
+    return n
+
+
+def walk_topology(model:ModelBuilderType) -> int:
+    n = 0
+    for reservoir in model.reservoir:
+        n += len(reservoir.get_relations())
+    for plant in model.plant:
+        n += len(plant.generators)
+    return n
+
+
+def main() -> None:
+    # The mock core answers in-process, so the second case adds a round trip latency to every core call as a stand-in
+    # for the cost of copying the object lists out of the real core
+    n_walks = 5
+    for n_plants, call_latency in [(50, 0.0), (200, 0.0), (800, 0.0), (200, 0.00005)]:
+        core, model = build_watercourse(n_plants)
+        core.call_latency = call_latency
+        core.calls.clear()
+        t0 = time.perf_counter()
+        expected = [walk_previous(core, model) for _ in range(n_walks)]
+        previous_time = time.perf_counter() - t0
+        previous_calls = sum(core.calls.values())
+
+        model.invalidate_topology()
+        core.calls.clear()
+        t0 = time.perf_counter()
+        result = [walk_topology(model) for _ in range(n_walks)]
+        topology_time = time.perf_counter() - t0
+        topology_calls = sum(core.calls.values())
+
+        assert result == expected
+        print(f'{n_plants} plants, {call_latency * 1e6:.0f} us latency, {n_walks} walks: '
+              f'previous {previous_time * 1000:.0f} ms ({previous_calls} core calls), '
+              f'topology index {topology_time * 1000:.0f} ms ({topology_calls} core calls), '
+              f'speedup {previous_time / topology_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# Compare the previous build_connection_tree, which read the relations from the core, looked up networks in a list and
+# set the edge style with a global attribute statement before every edge, with the exporter on the cached topology.
+# The layout itself is left out, as it needs the dot binary
+#
+# Run from the repository root with: python -m benchmarks.bench_topology_export
+import json
+import time
+
+from graphviz import Digraph
+
+from pyshop.shopcore.model_builder import ModelBuilderType
+from pyshop.shopcore.topology_export import NODE_STYLES
+
+from tests.mock_core import MockShopCore
+
+def build_model(n_watercourses:int, n_plants:int) -> ModelBuilderType:
+    core = MockShopCore()
+    model = ModelBuilderType(core)
+    edges = []
+    for w in range(n_watercourses):
+        for i in range(n_plants):
+            reservoir = model.reservoir.add_object(f'R{w}_{i}')
+            reservoir.added_to_network.set(1)
+            reservoir.network_no.set(w)
+            model.plant.add_object(f'P{w}_{i}')
+            model.gate.add_object(f'S{w}_{i}')
+            model.generator.add_object(f'G{w}_{i}')
+            edges += [('reservoir', f'R{w}_{i}', 'plant', f'P{w}_{i}'), ('plant', f'P{w}_{i}', 'generator', f'G{w}_{i}'),
+                      ('reservoir', f'R{w}_{i}', 'gate', f'S{w}_{i}', 'spill')]
+            if i > 0:
+                edges += [('plant', f'P{w}_{i - 1}', 'reservoir', f'R{w}_{i}'),
+                          ('gate', f'S{w}_{i - 1}', 'reservoir', f'R{w}_{i}')]
+    model.connect_many(edges)
+    return model
+
+
+def previous_connection_tree(core:MockShopCore, display_units:bool=False) -> Digraph:
+    types = ['reservoir', 'plant', 'gate', 'junction', 'junction_gate', 'creek_intake', 'tunnel', 'river']
+    relation_types = ['connection_standard', 'connection_spill', 'connection_bypass']
+    object_types = core.GetObjectTypesInSystem()
+    object_names = core.GetObjectNamesInSystem()
+    dot = Digraph(comment='SHOP topology')
+    connections = []
+    networks = []
+    subgraphs = []
+    for i, (name, object_type) in enumerate(zip(object_names, object_types)):
+        if object_type in types:
+            shape, bgcolor = NODE_STYLES.get(object_type, ('ellipse', 'none'))
+            subgraph = None
+            if object_type == 'reservoir' and core.GetIntValue(object_type, name, 'added_to_network'):
+                network_no = core.GetIntValue(object_type, name, 'network_no')
+                if network_no not in networks:
+                    networks.append(network_no)
+                    s = Digraph(comment='Network')
+                    s.attr(rank='same')
+                    subgraphs.append(s)
+                subgraph = subgraphs[networks.index(network_no)]
+            dot.node(f'{object_type}_{name}', label=name, shape=shape, style='filled', fillcolor=bgcolor)
+            if subgraph is not None:
+                subgraph.node(f'{object_type}_{name}', label=name, shape=shape, style='filled', fillcolor=bgcolor)
+            for relation in relation_types:
+                for connection in core.GetRelations(object_type, name, relation):
+                    connections.append((i, connection, relation))
+    for source, target, relation in connections:
+        input_type, output_type = object_types[source], object_types[target]
+        if input_type in ['generator', 'pump'] or output_type in ['generator', 'pump']:
+            if not display_units:
+                continue
+        elif input_type not in types or output_type not in types:
+            continue
+        if (input_type == 'gate' or output_type == 'gate') and relation != 'connection_standard':
+            dot.attr('edge', style='dashed')
+        else:
+            dot.attr('edge', style='solid', arrowtail='none', arrowhead='none')
+        dot.edge(f'{input_type}_{object_names[source]}', f'{output_type}_{object_names[target]}')
+    for s in subgraphs:
+        dot.subgraph(s)
+    return dot
+
+
+def main() -> None:
+    # The mock core answers in-process, so the last case adds a round trip latency to every core call as a stand-in for
+    # a remote core. Four objects per plant, so 20 watercourses of 50 plants give 4000 objects
+    for n_watercourses, call_latency in [(2, 0.0), (20, 0.0), (20, 0.00005)]:
+        model = build_model(n_watercourses, 50)
+        core = model._shop_api
+        core.call_latency = call_latency
+        t0 = time.perf_counter()
+        previous_source = previous_connection_tree(core).source
+        previous_time = time.perf_counter() - t0
+
+        # Cold includes building the topology index, which is otherwise shared with every other relation query
+        model.invalidate_topology()
+        t0 = time.perf_counter()
+        model.build_connection_tree()
+        cold_time = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        source = model.build_connection_tree().source
+        new_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        adjacency = json.dumps(model.export_topology())
+        json_time = time.perf_counter() - t0
+
+        print(f'{n_watercourses * 50 * 4} objects, {call_latency * 1e6:.0f} us latency: previous '
+              f'{previous_time * 1000:.0f} ms ({previous_source.count(chr(10))} DOT statements), exporter '
+              f'{cold_time * 1000:.0f} ms cold, {new_time * 1000:.0f} ms cached ({source.count(chr(10))} DOT statements), cached speedup '
+              f'{previous_time / new_time:.1f}x, JSON {json_time * 1000:.0f} ms ({len(adjacency) / 1024:.0f} kB)')
+
+if __name__ == '__main__':
+    main()
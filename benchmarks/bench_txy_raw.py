@@ -0,0 +1,43 @@
+# Compare pandas and raw numpy retrieval of TXY results, in time and peak memory
+#
+# Run from the repository root with: python -m benchmarks.bench_txy_raw
+import time
+import tracemalloc
+
+from pyshop.shopcore.shop_api import get_attribute_value
+from tests.mock_core import MockShopCore
+
+
+def build_model(n_series:int) -> MockShopCore:
+    core = MockShopCore()
+    core.SetTimeResolution('20220101000000', '20220115000000', 'hour')
+    for i in range(n_series):
+        core.AddObject('plant', f'plant_{i}')
+    core.ExecuteCommand('start sim', [], [])
+    return core
+
+
+def extract(core:MockShopCore, names:list, raw:bool) -> list:
+    return [get_attribute_value(core, name, 'plant', 'production', 'txy', raw=raw) for name in names]
+
+
+def main() -> None:
+    n_series = 10000
+    core = build_model(n_series)
+    names = core.GetObjectNamesInSystem()
+    for raw in [False, True]:
+        start = time.perf_counter()
+        extract(core, names, raw)
+        elapsed = time.perf_counter() - start
+
+        # Memory is traced in a separate pass since tracing slows down the extraction considerably
+        tracemalloc.start()
+        result = extract(core, names[:1000], raw)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+        print(f'raw={raw}: {n_series} series in {elapsed:.2f} s, peak memory for 1000 series {peak / 2**20:.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
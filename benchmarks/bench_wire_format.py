@@ -0,0 +1,62 @@
+# Compare the JSON and the binary wire format of the REST client for a txy series with 20000 points and a stochastic
+# frame with 20000 points and 50 scenarios, first encoding and decoding only, then writing and reading the series
+# through a session on the local stand-in server in benchmarks/rest_stand_in.py
+#
+# Run from the repository root with: python -m benchmarks.bench_wire_format
+import json
+import time
+
+import numpy as np
+
+from pyshop.shop_runner import ShopSession
+from pyshop.shopcore import wire_format
+from pyshop.shopcore.shop_rest import NumpyArrayEncoder
+
+from benchmarks.rest_stand_in import start_stand_in
+
+
+def time_codec(value:dict, repeats:int=5) -> tuple:
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        json_value = json.loads(json.dumps(value, cls=NumpyArrayEncoder))
+    json_time = (time.perf_counter() - t0) / repeats
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        payload = wire_format.encode(value)
+        binary_value = wire_format.decode(bytearray(payload))
+    binary_time = (time.perf_counter() - t0) / repeats
+    np.testing.assert_array_equal(np.asarray(json_value['args'][-1]), binary_value['args'][-1])
+    return json_time, binary_time, len(json.dumps(value, cls=NumpyArrayEncoder)), len(payload)
+
+
+def time_session(port:int, wire:str, y:np.ndarray, repeats:int=5) -> float:
+    shop = ShopSession(host='127.0.0.1', port=port, wire_format=wire)
+    assert shop.shop_api.get_transport_info()['wire_format'] == wire
+    shop.model.reservoir.add_object('R1')
+    t = np.arange(len(y))
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        shop.shop_api.SetTxySeries('reservoir', 'R1', 'inflow', '20220101000000000', t, y)
+        result = shop.shop_api.GetTxySeriesY('reservoir', 'R1', 'inflow')
+    np.testing.assert_array_equal(np.asarray(result), y)
+    return (time.perf_counter() - t0) / repeats
+
+
+def main() -> None:
+    server = start_stand_in()
+    port = server.server_address[1]
+    rng = np.random.default_rng(0)
+    for label, y in [('txy 20000 points', rng.random(20000)), ('stochastic 20000 x 50', rng.random((20000, 50)))]:
+        value = dict(args=['reservoir', 'R1', 'inflow', '20220101000000000', np.arange(len(y)), y], kwargs={})
+        json_time, binary_time, json_size, binary_size = time_codec(value)
+        print(f'{label}, encode and decode: json {json_time * 1000:.1f} ms ({json_size / 1e6:.1f} MB), binary '
+              f'{binary_time * 1000:.1f} ms ({binary_size / 1e6:.1f} MB), speedup {json_time / binary_time:.0f}x')
+        json_time = time_session(port, 'json', y)
+        binary_time = time_session(port, 'binary', y)
+        print(f'{label}, set and get over REST: json {json_time * 1000:.0f} ms, binary {binary_time * 1000:.0f} ms, '
+              f'speedup {json_time / binary_time:.1f}x')
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+# The reference REST server of pyshop.shopcore.rest_server with a MockShopCore per session, for benchmarking the REST
+# clients on one machine. call_latency is added to every core call, as a stand-in for the time the real core takes
+import multiprocessing
+from functools import partial
+from typing import Any, Dict, Tuple
+
+from pyshop.shopcore.rest_server import ShopRestServer
+
+from tests.mock_core import MockShopCore
+
+
+def create_mock_core(session_request:Dict[str,Any], call_latency:float=0.0) -> MockShopCore:
+    return MockShopCore(call_latency=call_latency)
+
+
+def start_stand_in(call_latency:float=0.0, worker:str='thread') -> ShopRestServer:
+    # Serve on a free port in a background thread. The port is server.port
+    return ShopRestServer(partial(create_mock_core, call_latency=call_latency), worker=worker).start()
+
+
+def _serve(port_queue:'multiprocessing.Queue', call_latency:float) -> None:
+    server = ShopRestServer(partial(create_mock_core, call_latency=call_latency))
+    port_queue.put(server.port)
+    server.serve_forever()
+
+
+def start_stand_in_process(call_latency:float=0.0) -> Tuple[multiprocessing.Process,int]:
+    # Serve from another process, so that the server does not share the interpreter lock with the client. Returns the
+    # process, to be terminated when done, and the port
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(port_queue, call_latency), daemon=True)
+    process.start()
+    return process, port_queue.get()
@@ -1,2 +1,3 @@
 from __future__ import annotations 
 from .shop_runner import ShopSession
+from .async_shop_runner import AsyncShopSession
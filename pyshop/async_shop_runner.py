@@ -0,0 +1,114 @@
+import json
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from .helpers.typing_annotations import CommandOptions, CommandValues, DataFrameOrSeries, Message
+from .shopcore.async_model_builder import AsyncModelBuilder
+from .shopcore.command_builder import get_derived_command_key
+from .shopcore.shop_rest_async import AsyncRestTransport, AsyncShopRestNative, get_host_transport
+from .shopcore.time_grid import TIME_GRID_CALLS, TimeGrid, build_time_grid, get_time_resolution_calls
+
+
+class AsyncShopSession(object):
+    """
+    A session on a SHOP REST server driven from asyncio, speaking the same protocol as ShopSession(host=...). Sessions
+    are created with await AsyncShopSession.create(host, port), and mirror the command and model API of ShopSession
+    with coroutines: await session.start_sim([], ['3']) and await session.model.reservoir.R1.max_vol.get().
+
+    By default all sessions on the same host and port in an event loop share one transport, which limits the number of
+    requests in flight to the host to max_connections. Pass a transport to share it differently. The time grid is
+    cached between commands, but results and inputs are not cached as in ShopSession.
+    """
+
+    shop_api:AsyncShopRestNative
+    model:AsyncModelBuilder
+    _name:str
+    _id:int
+    _commands:Dict[str,str]
+    _time_grid:Optional[TimeGrid]
+    _all_messages:List[Message]
+
+    def __init__(self, shop_api:AsyncShopRestNative, name:str, session_id:int, command_types:List[str],
+                 object_types:List[str], output_format:str='pandas') -> None:
+        # Use create(), which opens the session on the server
+        self.shop_api = shop_api
+        self._name = name
+        self._id = session_id
+        self._commands = {x.replace(' ', '_'): x for x in command_types}
+        self._time_grid = None
+        self._all_messages = []
+        self.model = AsyncModelBuilder(shop_api, object_types, self.get_time_grid, output_format)
+
+    @classmethod
+    async def create(cls, host:str, port:int=8000, name:str='unnamed', log_file:str='', output_format:str='pandas',
+                     wire_format:str='json', max_connections:int=10, timeout:Optional[float]=None,
+                     transport:Optional[AsyncRestTransport]=None) -> 'AsyncShopSession':
+        if wire_format not in ('json', 'binary'):
+            raise ValueError(f'Unknown wire format "{wire_format}", expected "json" or "binary"')
+        if transport is None:
+            transport = get_host_transport(host, port, max_connections, timeout)
+        session_request = dict(session_name=name, log_file=log_file)
+        if wire_format == 'binary':
+            session_request['wire_formats'] = ['binary', 'json']
+        response = await transport.request('POST', '/session', json.dumps(session_request).encode(),
+                                           {'Content-Type': 'application/json'})
+        if not response.ok:
+            raise Exception(f"Could not connect to server: Status code {response.status_code}")
+        response_json = response.json()
+        if wire_format == 'binary' and response_json.get('wire_format') != 'binary':
+            wire_format = 'json'
+        commands = (await transport.request('GET', '/internal')).json()
+        shop_api = AsyncShopRestNative(transport, response_json['session_id'], wire_format, commands)
+
+        command_types, object_types = await shop_api.call_many([('GetCommandTypesInSystem', ()),
+                                                                ('GetObjectTypeNames', ())])
+        is_input = await shop_api.call_many([('GetObjectInfo', (object_type, 'isInput')) for object_type in object_types])
+        object_types = [object_type for object_type, flag in zip(object_types, is_input) if flag]
+        return cls(shop_api, response_json['session_name'], response_json['session_id'], command_types, object_types,
+                   output_format)
+
+    def __dir__(self) -> List[str]:
+        return list(self._commands.keys()) + [x for x in super().__dir__() if x[0] != '_'
+                                              and x not in self._commands.keys()]
+
+    def __getattr__(self, command:str) -> Callable[[CommandOptions,CommandValues],Awaitable[bool]]:
+        if command[0] == '_':
+            raise AttributeError(command)
+        return partial(self.execute_command, command)
+
+    async def execute_command(self, command:str, options:CommandOptions, values:CommandValues) -> bool:
+        # The command is given as in ShopSession, e.g. "start_sim" or an abbreviation of it
+        command = get_derived_command_key(command.lower(), self._commands)
+        if not isinstance(options, list):
+            options = [options]
+        if not isinstance(values, list):
+            values = [values]
+        options = [str(x) for x in options if str(x)]
+        values = [str(x) for x in values if str(x)]
+        result = await self.shop_api.ExecuteCommand(self._commands[command], options, values)
+        self._time_grid = None
+        return result
+
+    async def set_time_resolution(self, starttime:pd.Timestamp, endtime:pd.Timestamp, timeunit:str,
+                                  timeresolution:Optional[DataFrameOrSeries]=None) -> None:
+        await self.shop_api.call_many(get_time_resolution_calls(starttime, endtime, timeunit, timeresolution))
+        self._time_grid = None
+
+    async def get_time_grid(self) -> TimeGrid:
+        if self._time_grid is None:
+            self._time_grid = build_time_grid(*(await self.shop_api.call_many(TIME_GRID_CALLS)))
+        return self._time_grid
+
+    async def get_time_resolution(self) -> Dict[str,Any]:
+        return (await self.get_time_grid()).as_dict()
+
+    async def get_messages(self, all_messages:bool=False) -> Message:
+        messages = json.loads(await self.shop_api.GetMessages())
+        self._all_messages.extend(messages)
+        return self._all_messages if all_messages else messages
+
+    def get_transport_info(self) -> Dict[str,Any]:
+        return self.shop_api.get_transport_info()
+
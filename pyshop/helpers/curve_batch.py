@@ -0,0 +1,133 @@
+from typing import Any, Dict, List, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+
+from .time_codec import datetime64_to_shop_timestrings
+
+
+class CurveBatch(object):
+    """
+    Several XY curves stored as flat numpy arrays. The points of curve i are x[offsets[i]:offsets[i+1]] and
+    y[offsets[i]:offsets[i+1]]. Each curve is labelled either by a reference value (xy_array attributes) or by a time
+    (xyt attributes). Times are stored as datetime64 values in local wall time, together with the time zone name.
+    """
+
+    offsets:np.ndarray
+    x:np.ndarray
+    y:np.ndarray
+    refs:Optional[np.ndarray]
+    times:Optional[np.ndarray]
+    tz_name:str
+
+    def __init__(self, offsets:Sequence[int], x:Sequence[float], y:Sequence[float], refs:Optional[Sequence[float]]=None,
+                 times:Optional[Sequence[Any]]=None, tz_name:str='') -> None:
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.refs = None if refs is None else np.asarray(refs, dtype=float)
+        self.times = None if times is None else np.asarray(times, dtype='datetime64[ns]')
+        self.tz_name = tz_name
+        if self.offsets.size == 0 or self.offsets[0] != 0 or self.offsets[-1] != self.x.size:
+            raise ValueError('The curve offsets must start at 0 and end at the total number of points')
+        if self.x.size != self.y.size:
+            raise ValueError('The x and y arrays must have the same length')
+        labels = self.refs if self.refs is not None else self.times
+        if labels is not None and labels.size != len(self):
+            raise ValueError('There must be exactly one reference or time per curve')
+
+    @classmethod
+    def from_n_points(cls, n_points:Sequence[int], x:Sequence[float], y:Sequence[float],
+                      refs:Optional[Sequence[float]]=None, times:Optional[Sequence[Any]]=None,
+                      tz_name:str='') -> 'CurveBatch':
+        n_points = np.asarray(n_points, dtype=np.int64)
+        offsets = np.zeros(n_points.size + 1, dtype=np.int64)
+        np.cumsum(n_points, out=offsets[1:])
+        return cls(offsets, x, y, refs=refs, times=times, tz_name=tz_name)
+
+    @classmethod
+    def from_curves(cls, curves:Sequence[Union[pd.Series,pd.DataFrame,Dict[str,Any]]], label:str='ref') -> 'CurveBatch':
+        """
+        Convert a list of curves given as pd.Series (labelled by the name), single column pd.DataFrames (labelled by
+        the column name) or dicts with an "xy" list of points (labelled by the "ref" or "time" key). The label argument
+        decides if the curves are labelled by a reference value ("ref") or a time ("time"). The flat arrays are
+        preallocated, so the conversion is linear in the total number of points.
+        """
+        points = []
+        labels = []
+        for curve in curves:
+            if isinstance(curve, pd.DataFrame):
+                points.append((curve.index.values, curve.iloc[:, 0].values))
+                labels.append(curve.columns[0])
+            elif isinstance(curve, pd.Series):
+                points.append((curve.index.values, curve.values))
+                labels.append(curve.name)
+            else:
+                xy = np.asarray(curve['xy'], dtype=float).reshape(-1, 2)
+                points.append((xy[:, 0], xy[:, 1]))
+                labels.append(curve[label])
+
+        n_points = np.fromiter((len(x) for x, _ in points), dtype=np.int64, count=len(points))
+        offsets = np.zeros(n_points.size + 1, dtype=np.int64)
+        np.cumsum(n_points, out=offsets[1:])
+        x = np.empty(offsets[-1], dtype=float)
+        y = np.empty(offsets[-1], dtype=float)
+        for i, (curve_x, curve_y) in enumerate(points):
+            x[offsets[i]:offsets[i + 1]] = curve_x
+            y[offsets[i]:offsets[i + 1]] = curve_y
+
+        if label == 'time':
+            try:
+                times = pd.DatetimeIndex(labels)
+            except (TypeError, ValueError):
+                # Mixed time zones can not be held by one index, so convert each time to its local wall time
+                timestamps = [pd.Timestamp(t) for t in labels]
+                tz_name = next((str(t.tz) for t in timestamps if t.tzinfo is not None), '')
+                times = [t.tz_localize(None) if t.tzinfo is not None else t for t in timestamps]
+                return cls(offsets, x, y, times=times, tz_name=tz_name)
+            tz_name = '' if times.tz is None else str(times.tz)
+            if times.tz is not None:
+                times = times.tz_localize(None)
+            return cls(offsets, x, y, times=times.values, tz_name=tz_name)
+        refs = [0.0 if ref is None else float(ref) for ref in labels]
+        return cls(offsets, x, y, refs=refs)
+
+    def __len__(self) -> int:
+        return self.offsets.size - 1
+
+    def __getitem__(self, i:int) -> pd.Series:
+        return pd.Series(self.y[self.offsets[i]:self.offsets[i + 1]], index=self.x[self.offsets[i]:self.offsets[i + 1]],
+                         name=self.get_labels()[i])
+
+    @property
+    def n_points(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def get_labels(self) -> List[Any]:
+        # The reference values, or the time zone aware timestamps, of all curves
+        if self.refs is not None:
+            return list(self.refs)
+        if self.times is None:
+            return [None] * len(self)
+        times = pd.DatetimeIndex(self.times)
+        if self.tz_name:
+            times = times.tz_localize(self.tz_name)
+        return list(times)
+
+    def get_shop_timestrings(self) -> List[str]:
+        return datetime64_to_shop_timestrings(self.times).tolist()
+
+    def to_series_list(self) -> List[pd.Series]:
+        labels = self.get_labels()
+        return [pd.Series(self.y[start:stop], index=self.x[start:stop], name=label)
+                for start, stop, label in zip(self.offsets[:-1], self.offsets[1:], labels)]
+
+    def get_points(self) -> List[List[float]]:
+        # All points as [x, y] lists of python floats, converted in one call instead of point by point
+        return np.column_stack((self.x, self.y)).tolist()
+
+    def to_dict_list(self) -> List[Dict[str,Any]]:
+        key = 'ref' if self.refs is not None else 'time'
+        labels = self.get_labels()
+        points = self.get_points()
+        return [{key: label, 'xy': points[start:stop]}
+                for start, stop, label in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist(), labels)]
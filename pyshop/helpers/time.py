@@ -1,29 +1,20 @@
+import numpy as np
 import pandas as pd
 
+from .time_codec import format_shop_timestring, parse_shop_timestring, parse_shop_timestring64
+
 
 def get_shop_timestring(timestamp:pd.Timestamp) -> str:
     # Return timestamp in format expected by Shop
-    return timestamp.strftime('%Y%m%d%H%M%S')
+    return format_shop_timestring(timestamp)
 
 
 def get_shop_datetime(time_string:str, time_zone_name:str) -> pd.Timestamp:
-    time_format = '%Y%m%d%H%M%S'
-    time_string = time_string[0:14]
-    time_string_len = len(time_string)
-
-    # Handle the following cases '%Y%m%d%H%M%S', '%Y%m%d%H%M', %Y%m%d%H' and %Y%m%d'
-    missing_digits = 14 - time_string_len
-    relevant_time_format_len = len(time_format) - missing_digits
-
-    # Make sure format string does not end with "%". These cases will still fail, but return more intelligible errors
-    if relevant_time_format_len % 2 == 1:
-        relevant_time_format_len -= 1
-
-    # Return timestamp using format string inferred from input time_string
-    relevant_time_format = time_format[0:relevant_time_format_len]
-    timestamp = pd.to_datetime(time_string, format=relevant_time_format)
+    # Return timestamp using format string inferred from input time_string. The result is memoized
+    return parse_shop_timestring(time_string, time_zone_name)
 
-    if len(time_zone_name) > 0:
-        timestamp = timestamp.tz_localize(time_zone_name)
 
-    return timestamp
+def get_shop_datetime64(time_string:str) -> np.datetime64:
+    # Parse a SHOP time string to a datetime64 (local wall time) without going through pandas. Missing trailing
+    # digits are completed from the earliest possible time, e.g. '2022010112' is 2022-01-01 12:00:00
+    return parse_shop_timestring64(time_string)
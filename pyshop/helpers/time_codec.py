@@ -0,0 +1,108 @@
+from functools import lru_cache
+from typing import Sequence, Union
+import numpy as np
+import pandas as pd
+
+# Conversion between SHOP time strings ('%Y%m%d%H%M%S', possibly without the trailing parts) and timestamps. Scalar
+# conversions are memoized, since the same start and end times are converted over and over again, and array
+# conversions are done on the digits of the strings without parsing each string with pandas
+
+SHOP_TIME_FORMAT = '%Y%m%d%H%M%S'
+
+# Digits used for the parts that are missing from a shortened time string, e.g. '20220101' is midnight
+_DEFAULT_DIGITS = np.frombuffer(b'19700101000000', dtype=np.uint8) - ord('0')
+_DIGIT_WEIGHTS = np.array([1000, 100, 10, 1, 10, 1, 10, 1, 10, 1, 10, 1, 10, 1], dtype=np.int64)
+_PART_SLICES = [slice(0, 4), slice(4, 6), slice(6, 8), slice(8, 10), slice(10, 12), slice(12, 14)]
+# Positions of the digits in the ISO strings returned by np.datetime_as_string, 'YYYY-MM-DDTHH:MM:SS'
+_ISO_DIGIT_POSITIONS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+
+
+@lru_cache(maxsize=4096)
+def parse_shop_timestring(time_string:str, time_zone_name:str='') -> pd.Timestamp:
+    time_string = time_string[0:14]
+    time_string_len = len(time_string)
+
+    # Handle the following cases '%Y%m%d%H%M%S', '%Y%m%d%H%M', %Y%m%d%H' and %Y%m%d'
+    missing_digits = 14 - time_string_len
+    relevant_time_format_len = len(SHOP_TIME_FORMAT) - missing_digits
+
+    # Make sure format string does not end with "%". These cases will still fail, but return more intelligible errors
+    if relevant_time_format_len % 2 == 1:
+        relevant_time_format_len -= 1
+
+    # Return timestamp using format string inferred from input time_string
+    relevant_time_format = SHOP_TIME_FORMAT[0:relevant_time_format_len]
+    timestamp = pd.to_datetime(time_string, format=relevant_time_format)
+
+    if len(time_zone_name) > 0:
+        timestamp = timestamp.tz_localize(time_zone_name)
+
+    return timestamp
+
+
+@lru_cache(maxsize=4096)
+def _format_wall_time(timestamp:pd.Timestamp) -> str:
+    return timestamp.strftime(SHOP_TIME_FORMAT)
+
+
+def format_shop_timestring(timestamp:pd.Timestamp) -> str:
+    # Timestamps in different time zones compare equal if they refer to the same instant, so the cache is keyed on the
+    # local wall time
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_localize(None)
+    return _format_wall_time(timestamp)
+
+
+def shop_timestrings_to_datetime64(time_strings:Sequence[str]) -> np.ndarray:
+    # Convert SHOP time strings to datetime64 values in local wall time
+    strings = np.asarray(time_strings, dtype=str)
+    if strings.size == 0:
+        return np.array([], dtype='datetime64[ns]')
+    lengths = np.minimum(np.char.str_len(strings), 14)
+    if (lengths % 2 == 1).any() or (lengths < 4).any():
+        raise ValueError(f'Invalid SHOP time strings: {strings[(lengths % 2 == 1) | (lengths < 4)][:5].tolist()}')
+
+    codes = np.char.encode(strings, 'ascii').astype('S14')
+    digits = codes.view(np.uint8).reshape(-1, 14).astype(np.int64) - ord('0')
+    missing = np.arange(14) >= lengths[:, np.newaxis]
+    digits = np.where(missing, _DEFAULT_DIGITS, digits)
+    if ((digits < 0) | (digits > 9)).any():
+        raise ValueError('SHOP time strings can only contain digits')
+
+    weighted = digits * _DIGIT_WEIGHTS
+    year, month, day, hour, minute, second = [weighted[:, part].sum(axis=1) for part in _PART_SLICES]
+    if ((month < 1) | (month > 12) | (day < 1) | (hour > 23) | (minute > 59) | (second > 59)).any():
+        raise ValueError('SHOP time strings contain invalid dates or times')
+
+    months = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    # The number of days in each month, leap years included
+    month_days = ((months + 1).astype('datetime64[D]') - months.astype('datetime64[D]')).astype(np.int64)
+    if (day > month_days).any():
+        raise ValueError('SHOP time strings contain invalid dates or times')
+    days = months.astype('datetime64[D]') + (day - 1).astype('timedelta64[D]')
+    times = days.astype('datetime64[s]') + (hour * 3600 + minute * 60 + second).astype('timedelta64[s]')
+    return times.astype('datetime64[ns]')
+
+
+@lru_cache(maxsize=4096)
+def parse_shop_timestring64(time_string:str) -> np.datetime64:
+    return shop_timestrings_to_datetime64([time_string])[0]
+
+
+def shop_timestrings_to_datetimeindex(time_strings:Sequence[str], time_zone_name:str='') -> pd.DatetimeIndex:
+    times = pd.DatetimeIndex(shop_timestrings_to_datetime64(time_strings))
+    if time_zone_name:
+        times = times.tz_localize(time_zone_name)
+    return times
+
+
+def datetime64_to_shop_timestrings(times:Union[np.ndarray,pd.DatetimeIndex,Sequence[pd.Timestamp]]) -> np.ndarray:
+    # Convert timestamps to SHOP time strings. Time zone aware timestamps are formatted in their local wall time
+    if not isinstance(times, np.ndarray) or times.dtype.kind != 'M':
+        times = pd.DatetimeIndex(times)
+        if times.tz is not None:
+            times = times.tz_localize(None)
+        times = times.values
+    iso = np.datetime_as_string(times.astype('datetime64[s]'), unit='s').astype('S19')
+    digits = iso.view(np.uint8).reshape(-1, 19)[:, _ISO_DIGIT_POSITIONS]
+    return np.ascontiguousarray(digits).view('S14').reshape(-1).astype(str)
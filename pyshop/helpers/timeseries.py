@@ -1,8 +1,39 @@
-from typing import Dict, Sequence, Union
+from typing import Dict, NamedTuple, Sequence, Union
 from .typing_annotations import DataFrameOrSeries
 import pandas as pd
 import numpy as np
 
+
+class TxyArrays(NamedTuple):
+    # A TXY series as plain numpy arrays. The times are integer offsets in the SHOP time unit from the start time,
+    # which is given in local wall time in the time zone tz_name. y has one column per scenario for stochastic series
+    t:np.ndarray
+    y:np.ndarray
+    start:np.datetime64
+    time_unit:str
+    tz_name:str = ''
+
+    def get_datetimes(self) -> np.ndarray:
+        return self.start + self.t * get_time_unit_timedelta(self.time_unit)
+
+
+def get_time_unit_timedelta(time_unit:str) -> np.timedelta64:
+    if time_unit == 'minute':
+        return np.timedelta64(1, 'm')
+    elif time_unit == 'second':
+        return np.timedelta64(1, 's')
+    return np.timedelta64(1, 'h')
+
+
+def get_txy_arrays(start:np.datetime64, time_unit:str, t:Sequence[int], y:Sequence[float], tz_name:str='') -> TxyArrays:
+    t = np.asarray(t, dtype=np.int64)
+    y = np.array(y, dtype=float)
+    if y.ndim > 1 and y.shape[1] == 1:
+        y = y[:, 0]
+    # y is a fresh array, so missing values can be masked in place
+    y[y >= 1.0e40] = np.nan
+    return TxyArrays(t, y, start, time_unit, tz_name)
+
 def create_constant_time_series(value:Union[int,float], start:pd.Timestamp) -> pd.Series:
     return pd.Series([value], index=[start])
 
@@ -25,7 +56,7 @@ def remove_consecutive_duplicates(df:DataFrameOrSeries) -> DataFrameOrSeries:
 
 def get_timestamp_indexed_series(starttime:pd.Timestamp, time_unit:str, t:Sequence[Union[int,float]], y:Sequence[float], column_name:str='data') -> DataFrameOrSeries:
     if not isinstance(t, np.ndarray):
-        t = np.fromiter(t, int)
+        t = np.asarray(t, dtype=np.int64)
     if not isinstance(y, np.ndarray):
         y = np.array(y, dtype=float)
     if time_unit == 'minute':
@@ -109,3 +140,64 @@ def resample_resolution(time:Dict, df:DataFrameOrSeries, delta:float, time_resol
         index = index + (next_unit_index-unit_index)//resolution
     output_df = pd.concat(output_parts)
     return output_df
+
+
+def get_resolution_bin_edges(end_unit_index:int, time_resolution:pd.Series) -> np.ndarray:
+    """
+    Get the edges of the time steps, in time units from the start time, of a (non-constant) time resolution. The time
+    resolution is indexed by the time unit where each resolution is enacted. The last edge is the end of the horizon.
+    """
+    compressed_resolution = remove_consecutive_duplicates(time_resolution.astype(int))
+    starts = np.asarray(compressed_resolution.index, dtype=np.int64)
+    resolutions = np.asarray(compressed_resolution.values, dtype=np.int64)
+    stops = np.append(starts[1:], end_unit_index)
+    edges = [np.arange(start, stop, resolution) for start, stop, resolution in zip(starts, stops, resolutions)]
+    return np.append(np.concatenate(edges), end_unit_index)
+
+
+def resample_step_function(time:Dict, df:DataFrameOrSeries, delta:float, time_resolution:pd.Series) -> DataFrameOrSeries:
+    """
+    Resample a timeseries to a non-constant time resolution without upsampling it to unit resolution first. The input
+    is a step function where each value holds until the next index, and the output is the mean of the step function
+    over each time step. The means are computed from the cumulative integral of the step function evaluated at the
+    time step edges, so all columns of a DataFrame are handled in one pass. A time step that overlaps a NaN value gets
+    a NaN mean. The output is indexed by the start of each time step in time units, as in resample_resolution.
+    """
+    end_unit_index = int((time['endtime'] - time['starttime']).total_seconds() * delta)
+    edges = get_resolution_bin_edges(end_unit_index, time_resolution)
+
+    # Convert the index to time units. A value that changes within a time unit takes effect from the next whole time
+    # unit, and only the last of several changes within the same time unit is kept
+    s = np.ceil(np.round(np.asarray((df.index - time['starttime']).total_seconds()) * delta, 9)).astype(np.int64)
+    v = np.asarray(df.values, dtype=float).reshape(len(df), -1)
+    last_in_unit = np.append(s[1:] != s[:-1], True)
+    s = s[last_in_unit]
+    v = v[last_in_unit]
+
+    # The step function is undefined before its first value
+    if s.size == 0 or s[0] > edges[0]:
+        s = np.insert(s, 0, edges[0])
+        v = np.insert(v, 0, np.nan, axis=0)
+
+    # Integrate the values and the NaN indicator separately, so that a NaN only affects the time steps it overlaps
+    is_nan = np.isnan(v)
+    v = np.where(is_nan, 0.0, v)
+    durations = np.diff(s)[:, np.newaxis]
+    integral = np.zeros_like(v)
+    np.cumsum(v[:-1] * durations, axis=0, out=integral[1:])
+    nan_integral = np.zeros_like(v)
+    np.cumsum(is_nan[:-1] * durations, axis=0, out=nan_integral[1:])
+
+    # Evaluate the integrals at the time step edges
+    k = np.searchsorted(s, edges, side='right') - 1
+    step = (edges - s[k])[:, np.newaxis]
+    edge_integral = integral[k] + v[k] * step
+    edge_nan_integral = nan_integral[k] + is_nan[k] * step
+
+    means = np.diff(edge_integral, axis=0) / np.diff(edges)[:, np.newaxis]
+    means[np.diff(edge_nan_integral, axis=0) > 0] = np.nan
+
+    index = edges[:-1]
+    if isinstance(df, pd.DataFrame):
+        return pd.DataFrame(means, index=index, columns=df.columns)
+    return pd.Series(means[:, 0], index=index, name=df.name)
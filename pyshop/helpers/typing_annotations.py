@@ -1,6 +1,7 @@
 from typing import Any, Dict, List, Sequence, TypeVar, Union 
 import pandas as pd
 from ..shopcore import shop_rest
+from .curve_batch import CurveBatch
 
 ShopCore = TypeVar("ShopCore")  #To represent shop_pybind.ShopCore
 ShopApi = Union[ShopCore,'shop_rest.ShopRestNative']
@@ -10,5 +11,5 @@ CommandValues = Union[IntStrFloat,List[IntStrFloat]]
 CommandOptions = Union[str,List[str]]
 Message = Union[Dict[str,str], List[Dict[str,str]]]
 XyType = Union[pd.Series,List[Dict[str,Any]]]       #XY curves can be specified by pd.Series or a list of dicts
-ShopDatatypes = Union[IntStrFloat,Sequence[IntStrFloat],DataFrameOrSeries,Sequence[DataFrameOrSeries],XyType,List[XyType]]
+ShopDatatypes = Union[IntStrFloat,Sequence[IntStrFloat],DataFrameOrSeries,Sequence[DataFrameOrSeries],XyType,List[XyType],CurveBatch]
 LpModelDatatypes = Sequence[Union[IntStrFloat,bool]]
\ No newline at end of file
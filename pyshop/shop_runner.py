@@ -1,18 +1,20 @@
 import json
 import os
 import sys
-from typing import Dict, List, Optional, Callable, Union
+from typing import Dict, List, Optional, Callable, Tuple, Union
 import pandas as pd
-import numpy as np
-import requests
 
 from .helpers.commands import get_commands_from_file
-from .helpers.time import get_shop_timestring
 from .helpers.typing_annotations import CommandOptions, CommandValues, DataFrameOrSeries, Message, ShopApi
 from .shopcore.model_builder import ModelBuilderType
 from .shopcore.command_builder import CommandBuilder, get_derived_command_key
-from .shopcore.shop_api import get_time_resolution
-from .shopcore.shop_rest import ShopRestNative
+from .shopcore.decomposition import ComponentResults, ModelSnapshot, apply_snapshot, collect_results, \
+    extract_components, take_snapshot
+from .shopcore.input_mirror import InputMirror
+from .shopcore.result_cache import ResultCache
+from .shopcore.results_export import export_results
+from .shopcore.time_grid import TimeGridCache, get_time_resolution_calls
+from .shopcore.shop_rest import RestTransport, ShopRestNative
 from .lp_model.lp_model import LpModelBuilder
 from .shopcore.script_generator import write_pyshop_model_file
 
@@ -25,7 +27,11 @@ class ShopSession(object):
     _host:str
     _port:int
     _auth_headers:Dict[str,str]
+    _transport:RestTransport
     shop_api:ShopApi
+    _time_grid:TimeGridCache
+    _result_cache:ResultCache
+    _input_mirror:Optional[InputMirror]
     model:ModelBuilderType
     lp_model:LpModelBuilder
     _commands:Dict[str,str]
@@ -33,31 +39,40 @@ class ShopSession(object):
     _command:str
 
     def __init__(self, license_path:str = '', silent:bool = True, log_file:str = '', solver_path:str = '', suppress_log:bool = False,
-                 log_gets:bool = False, name:str = 'unnamed', id:int = 1, host:str = '', port:int = 8000) -> None:
+                 log_gets:bool = False, name:str = 'unnamed', id:int = 1, host:str = '', port:int = 8000,
+                 output_format:str = 'pandas', result_cache_size:int = 256, skip_unchanged_inputs:bool = False,
+                 pool_size:int = 10, timeout:Optional[Union[float,Tuple[float,float]]] = None,
+                 wire_format:str = 'json') -> None:
         #Used by the SHOP rest APi 
         self._log_file = log_file
         self._name = name
         self._id = id
         self._sim_has_started = False
 
-        # Create rest client if host ip is given
+        # Create rest client if host ip is given. The connections to the server are kept alive and shared by all calls
+        # of the session, with up to pool_size open connections. timeout is passed on to requests. With
+        # wire_format='binary' the arrays of calls and results are sent as raw buffers instead of JSON lists, if the
+        # server supports it. Otherwise the session falls back to JSON
         if host:
+            if wire_format not in ('json', 'binary'):
+                raise ValueError(f'Unknown wire format "{wire_format}", expected "json" or "binary"')
             self._host = host
             self._port = port
-            self._auth_headers = {
-                'Content-Type': 'application/json'
-            }
-            response = requests.post(
-                f'http://{host}:{port}/session',
-                json=dict(session_name=name, log_file=log_file),
-                headers=self._auth_headers
-            )
+            self._transport = RestTransport(host, port, pool_size, timeout)
+            self._auth_headers = self._transport.headers
+            session_request = dict(session_name=name, log_file=log_file)
+            if wire_format == 'binary':
+                session_request['wire_formats'] = ['binary', 'json']
+            response = self._transport.request('POST', '/session', json=session_request)
             if response.ok:
                 response_json = response.json()
                 self._id = response_json['session_id']
                 self._name = response_json['session_name']
+                if wire_format == 'binary' and response_json.get('wire_format') == 'binary':
+                    self._transport.set_wire_format('binary')
             else:
                 raise Exception(f"Could not connect to server: Status code {response.status_code}")
+            self._auth_headers['session-id'] = str(self._id)
             self.shop_api = ShopRestNative(self)
         else:
             # Initialize a new SHOP session
@@ -90,7 +105,13 @@ class ShopSession(object):
             if solver_path:
                 self.shop_api.OverrideDllPath(solver_path)
 
-        self.model = ModelBuilderType(self.shop_api)
+        self._time_grid = TimeGridCache(self.shop_api)
+        self._result_cache = ResultCache(result_cache_size)
+        # With skip_unchanged_inputs, setting an input to the value it was last set to in this session does not call
+        # the core. This assumes that commands do not change input attributes
+        self._input_mirror = InputMirror() if skip_unchanged_inputs else None
+        self.model = ModelBuilderType(self.shop_api, self._time_grid, output_format, self._result_cache,
+                                      self._input_mirror)
         self.lp_model = LpModelBuilder(self)
         self._commands = {x.replace(' ', '_'): x for x in self.shop_api.GetCommandTypesInSystem()}
         self._all_messages = []
@@ -116,41 +137,76 @@ class ShopSession(object):
         options = filter(lambda x: x, options)
         values = map(str, values)
         values = filter(lambda x: x, values)        
-        return self.shop_api.ExecuteCommand(self._commands[self._command], list(options), list(values))
+        self._flush_and_invalidate()
+        result = self.shop_api.ExecuteCommand(self._commands[self._command], list(options), list(values))
+        self._flush_and_invalidate()
+        return result
+
+    def _flush_and_invalidate(self) -> None:
+        # Called before and after every command, so that commands see the values queued in a model.batch() block and
+        # nothing read before the command is served from the caches after it
+        self.model.flush()
+        self._invalidate_caches()
+
+    def _invalidate_caches(self) -> None:
+        # Called whenever the core may have changed outside of the attribute setters, i.e. after commands and when
+        # reading input files. This also starts a new solve epoch for the cached results
+        self._time_grid.invalidate()
+        self._result_cache.invalidate()
+        self.model.invalidate_topology()
+
+    def _invalidate_inputs(self) -> None:
+        # Called when input attributes may have been changed outside of the attribute setters, i.e. when reading input
+        # files and snapshots
+        if self._input_mirror is not None:
+            self._input_mirror.clear()
+        self._invalidate_caches()
+
+    def clear_cache(self) -> None:
+        self._invalidate_caches()
+
+    def get_cache_info(self) -> Dict[str,int]:
+        # Hit and miss counters and the size of the result cache
+        return self._result_cache.get_info()
+
+    def set_output_format(self, output_format:str) -> None:
+        # Select how attribute values are returned by get(), one of the formats registered in shopcore.datatype_codecs
+        self.model.set_output_format(output_format)
+
+    def export_results(self, path:str, object_types:Optional[List[str]]=None, attributes:Optional[List[str]]=None,
+                       format:str='parquet', batch_rows:int=1000000) -> int:
+        # Stream all output attributes to a parquet, Arrow IPC or npz file. See shopcore.results_export
+        return export_results(self.shop_api, self.model, path, object_types, attributes, format, batch_rows)
+
+    def extract_components(self, shared_types:Optional[List[str]]=None) -> List[ModelSnapshot]:
+        # One snapshot of the input model for each group of unrelated objects (e.g. independent watercourses), which can
+        # be solved in separate sessions with load_snapshot. See shopcore.decomposition
+        return extract_components(self.shop_api, self.model, shared_types)
+
+    def take_snapshot(self) -> ModelSnapshot:
+        return take_snapshot(self.shop_api, self.model)
+
+    def load_snapshot(self, snapshot:ModelSnapshot) -> None:
+        apply_snapshot(self.shop_api, self.model, snapshot)
+        self._invalidate_inputs()
+
+    def collect_results(self) -> ComponentResults:
+        # All output attributes with values, in a form that can be passed to merge_results of another session
+        return collect_results(self.shop_api, self.model)
+
+    def merge_results(self, results:ComponentResults) -> None:
+        # Serve results solved in other sessions from the result cache, until the next command is executed or input is
+        # set. Results are typically merged after solving the snapshots from extract_components in separate processes
+        self.model.merge_results(results)
 
     def set_time_resolution(self, starttime:pd.Timestamp, endtime:pd.Timestamp, timeunit:str, timeresolution:Optional[DataFrameOrSeries]=None) -> None:
-        # Reformat timestamps to format expected by Shop
-        start_string = get_shop_timestring(starttime)
-        end_string = get_shop_timestring(endtime)
-        # Handle time resolution
-        # Constant
-        if not isinstance(timeresolution, pd.DataFrame) and not isinstance(timeresolution, pd.Series):
-            self.shop_api.SetTimeResolution(start_string, end_string, timeunit)
-        # Timestamp indexed
-        elif isinstance(timeresolution.index, pd.DatetimeIndex):
-            # Handle time horizon outside time resolution definition
-            if timeresolution.loc[starttime:starttime].empty:
-                timeresolution.loc[starttime] = np.nan
-                timeresolution.sort_index(inplace=True)
-                timeresolution.ffill(inplace=True)
-            timeresolution = timeresolution[starttime:endtime]
-            # Transform timestamp index to integer index expected by Shop
-            timeunit_delta = pd.Timedelta(hours=1) if timeunit == 'hour' else pd.Timedelta(minutes=1)
-            timeres_t = [int((t - starttime) / timeunit_delta) for t in timeresolution.index]
-            self.shop_api.SetTimeResolution(start_string, end_string, timeunit, timeres_t, timeresolution.values)
-        # Integer indexed
-        else:
-            timeres_t = timeresolution.index.values
-            self.shop_api.SetTimeResolution(start_string, end_string, timeunit, timeres_t, timeresolution.values)
-
-        # Save the time zone in the API so that it can be added to the output TXYs
-        tz_name = starttime.tzname()
-        if tz_name is not None:
-            self.shop_api.SetTimeZone(tz_name)
+        for name, args in get_time_resolution_calls(starttime, endtime, timeunit, timeresolution):
+            getattr(self.shop_api, name)(*args)
+        self._invalidate_caches()
 
     def get_time_resolution(self) -> Dict:
         # Get time resolution
-        return get_time_resolution(self.shop_api)
+        return self._time_grid.get().as_dict()
 
     def get_messages(self, all_messages:bool=False) -> Message:
         # Get all new messages from the buffer as a dict.
@@ -196,6 +252,7 @@ class ShopSession(object):
 
     def read_ascii_file(self, file_path:str) -> None:
         self.shop_api.ReadShopAsciiFile(file_path)
+        self._invalidate_inputs()
 
     def load_yaml(self, file_path:str='', yaml_string:str='') -> None:
         if file_path != '' and yaml_string != '':
@@ -206,6 +263,7 @@ class ShopSession(object):
             self.shop_api.ReadYamlString(yaml_file_string)
         elif yaml_string != '':
             self.shop_api.ReadYamlString(yaml_string)
+        self._invalidate_inputs()
 
     def dump_yaml(self, file_path:str='', input_only:bool=True, compress_txy:bool=True, compress_connection:bool=True) -> str:
         if file_path != '':
@@ -220,6 +278,7 @@ class ShopSession(object):
 
     def run_command_file(self, folder:str, command_file:str, break_before_opt:bool = False, skip_reading_input:bool = False) -> None:
         
+        self._flush_and_invalidate()
         with open(os.path.join(folder, command_file), 'r', encoding='iso-8859-1') as run_file:
             file_string = run_file.read()
             run_commands = get_commands_from_file(file_string)
@@ -247,6 +306,7 @@ class ShopSession(object):
             else:            
                 #Directly execute all other commands
                 self.shop_api.ExecuteCommand(command_text, options, values)
+                self._flush_and_invalidate()
 
     def run_command_file_progress(self, folder:str, command_file:str) -> None:
         with open(os.path.join(folder, command_file), 'r', encoding='iso-8859-1') as run_file:
@@ -259,11 +319,13 @@ class ShopSession(object):
             command_list.append(command['command'])
             options_list.append(command['options'])
             values_list.append(command['values'])
+        self._flush_and_invalidate()
         self.shop_api.ExecuteCommandList(command_list, options_list, values_list)
+        self._flush_and_invalidate()
 
     def execute_command(self) -> CommandBuilder:
         # Terminal function for executing SHOP commands that gives code completion for SHOP commands.
-        return CommandBuilder(self.shop_api)
+        return CommandBuilder(self.shop_api, self._flush_and_invalidate)
 
     def get_shop_version(self) -> str:
         version_string = self.shop_api.GetVersionString()
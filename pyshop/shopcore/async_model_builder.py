@@ -0,0 +1,209 @@
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+from types import MappingProxyType
+
+from ..helpers.typing_annotations import ShopDatatypes
+from .datatype_codecs import check_output_format, format_value, get_codec, get_output_format_name
+from .model_builder import get_relation_type
+from .shop_rest_async import AsyncShopRestNative
+from .time_grid import TimeGrid
+
+
+class AsyncModelBuilder(object):
+    """
+    The model of an AsyncShopSession. It mirrors the object, attribute and relation API of ModelBuilderType, with the
+    calls to the server as coroutines, e.g. await session.model.reservoir.add_object('R1') and
+    await session.model.reservoir.R1.max_vol.set(10.0). Values are read and written by the datatype codecs, and all core
+    calls of one get_values or set_values are sent in a single round trip. The attributes of an object type are read
+    from the server the first time the type is used.
+    """
+
+    _shop_api:AsyncShopRestNative
+    _types:Dict[str,'AsyncObjectType']
+    _datatypes:Dict[str,Mapping[str,str]]
+    _get_time_grid:Callable[[],Awaitable[TimeGrid]]
+    _output_format:str
+
+    def __init__(self, shop_api:AsyncShopRestNative, object_types:Sequence[str],
+                 get_time_grid:Callable[[],Awaitable[TimeGrid]], output_format:str='pandas') -> None:
+        check_output_format(output_format)
+        self._shop_api = shop_api
+        self._types = {object_type: AsyncObjectType(self, object_type) for object_type in object_types}
+        self._datatypes = {}
+        self._get_time_grid = get_time_grid
+        self._output_format = output_format
+
+    def __dir__(self) -> List[str]:
+        return list(self._types.keys())
+
+    def __getattr__(self, object_type:str) -> 'AsyncObjectType':
+        if object_type[0] == '_' or object_type not in self._types:
+            raise AttributeError(f'Unknown object type: "{object_type}"')
+        return self._types[object_type]
+
+    def __getitem__(self, object_type:str) -> 'AsyncObjectType':
+        return self.__getattr__(object_type)
+
+    def get_shop_api(self) -> AsyncShopRestNative:
+        return self._shop_api
+
+    def get_output_format(self) -> str:
+        return self._output_format
+
+    def set_output_format(self, output_format:str) -> None:
+        check_output_format(output_format)
+        self._output_format = output_format
+
+    async def get_datatypes(self, object_type:str) -> Mapping[str,str]:
+        # The datatype of each attribute of the object type
+        datatypes = self._datatypes.get(object_type, None)
+        if datatypes is None:
+            names, types = await self._shop_api.call_many([('GetObjectTypeAttributeNames', (object_type,)),
+                                                           ('GetObjectTypeAttributeDatatypes', (object_type,))])
+            datatypes = MappingProxyType(dict(zip(names, types)))
+            self._datatypes[object_type] = datatypes
+        return datatypes
+
+    async def get_object_names(self, object_type:str) -> List[str]:
+        names, types = await self._shop_api.call_many([('GetObjectNamesInSystem', ()), ('GetObjectTypesInSystem', ())])
+        return [name for name, t in zip(names, types) if t == object_type]
+
+    async def get_values(self, object_type:str, object_names:Sequence[str], attribute_names:Sequence[str],
+                         raw:bool=False, output_format:Optional[str]=None) -> List[Dict[str,ShopDatatypes]]:
+        # The values of the given attributes of the given objects, as one dict from attribute name to value per object
+        datatypes = await self.get_datatypes(object_type)
+        unknown = [attribute_name for attribute_name in attribute_names if attribute_name not in datatypes]
+        if unknown:
+            raise ValueError(f'Unknown attributes for object type "{object_type}": {unknown}')
+        if output_format is None and not raw:
+            output_format = self._output_format
+        format_name = get_output_format_name(True, raw, output_format)
+        need_time_grid = any(datatypes[a] in ['txy', 'xyt'] for a in attribute_names)
+        time_grid = await self._get_time_grid() if need_time_grid else None
+
+        values = [{} for _ in object_names]
+        fetches = []
+        calls = []
+        for attribute_name in attribute_names:
+            codec = get_codec(datatypes[attribute_name])
+            for i, object_name in enumerate(object_names):
+                if codec is None:
+                    values[i][attribute_name] = None
+                    continue
+                object_calls = codec.get_calls(object_type, object_name, attribute_name, time_grid)
+                fetches.append((i, attribute_name, codec, len(object_calls)))
+                calls += object_calls
+        if not fetches:
+            return values
+        results = await self._shop_api.call_many(calls)
+        position = 0
+        for i, attribute_name, codec, n_calls in fetches:
+            value = codec.decode(results[position:position + n_calls], time_grid)
+            values[i][attribute_name] = format_value(value, codec.datatype, format_name, attribute_name)
+            position += n_calls
+        return values
+
+    async def set_values(self, writes:Sequence[Tuple[str,str,str,ShopDatatypes]]) -> None:
+        # Write (object type, object name, attribute name, value) tuples. The writes are grouped by datatype, so that
+        # each codec can share work between the writes of its datatype
+        groups = {}
+        for object_type, object_name, attribute_name, value in writes:
+            datatypes = await self.get_datatypes(object_type)
+            if attribute_name not in datatypes:
+                raise ValueError(f'Unknown attribute for object type "{object_type}": "{attribute_name}"')
+            if get_codec(datatypes[attribute_name]) is not None:
+                groups.setdefault(datatypes[attribute_name], []).append((object_type, object_name, attribute_name, value))
+        need_time_grid = any(get_codec(datatype).uses_time_grid for datatype in groups)
+        time_grid = await self._get_time_grid() if need_time_grid else None
+        calls = []
+        for datatype, group in groups.items():
+            for write_calls in get_codec(datatype).set_calls_many(group, time_grid):
+                calls += write_calls
+        if calls:
+            await self._shop_api.call_many(calls)
+
+
+class AsyncObjectType(object):
+
+    _model:AsyncModelBuilder
+    _type:str
+
+    def __init__(self, model:AsyncModelBuilder, object_type:str) -> None:
+        self._model = model
+        self._type = object_type
+
+    def __getattr__(self, name:str) -> 'AsyncObject':
+        if name[0] == '_':
+            raise AttributeError(name)
+        return AsyncObject(self._model, self._type, name)
+
+    def __getitem__(self, name:str) -> 'AsyncObject':
+        return AsyncObject(self._model, self._type, name)
+
+    async def add_object(self, name:str) -> 'AsyncObject':
+        await self._model.get_shop_api().AddObject(self._type, name)
+        return AsyncObject(self._model, self._type, name)
+
+    async def get_object_names(self) -> List[str]:
+        return await self._model.get_object_names(self._type)
+
+    async def get_values(self, object_names:Sequence[str], attribute_names:Sequence[str], raw:bool=False,
+                         output_format:Optional[str]=None) -> List[Dict[str,ShopDatatypes]]:
+        return await self._model.get_values(self._type, object_names, attribute_names, raw, output_format)
+
+
+class AsyncObject(object):
+    # Objects are not checked against the server when they are looked up. The server reports unknown objects when
+    # their attributes are read or written
+
+    _model:AsyncModelBuilder
+    _type:str
+    _name:str
+
+    def __init__(self, model:AsyncModelBuilder, object_type:str, name:str) -> None:
+        self._model = model
+        self._type = object_type
+        self._name = name
+
+    def __getattr__(self, attr_name:str) -> 'AsyncAttribute':
+        if attr_name[0] == '_':
+            raise AttributeError(attr_name)
+        return AsyncAttribute(self._model, self._type, self._name, attr_name)
+
+    def __getitem__(self, attr_name:str) -> 'AsyncAttribute':
+        return AsyncAttribute(self._model, self._type, self._name, attr_name)
+
+    def get_name(self) -> str:
+        return self._name
+
+    def get_type(self) -> str:
+        return self._type
+
+    async def connect_to(self, related_object:'AsyncObject', connection_type:str='') -> None:
+        shop_api = self._model.get_shop_api()
+        if connection_type:
+            relation_type = get_relation_type(shop_api, self._type, related_object.get_type(), connection_type)
+        else:
+            relation_type = await shop_api.GetDefaultRelationType(self._type, related_object.get_type())
+        await shop_api.AddRelation(self._type, self._name, relation_type, related_object.get_type(),
+                                   related_object.get_name())
+
+
+class AsyncAttribute(object):
+
+    _model:AsyncModelBuilder
+    _type:str
+    _name:str
+    _attr_name:str
+
+    def __init__(self, model:AsyncModelBuilder, object_type:str, name:str, attr_name:str) -> None:
+        self._model = model
+        self._type = object_type
+        self._name = name
+        self._attr_name = attr_name
+
+    async def get(self, raw:bool=False, output_format:Optional[str]=None) -> Any:
+        values = await self._model.get_values(self._type, [self._name], [self._attr_name], raw, output_format)
+        return values[0][self._attr_name]
+
+    async def set(self, value:ShopDatatypes) -> None:
+        await self._model.set_values([(self._type, self._name, self._attr_name, value)])
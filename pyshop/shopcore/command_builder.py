@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 from ..helpers.typing_annotations import CommandOptions, CommandValues, ShopApi
 
 
@@ -7,11 +7,14 @@ class OptionBuilder(object): # pragma: no cover
     _shop_api:ShopApi
     _commands:Dict[str,str]
     _command:str
+    _on_execute:Optional[Callable[[],None]]
 
-    def __init__(self, shop_api:ShopApi, commands:Dict[str,str], command:str) -> None:
+    def __init__(self, shop_api:ShopApi, commands:Dict[str,str], command:str,
+                 on_execute:Optional[Callable[[],None]]=None) -> None:
         self._shop_api = shop_api
         self._commands = commands
         self._command = command
+        self._on_execute = on_execute
 
     def set(self, options:CommandOptions, values:CommandValues) -> bool:
         self._command = get_derived_command_key(self._command, self._commands)
@@ -25,20 +28,28 @@ class OptionBuilder(object): # pragma: no cover
         options = filter(lambda x: x, options)
         values = map(str, values)
         values = filter(lambda x: x, values)
-        return self._shop_api.ExecuteCommand(self._commands[self._command], list(options), list(values))
+        # on_execute is called both before and after the command
+        if self._on_execute is not None:
+            self._on_execute()
+        result = self._shop_api.ExecuteCommand(self._commands[self._command], list(options), list(values))
+        if self._on_execute is not None:
+            self._on_execute()
+        return result
 
 
 class CommandBuilder(object): # pragma: no cover
 
     _shop_api:ShopApi
     _commands:Dict[str,str]
+    _on_execute:Optional[Callable[[],None]]
 
-    def __init__(self, shop_api:ShopApi) -> None:
+    def __init__(self, shop_api:ShopApi, on_execute:Optional[Callable[[],None]]=None) -> None:
         self._shop_api = shop_api
         self._commands = {x.replace(' ', '_'): x for x in shop_api.GetCommandTypesInSystem()}
+        self._on_execute = on_execute
 
     def __getattr__(self, command:str) -> OptionBuilder:
-        return OptionBuilder(self._shop_api, self._commands, command.lower())
+        return OptionBuilder(self._shop_api, self._commands, command.lower(), self._on_execute)
 
     def __dir__(self) -> List[str]:
         return list(self._commands.keys())
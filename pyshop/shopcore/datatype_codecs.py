@@ -0,0 +1,586 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+from ..helpers.typing_annotations import ShopApi, ShopDatatypes
+from ..helpers.curve_batch import CurveBatch
+from ..helpers.time import get_shop_datetime64, get_shop_timestring
+from ..helpers.time_codec import shop_timestrings_to_datetime64
+from ..helpers.timeseries import TxyArrays, create_constant_time_series, get_timestamp_indexed_series, get_txy_arrays, \
+    get_time_unit_timedelta, resample_step_function
+from .time_grid import TimeGrid, get_shop_timzone_name, get_time_grid
+
+# A call to the SHOP API given by the name of the function and its arguments
+CoreCall = Tuple[str, Tuple[Any, ...]]
+# Converts a decoded value of one datatype to an output format. The attribute name is given as the second argument
+Formatter = Callable[[Any, str], Any]
+
+
+class DatatypeCodec(object):
+    """
+    Reads and writes the attributes of one SHOP datatype. A read is split in the core calls it needs (get_calls) and a
+    decode step that turns the results of these calls into a plain numpy based value, so the same codec can be used
+    both for direct calls and for calls that are sent in batches. How a decoded value is presented to the user is left
+    to the registered output formats.
+    """
+
+    datatype:str = ''
+    # True if the calls of the codec depend on the time grid of the session
+    uses_time_grid:bool = False
+
+    def get_calls(self, object_type:str, object_name:str, attribute_name:str,
+                  time_grid:Optional[TimeGrid]=None) -> List[CoreCall]:
+        raise NotImplementedError
+
+    def decode(self, results:List[Any], time_grid:Optional[TimeGrid]=None) -> Any:
+        raise NotImplementedError
+
+    def get(self, shop_api:ShopApi, object_type:str, object_name:str, attribute_name:str,
+            time_grid:Optional[TimeGrid]=None) -> Any:
+        if self.uses_time_grid and time_grid is None:
+            time_grid = get_time_grid(shop_api)
+        calls = self.get_calls(object_type, object_name, attribute_name, time_grid)
+        return self.decode(call_shop_api_batched(shop_api, calls), time_grid)
+
+    def set_calls(self, object_type:str, object_name:str, attribute_name:str, value:ShopDatatypes,
+                  time_grid:Optional[TimeGrid]=None) -> List[CoreCall]:
+        raise NotImplementedError
+
+    def set_calls_many(self, writes:List[Tuple[str,str,str,ShopDatatypes]],
+                       time_grid:Optional[TimeGrid]=None) -> List[List[CoreCall]]:
+        # The calls of several (object type, object name, attribute name, value) writes. Codecs can override this to
+        # share work between the writes
+        return [self.set_calls(object_type, object_name, attribute_name, value, time_grid)
+                for object_type, object_name, attribute_name, value in writes]
+
+    def set(self, shop_api:ShopApi, object_type:str, object_name:str, attribute_name:str, value:ShopDatatypes,
+            time_grid:Optional[TimeGrid]=None) -> None:
+        if self.uses_time_grid and time_grid is None:
+            time_grid = get_time_grid(shop_api)
+        call_shop_api_batched(shop_api, self.set_calls(object_type, object_name, attribute_name, value, time_grid))
+
+
+def call_shop_api(shop_api:ShopApi, calls:List[CoreCall]) -> List[Any]:
+    return [getattr(shop_api, name)(*args) for name, args in calls]
+
+
+def can_batch(shop_api:ShopApi) -> bool:
+    # Backends that can execute several calls in one round trip, like the REST client, implement call_many. The class
+    # is checked, since the REST client turns any missing attribute into a remote call
+    return hasattr(type(shop_api), 'call_many')
+
+
+def call_shop_api_batched(shop_api:ShopApi, calls:List[CoreCall]) -> List[Any]:
+    if len(calls) > 1 and can_batch(shop_api):
+        return shop_api.call_many(calls)
+    return call_shop_api(shop_api, calls)
+
+
+class ValueCodec(DatatypeCodec):
+    # Datatypes that are read and written with a single call: int, double, string and string_array
+
+    def __init__(self, datatype:str, getter:str, setter:str, cast:Optional[Callable[[Any],Any]]=None) -> None:
+        self.datatype = datatype
+        self._getter = getter
+        self._setter = setter
+        self._cast = cast
+
+    def get_calls(self, object_type:str, object_name:str, attribute_name:str,
+                  time_grid:Optional[TimeGrid]=None) -> List[CoreCall]:
+        return [(self._getter, (object_type, object_name, attribute_name))]
+
+    def decode(self, results:List[Any], time_grid:Optional[TimeGrid]=None) -> Any:
+        return results[0]
+
+    def set_calls(self, object_type:str, object_name:str, attribute_name:str, value:ShopDatatypes,
+                  time_grid:Optional[TimeGrid]=None) -> List[CoreCall]:
+        if self._cast is not None:
+            value = self._cast(value)
+        return [(self._setter, (object_type, object_name, attribute_name, value))]
+
+
+class ArrayCodec(ValueCodec):
+    # Numeric arrays are decoded to numpy arrays, and empty arrays to None
+
+    def __init__(self, datatype:str, getter:str, setter:str, dtype:type) -> None:
+        super().__init__(datatype, getter, setter)
+        self._dtype = dtype
+
+    def decode(self, results:List[Any], time_grid:Optional[TimeGrid]=None) -> Optional[np.ndarray]:
+        value = np.asarray(results[0], dtype=self._dtype)
+        if value.size == 0:
+            return None
+        return value
+
+
+class XyCodec(DatatypeCodec):
+    # XY curves are decoded to a CurveBatch holding a single curve
+    datatype = 'xy'
+
+    def get_calls(self, object_type:str, object_name:str, attribute_name:str,
+                  time_grid:Optional[TimeGrid]=None) -> List[CoreCall]:
+        args = (object_type, object_name, attribute_name)
+        return [('GetXyCurveReference', args), ('GetXyCurveX', args), ('GetXyCurveY', args)]
+
+    def decode(self, results:List[Any], time_grid:Optional[TimeGrid]=None) -> Optional[CurveBatch]:
+        ref, x, y = results
+        x = np.asarray(x, dtype=float)
+        if x.size == 0:
+            return None
+        return CurveBatch([0, x.size], x, y, refs=[ref])
+
+    def set_calls(self, object_type:str, object_name:str, attribute_name:str, value:ShopDatatypes,
+                  time_grid:Optional[TimeGrid]=None) -> List[CoreCall]:
+        if isinstance(value, CurveBatch):
+            if len(value.offsets) != 2:
+                raise ValueError(f'An xy attribute holds a single curve, got a CurveBatch with {len(value.offsets) - 1} '
+                                 f'curves')
+            ref = 0.0 if value.refs is None else float(value.refs[0])
+            x, y = value.x, value.y
+        elif isinstance(value, pd.Series):
+            ref = 0.0 if value.name is None else float(value.name)
+            x, y = value.index.values, value.values
+        else:
+            ref = value['ref']
+            x = [x[0] for x in value['xy']]
+            y = [x[1] for x in value['xy']]
+        return [('SetXyCurve', (object_type, object_name, attribute_name, ref, x, y))]
+
+
+class SyCodec(DatatypeCodec):
+    # SY curves are decoded to a tuple of the list of strings and the numpy array of values
+    datatype = 'sy'
+
+    def get_calls(self, object_type:str, object_name:str, attribute_name:str,
+                  time_grid:Optional[TimeGrid]=None) -> List[CoreCall]:
+        args = (object_type, object_name, attribute_name)
+        return [('GetSyCurveS', args), ('GetSyCurveY', args)]
+
+    def decode(self, results:List[Any], time_grid:Optional[TimeGrid]=None) -> Optional[Tuple[List[str],np.ndarray]]:
+        s, y = results
+        y = np.asarray(y, dtype=float)
+        if y.size == 0:
+            return None
+        return list(s), y
+
+    def set_calls(self, object_type:str, object_name:str, attribute_name:str, value:ShopDatatypes,
+                  time_grid:Optional[TimeGrid]=None) -> List[CoreCall]:
+        if isinstance(value, tuple):
+            s, y = list(value[0]), value[1]
+        elif isinstance(value, pd.Series):
+            s, y = value.index.to_list(), value.values
+        else:
+            s = [s[0] for s in value['sy']]
+            y = [x[1] for x in value['sy']]
+        return [('SetSyCurve', (object_type, object_name, attribute_name, list(s), y))]
+
+
+class XyArrayCodec(DatatypeCodec):
+    datatype = 'xy_array'
+
+    def get_calls(self, object_type:str, object_name:str, attribute_name:str,
+                  time_grid:Optional[TimeGrid]=None) -> List[CoreCall]:
+        args = (object_type, object_name, attribute_name)
+        return [('GetXyCurveArrayReferences', args), ('GetXyCurveArrayNPoints', args), ('GetXyCurveArrayX', args),
+                ('GetXyCurveArrayY', args)]
+
+    def decode(self, results:List[Any], time_grid:Optional[TimeGrid]=None) -> Optional[CurveBatch]:
+        refs, n, x, y = results
+        n = np.asarray(n, dtype=np.int64)
+        if n.size == 0:
+            return None
+        return CurveBatch.from_n_points(n, x, y, refs=np.asarray(refs, dtype=float))
+
+    def set_calls(self, object_type:str, object_name:str, attribute_name:str, value:ShopDatatypes,
+                  time_grid:Optional[TimeGrid]=None) -> List[CoreCall]:
+        if len(value) == 0:
+            return []
+        if not isinstance(value, CurveBatch):
+            value = CurveBatch.from_curves(value, 'ref')
+        return [('SetXyCurveArray', (object_type, object_name, attribute_name, value.refs, value.n_points, value.x,
+                                     value.y))]
+
+
+class XytCodec(DatatypeCodec):
+    # XYT curves are read between the start and end time of the time grid
+    datatype = 'xyt'
+    uses_time_grid = True
+
+    def get_calls(self, object_type:str, object_name:str, attribute_name:str,
+                  time_grid:Optional[TimeGrid]=None) -> List[CoreCall]:
+        args = (object_type, object_name, attribute_name)
+        interval_args = args + (get_shop_timestring(time_grid.starttime), get_shop_timestring(time_grid.endtime))
+        return [('GetXyTCurveTimeStrings', args), ('GetXyTCurveX', interval_args), ('GetXyTCurveY', interval_args),
+                ('GetXyTCurveN', interval_args)]
+
+    def decode(self, results:List[Any], time_grid:Optional[TimeGrid]=None) -> Optional[CurveBatch]:
+        return self._decode_curves(shop_timestrings_to_datetime64(results[0]), results[1:], time_grid.tz_name)
+
+    def _decode_curves(self, times:np.ndarray, results:List[Any], tz_name:str) -> Optional[CurveBatch]:
+        x, y, n = results
+        n = np.asarray(n, dtype=np.int64)
+        #Before SHOP 14.4.3.0, the function GetXyTCurveN returned a value for every time step in the optimization.
+        #This can result in many 0 values for time steps where there is no xy table defined.
+        #Remove these zeros since the x and y arrays only return values for times where there is an xy
+        n = n[n != 0]
+        if n.size == 0:
+            return None
+        n_curves = min(n.size, len(times))
+        return CurveBatch.from_n_points(n[:n_curves], x, y, times=times[:n_curves], tz_name=tz_name)
+
+    def get(self, shop_api:ShopApi, object_type:str, object_name:str, attribute_name:str,
+            time_grid:Optional[TimeGrid]=None) -> Optional[CurveBatch]:
+        if time_grid is None:
+            time_grid = get_time_grid(shop_api)
+        calls = self.get_calls(object_type, object_name, attribute_name, time_grid)
+        try:
+            times = shop_timestrings_to_datetime64(call_shop_api(shop_api, calls[:1])[0])
+        #To keep backwards compatibility before GetXyTCurveTimeStrings was implemented in the API. Get the time indices instead
+        except AttributeError:
+            time_indices = np.asarray(shop_api.GetXyTCurveTimes(object_type, object_name, attribute_name), dtype=np.int64)
+            shop_start_time = get_shop_datetime64(shop_api.GetStartTime())
+            times = shop_start_time + time_indices * get_time_unit_timedelta(time_grid.timeunit)
+        return self._decode_curves(times, call_shop_api_batched(shop_api, calls[1:]), time_grid.tz_name)
+
+    def set_calls(self, object_type:str, object_name:str, attribute_name:str, value:ShopDatatypes,
+                  time_grid:Optional[TimeGrid]=None) -> List[CoreCall]:
+        if len(value) == 0:
+            return []
+        #XYT curves are XY curves specified for different times
+        #Convert times from timestamp to time strings in SHOP format
+        if not isinstance(value, CurveBatch):
+            value = CurveBatch.from_curves(value, 'time')
+        #Note that the times are a regular python list while n, x, and y are np arrays
+        return [('SetXyTCurve', (object_type, object_name, attribute_name, value.get_shop_timestrings(),
+                                 value.n_points, value.x, value.y))]
+
+    def set(self, shop_api:ShopApi, object_type:str, object_name:str, attribute_name:str, value:ShopDatatypes,
+            time_grid:Optional[TimeGrid]=None) -> None:
+        # The time grid is not needed to write XYT curves
+        call_shop_api_batched(shop_api, self.set_calls(object_type, object_name, attribute_name, value, time_grid))
+
+
+class TxyCodec(DatatypeCodec):
+    # TXY series are decoded to TxyArrays. Input values are fitted to the time grid before they are written
+    datatype = 'txy'
+    uses_time_grid = True
+
+    def get_calls(self, object_type:str, object_name:str, attribute_name:str,
+                  time_grid:Optional[TimeGrid]=None) -> List[CoreCall]:
+        args = (object_type, object_name, attribute_name)
+        return [('GetTxySeriesStartTime', args), ('GetTxySeriesT', args), ('GetTxySeriesY', args)]
+
+    def decode(self, results:List[Any], time_grid:Optional[TimeGrid]=None) -> Optional[TxyArrays]:
+        start_time, t, y = results
+        if not start_time:
+            return None
+        return get_txy_arrays(get_shop_datetime64(start_time), time_grid.timeunit, t, y, time_grid.tz_name)
+
+    def get(self, shop_api:ShopApi, object_type:str, object_name:str, attribute_name:str,
+            time_grid:Optional[TimeGrid]=None) -> Optional[TxyArrays]:
+        # Only the time unit and time zone are needed, so the full time grid is not fetched when it is not given, and
+        # the series is not read at all if it has no start time. Backends that batch calls read everything in one round
+        # trip instead
+        if can_batch(shop_api):
+            calls = self.get_calls(object_type, object_name, attribute_name)
+            if time_grid is None:
+                calls += [('GetTimeUnit', ()), ('GetTimeZone', ())]
+            results = shop_api.call_many(calls)
+            if time_grid is not None:
+                return self.decode(results, time_grid)
+            start_time, t, y, time_unit, tz_name = results
+            if not start_time:
+                return None
+            return get_txy_arrays(get_shop_datetime64(start_time), time_unit, t, y, tz_name)
+        start_time = shop_api.GetTxySeriesStartTime(object_type, object_name, attribute_name)
+        if not start_time:
+            return None
+        t = shop_api.GetTxySeriesT(object_type, object_name, attribute_name)
+        y = shop_api.GetTxySeriesY(object_type, object_name, attribute_name)
+        if time_grid is not None:
+            time_unit, tz_name = time_grid.timeunit, time_grid.tz_name
+        else:
+            time_unit, tz_name = shop_api.GetTimeUnit(), get_shop_timzone_name(shop_api)
+        return get_txy_arrays(get_shop_datetime64(start_time), time_unit, t, y, tz_name)
+
+    def set_calls(self, object_type:str, object_name:str, attribute_name:str, value:ShopDatatypes,
+                  time_grid:Optional[TimeGrid]=None) -> List[CoreCall]:
+        # Make sure we continue on with a Series or a DataFrame. A constant is a single point at the start time when the
+        # time resolution is constant, so it is written directly
+        if isinstance(value, float) or isinstance(value, int):
+            if time_grid.has_constant_resolution():
+                return [('SetTxySeries', (object_type, object_name, attribute_name,
+                                          get_shop_timestring(time_grid.starttime), np.array([0]), np.array([value])))]
+            df = create_constant_time_series(value, time_grid.starttime)
+        elif isinstance(value, TxyArrays):
+            df = txy_to_pandas(value, attribute_name)
+        else:
+            df = value
+
+        if df.shape[0] == 0:
+            return [('SetTxySeries', (object_type, object_name, attribute_name, get_shop_timestring(time_grid.starttime),
+                                      [], []))]
+
+        # Extract data in time interval. The value of the caller is copied before the start time is added, so that
+        # setting the same Series again gives the same value
+        if df.loc[time_grid.starttime:time_grid.starttime].empty:
+            df = df.copy()
+            df.loc[time_grid.starttime] = df.loc[:time_grid.starttime].iloc[-1]
+            df = df.sort_index()
+        df = df.loc[time_grid.starttime:time_grid.endtime]
+
+        # Get scaling factor
+        delta = get_time_unit_scale(time_grid.timeunit)
+        txy_start_time = df.index[0]
+
+        # If we have a non-constant time resolution, we need to resample input accordingly. The input is a step
+        # function, so the mean over each time step is computed directly from it
+        if not time_grid.has_constant_resolution():
+            time_resolution = pd.Series(data=time_grid.resolution_y, index=time_grid.resolution_t)
+            df = resample_step_function(time_grid._asdict(), df, delta, time_resolution)
+            t = df.index
+        else:
+            t = (df.index - time_grid.starttime).total_seconds() * delta
+        y = df.values
+        return [('SetTxySeries', (object_type, object_name, attribute_name, get_shop_timestring(txy_start_time),
+                                  t.astype(int), y))]
+
+    def set_calls_many(self, writes:List[Tuple[str,str,str,ShopDatatypes]],
+                       time_grid:Optional[TimeGrid]=None) -> List[List[CoreCall]]:
+        # Series that share their time index, which is common when many series are loaded from one table, are fitted to
+        # a constant time resolution once. Other values are fitted one by one by set_calls
+        fitted = None
+        calls = []
+        for object_type, object_name, attribute_name, value in writes:
+            if isinstance(value, (pd.Series, pd.DataFrame)) and time_grid.has_constant_resolution():
+                index = value.index
+                if fitted is None or not (index is fitted[0] or index.equals(fitted[0])):
+                    fit = fit_time_index(index, time_grid)
+                    fitted = None if fit is None else (index,) + fit
+                if fitted is not None:
+                    positions, t = fitted[1], fitted[2]
+                    calls.append([('SetTxySeries', (object_type, object_name, attribute_name,
+                                                    get_shop_timestring(time_grid.starttime), t,
+                                                    value.values[positions]))])
+                    continue
+            calls.append(self.set_calls(object_type, object_name, attribute_name, value, time_grid))
+        return calls
+
+
+def get_time_unit_scale(time_unit:str) -> float:
+    # The number of time units per second
+    if time_unit == 'minute':
+        return 1/60
+    elif time_unit == 'second':
+        return 1
+    return 1/3600
+
+
+def fit_time_index(index:pd.Index, time_grid:TimeGrid) -> Optional[Tuple[np.ndarray,np.ndarray]]:
+    # The positions of the values of a step function with the given index that are written for a constant time
+    # resolution, and their times in time units from the start time. The value in effect at the start time is moved to
+    # the start time, and values after the end time are dropped, as in TxyCodec.set_calls. Returns None for indexes that
+    # set_calls handles differently, e.g. unsorted indexes and indexes without a value in effect at the start time
+    if not isinstance(index, pd.DatetimeIndex) or not index.is_monotonic_increasing or not index.is_unique:
+        return None
+    if (index.tz is None) != (time_grid.starttime.tz is None):
+        return None
+    first = index.searchsorted(time_grid.starttime, side='right') - 1
+    last = index.searchsorted(time_grid.endtime, side='right')
+    if first < 0 or last <= first:
+        return None
+    offsets = (index[first + 1:last] - time_grid.starttime).total_seconds().to_numpy()
+    t = np.concatenate([[0], offsets * get_time_unit_scale(time_grid.timeunit)]).astype(int)
+    return np.arange(first, last), t
+
+
+_codecs:Dict[str,DatatypeCodec] = {}
+
+
+def register_codec(codec:DatatypeCodec) -> None:
+    # Register a codec for its datatype, replacing any codec already registered for it
+    _codecs[codec.datatype] = codec
+
+
+def get_codec(datatype:str) -> Optional[DatatypeCodec]:
+    return _codecs.get(datatype, None)
+
+
+for _codec in [ValueCodec('int', 'GetIntValue', 'SetIntValue', int),
+               ArrayCodec('int_array', 'GetIntArray', 'SetIntArray', np.int64),
+               ValueCodec('double', 'GetDoubleValue', 'SetDoubleValue'),
+               ArrayCodec('double_array', 'GetDoubleArray', 'SetDoubleArray', float),
+               ValueCodec('string', 'GetStringValue', 'SetStringValue'),
+               ValueCodec('string_array', 'GetStringArray', 'SetStringArray'),
+               XyCodec(), SyCodec(), XyArrayCodec(), XytCodec(), TxyCodec()]:
+    register_codec(_codec)
+
+
+# Output formats. Each format maps datatypes to a formatter of the decoded values, and decoded values of datatypes
+# without a formatter are returned as they are
+
+def txy_to_pandas(value:TxyArrays, attribute_name:str) -> Union[pd.Series,pd.DataFrame]:
+    start = pd.Timestamp(value.start)
+    if value.tz_name:
+        start = start.tz_localize(value.tz_name)
+    return get_timestamp_indexed_series(start, value.time_unit, value.t, value.y, column_name=attribute_name)
+
+
+def _array_to_list(value:np.ndarray, attribute_name:str) -> List[Any]:
+    return value.tolist()
+
+
+def _get_wall_time_strings(times:np.ndarray) -> List[str]:
+    return np.datetime_as_string(times, unit='s').tolist()
+
+
+def _get_curve_points(batch:CurveBatch) -> Tuple[List[List[float]],List[List[float]]]:
+    # Convert all values at once and slice the python lists, which is faster than converting each curve for many small
+    # curves
+    x = batch.x.tolist()
+    y = batch.y.tolist()
+    bounds = list(zip(batch.offsets[:-1].tolist(), batch.offsets[1:].tolist()))
+    return [x[start:stop] for start, stop in bounds], [y[start:stop] for start, stop in bounds]
+
+
+def _curve_batch_to_dict(batch:CurveBatch, attribute_name:str) -> Dict[str,Any]:
+    x, y = _get_curve_points(batch)
+    if batch.refs is not None:
+        return dict(ref=batch.refs.tolist(), x=x, y=y)
+    return dict(time=_get_wall_time_strings(batch.times), tz=batch.tz_name, x=x, y=y)
+
+
+def _xy_to_dict(batch:CurveBatch, attribute_name:str) -> Dict[str,Any]:
+    return dict(ref=float(batch.refs[0]), x=batch.x.tolist(), y=batch.y.tolist())
+
+
+def import_pyarrow(feature:str='The "arrow" output format') -> Any:
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(f'{feature} requires pyarrow to be installed') from e
+    return pyarrow
+
+
+def _get_arrow_times(times:np.ndarray, tz_name:str) -> Any:
+    pa = import_pyarrow()
+    times = pd.DatetimeIndex(times)
+    if tz_name:
+        times = times.tz_localize(tz_name)
+    return pa.array(times)
+
+
+def _curve_batch_to_arrow(batch:CurveBatch, attribute_name:str) -> Any:
+    # One row per point, with the index and label of the curve repeated for all its points
+    pa = import_pyarrow()
+    n_points = batch.n_points
+    columns = {'curve': pa.array(np.repeat(np.arange(len(batch)), n_points))}
+    if batch.refs is not None:
+        columns['ref'] = pa.array(np.repeat(batch.refs, n_points))
+    else:
+        columns['time'] = _get_arrow_times(np.repeat(batch.times, n_points), batch.tz_name)
+    columns['x'] = pa.array(batch.x)
+    columns['y'] = pa.array(batch.y)
+    return pa.table(columns)
+
+
+def _sy_to_arrow(value:Tuple[List[str],np.ndarray], attribute_name:str) -> Any:
+    pa = import_pyarrow()
+    return pa.table({'s': pa.array(value[0], type=pa.string()), 'y': pa.array(value[1])})
+
+
+def _txy_to_arrow(value:TxyArrays, attribute_name:str) -> Any:
+    # Stochastic series get one column per scenario
+    pa = import_pyarrow()
+    columns = {'time': _get_arrow_times(value.get_datetimes(), value.tz_name)}
+    if value.y.ndim > 1:
+        for i in range(value.y.shape[1]):
+            columns[str(i)] = pa.array(value.y[:, i])
+    else:
+        columns[attribute_name] = pa.array(value.y)
+    return pa.table(columns)
+
+
+def _array_to_arrow(value:Any, attribute_name:str) -> Any:
+    return import_pyarrow().array(value)
+
+
+_pandas_formatters:Dict[str,Formatter] = {
+    'int_array': _array_to_list,
+    'double_array': _array_to_list,
+    'xy': lambda batch, attribute_name: pd.Series(batch.y, index=batch.x, name=batch.refs[0]),
+    'sy': lambda value, attribute_name: pd.Series(value[1], index=value[0]),
+    'xy_array': lambda batch, attribute_name: batch.to_series_list(),
+    'xyt': lambda batch, attribute_name: batch.to_series_list(),
+    'txy': txy_to_pandas,
+}
+
+_output_formats:Dict[str,Dict[str,Formatter]] = {
+    # The default format, used when dataframe=True
+    'pandas': _pandas_formatters,
+    # Nested python lists and dicts, used when dataframe=False. TXY series are still returned as pandas objects. The
+    # "dict" format below gives the more compact {"x": [...], "y": [...]} layout for curves
+    'python': dict(_pandas_formatters, **{
+        'xy': lambda batch, attribute_name: dict(ref=float(batch.refs[0]), xy=batch.get_points()),
+        'sy': lambda value, attribute_name: dict(sy=[[s, y] for s, y in zip(value[0], value[1].tolist())]),
+        'xy_array': lambda batch, attribute_name: batch.to_dict_list(),
+        'xyt': lambda batch, attribute_name: batch.to_dict_list(),
+    }),
+    # The decoded values as they are, used when raw=True
+    'numpy': {},
+    # Columnar dicts of lists. Times are given as ISO formatted strings in local wall time, with the time zone name
+    'dict': {
+        'int_array': _array_to_list,
+        'double_array': _array_to_list,
+        'xy': _xy_to_dict,
+        'sy': lambda value, attribute_name: dict(s=value[0], y=value[1].tolist()),
+        'xy_array': _curve_batch_to_dict,
+        'xyt': _curve_batch_to_dict,
+        'txy': lambda value, attribute_name: dict(time=_get_wall_time_strings(value.get_datetimes()), tz=value.tz_name,
+                                                  y=value.y.tolist()),
+    },
+    # pyarrow arrays and tables, only available when pyarrow is installed
+    'arrow': {
+        'int_array': _array_to_arrow,
+        'double_array': _array_to_arrow,
+        'string_array': _array_to_arrow,
+        'xy': _curve_batch_to_arrow,
+        'sy': _sy_to_arrow,
+        'xy_array': _curve_batch_to_arrow,
+        'xyt': _curve_batch_to_arrow,
+        'txy': _txy_to_arrow,
+    },
+}
+
+
+def register_output_format(name:str, formatters:Dict[str,Formatter]) -> None:
+    # Add a new output format, or add or replace formatters of an existing one
+    _output_formats.setdefault(name, {}).update(formatters)
+
+
+def get_output_formats() -> List[str]:
+    return list(_output_formats.keys())
+
+
+def check_output_format(output_format:str) -> None:
+    if output_format not in _output_formats:
+        raise ValueError(f'Unknown output format "{output_format}", expected one of {get_output_formats()}')
+
+
+def get_output_format_name(dataframe:bool=True, raw:bool=False, output_format:Optional[str]=None) -> str:
+    # The output_format argument takes precedence over the older raw and dataframe flags
+    if output_format is not None:
+        return output_format
+    if raw:
+        return 'numpy'
+    return 'pandas' if dataframe else 'python'
+
+
+def format_value(value:Any, datatype:str, output_format:str='pandas', attribute_name:str='') -> Any:
+    check_output_format(output_format)
+    if value is None:
+        return None
+    formatter = _output_formats[output_format].get(datatype, None)
+    if formatter is None:
+        return value
+    return formatter(value, attribute_name)
@@ -0,0 +1,130 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from ..helpers.typing_annotations import ShopApi
+from .model_builder import ModelBuilderType
+from .shop_api import get_attribute_value, set_attribute
+from .time_grid import get_shop_timzone_name
+from .topology import ObjectKey
+
+# (from type, from name, relation type, to type, to name)
+RelationKey = Tuple[str, str, str, str, str]
+# (object type, object name, attribute name)
+AttributeKey = Tuple[str, str, str]
+ComponentResults = Dict[AttributeKey,Any]
+
+
+class TimeSettings(NamedTuple):
+    # The time resolution of a session as stored in the core
+    start:str
+    end:str
+    time_unit:str
+    t:List[int]
+    y:List[float]
+    tz_name:str
+
+
+class ModelSnapshot(NamedTuple):
+    # The input model of a session, or a part of it, that can be pickled and applied to another session. Attribute
+    # values are stored in the "numpy" output format, which can be passed directly to the attribute setters
+    time_settings:TimeSettings
+    objects:List[ObjectKey]
+    attributes:List[Tuple[str,str,str,str,Any]]     # (object type, object name, attribute name, datatype, value)
+    relations:List[RelationKey]
+
+
+def get_time_settings(shop_api:ShopApi) -> TimeSettings:
+    return TimeSettings(shop_api.GetStartTime(), shop_api.GetEndTime(), shop_api.GetTimeUnit(),
+                        list(shop_api.GetTimeResolutionT()), list(shop_api.GetTimeResolutionY()),
+                        get_shop_timzone_name(shop_api))
+
+
+def take_snapshot(shop_api:ShopApi, model:ModelBuilderType,
+                  objects:Optional[Sequence[ObjectKey]]=None) -> ModelSnapshot:
+    # Read the non-default input attributes of the given objects, or all objects, and the relations between them
+    topology = model.get_topology()
+    if objects is None:
+        objects = list(zip(topology.types, topology.names))
+    time_grid = model.get_time_grid()
+
+    attributes = []
+    for object_type, object_name in objects:
+        schema = model.get_schema(object_type)
+        for attribute_name in schema.attribute_names:
+            if not schema.is_input(attribute_name) or 'INTERNAL' in schema.get_license_name(attribute_name):
+                continue
+            if shop_api.AttributeIsDefault(object_type, object_name, attribute_name):
+                continue
+            datatype = schema.datatypes[attribute_name]
+            value = get_attribute_value(shop_api, object_name, object_type, attribute_name, datatype, raw=True,
+                                        time_grid=time_grid)
+            if value is not None:
+                attributes.append((object_type, object_name, attribute_name, datatype, value))
+
+    # Logical relations are listed in both directions, but only need to be added once
+    included = set(topology.get_position(key) for key in objects)
+    relations = []
+    seen = set()
+    for position in sorted(included):
+        for relation_type in topology.get_valid_relation_types(topology.types[position]):
+            for related in topology.get_related(position, 'output', [relation_type]):
+                if related not in included or (related, position, relation_type) in seen:
+                    continue
+                seen.add((position, related, relation_type))
+                relations.append(topology.get_key(position) + (relation_type,) + topology.get_key(related))
+    return ModelSnapshot(get_time_settings(shop_api), list(objects), attributes, relations)
+
+
+def extract_components(shop_api:ShopApi, model:ModelBuilderType,
+                       shared_types:Optional[Iterable[str]]=None) -> List[ModelSnapshot]:
+    # One snapshot for each connected component, including the shared objects
+    topology = model.get_topology()
+    components, shared = topology.get_connected_components(shared_types)
+    return [take_snapshot(shop_api, model, [topology.get_key(i) for i in shared + component])
+            for component in components]
+
+
+def apply_snapshot(shop_api:ShopApi, model:ModelBuilderType, snapshot:ModelSnapshot) -> None:
+    # Create the objects, attributes and relations of the snapshot. Objects that already exist, such as
+    # global_settings, are reused
+    time_settings = snapshot.time_settings
+    shop_api.SetTimeResolution(time_settings.start, time_settings.end, time_settings.time_unit, time_settings.t,
+                               time_settings.y)
+    if time_settings.tz_name:
+        shop_api.SetTimeZone(time_settings.tz_name)
+    object_index = model.get_object_index()
+    for object_type, object_name in snapshot.objects:
+        if (object_type, object_name) not in object_index:
+            model.add_object(object_type, object_name)
+    for object_type, object_name, attribute_name, datatype, value in snapshot.attributes:
+        set_attribute(shop_api, object_name, object_type, attribute_name, datatype, value)
+    for from_type, from_name, relation_type, to_type, to_name in snapshot.relations:
+        shop_api.AddRelation(from_type, from_name, relation_type, to_type, to_name)
+    model.invalidate_topology()
+
+
+def collect_results(shop_api:ShopApi, model:ModelBuilderType,
+                    objects:Optional[Sequence[ObjectKey]]=None) -> ComponentResults:
+    # The output attributes of the given objects, or all objects, that have values. The values are in the "numpy"
+    # output format and can be merged into another session with merge_results
+    object_index = model.get_object_index()
+    if objects is None:
+        objects = list(zip(object_index.types, object_index.names))
+    time_grid = model.get_time_grid()
+    results = {}
+    for object_type, object_name in objects:
+        for attribute_name, datatype in model.get_output_attributes(object_type).items():
+            value = get_attribute_value(shop_api, object_name, object_type, attribute_name, datatype, raw=True,
+                                        time_grid=time_grid)
+            if value is not None:
+                results[(object_type, object_name, attribute_name)] = value
+    return results
+
+
+def solve_components(snapshots:Sequence[ModelSnapshot], solve:Callable[[ModelSnapshot],ComponentResults],
+                     processes:Optional[int]=None) -> List[ComponentResults]:
+    # Run solve on each snapshot in a pool of worker processes. solve must be a picklable, i.e. module level, function
+    # that builds a session from the snapshot, runs the commands and returns the results from collect_results
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(solve, snapshots))
+
@@ -0,0 +1,133 @@
+from hashlib import blake2b
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from ..helpers.curve_batch import CurveBatch
+
+# (object type, object name, attribute name)
+InputKey = Tuple[str, str, str]
+
+
+def _update_hash(h:Any, value:Any) -> None:
+    # Every value is prefixed by a tag, so that e.g. the string "1" and the integer 1 give different hashes. Arrays are
+    # hashed from their memory buffer together with their dtype and shape. Raises TypeError for values that can not be
+    # hashed exactly, e.g. objects with a truncated repr
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            h.update(b'o' + str(value.shape).encode())
+            for item in value.ravel().tolist():
+                _update_hash(h, item)
+        else:
+            h.update(b'a' + value.dtype.str.encode() + str(value.shape).encode())
+            if value.dtype.kind in 'mM':
+                value = value.view(np.int64)
+            h.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, (list, tuple)):
+        h.update(b'l' + str(len(value)).encode())
+        for item in value:
+            _update_hash(h, item)
+    elif isinstance(value, str):
+        h.update(b's' + str(len(value)).encode() + b':' + value.encode())
+    elif value is None or isinstance(value, (bool, int, float, pd.Timestamp, pd.Timedelta)):
+        h.update(b'v' + type(value).__name__.encode() + b':' + repr(value).encode())
+    elif isinstance(value, np.generic):
+        h.update(b'g' + value.dtype.str.encode() + value.tobytes())
+    elif isinstance(value, dict):
+        h.update(b'd')
+        _update_hash(h, list(value.items()))
+    elif isinstance(value, pd.DatetimeIndex):
+        # Time zone aware times would otherwise be converted to an object array of timestamps
+        h.update(b't' + str(value.tz).encode())
+        _update_hash(h, value.asi8)
+    elif isinstance(value, pd.Index):
+        h.update(b'i')
+        _update_hash(h, value.to_numpy())
+    elif isinstance(value, pd.Series):
+        h.update(b'S')
+        _update_hash(h, (value.name, value.index, value.to_numpy()))
+    elif isinstance(value, pd.DataFrame):
+        h.update(b'D')
+        _update_hash(h, (value.columns, value.index, value.to_numpy()))
+    elif isinstance(value, CurveBatch):
+        h.update(b'c')
+        _update_hash(h, (value.offsets, value.x, value.y, value.refs, value.times, value.tz_name))
+    else:
+        raise TypeError(f'Can not hash values of type {type(value).__name__}')
+
+
+def hash_value(value:Any) -> Optional[bytes]:
+    # A digest of an attribute value, or None if the value contains objects that can not be hashed
+    h = blake2b(digest_size=16)
+    try:
+        _update_hash(h, value)
+    except TypeError:
+        return None
+    return h.digest()
+
+
+class InputMirror(object):
+    """
+    Records a hash of the last value written to each input attribute, so that writing the same value again can be
+    skipped. The value is hashed as it was given to the setter, together with the time grid it is fitted to, so a value
+    given in another form than the last one (e.g. an int instead of a float) is written again. Every write that
+    changes a value increments the version of the mirror, and mark() and changed_since() tell which attributes have
+    been changed since a given version. The owner of the mirror is responsible for clearing it whenever the core is
+    changed outside of the attribute setters, e.g. when a model file is read.
+    """
+
+    version:int
+    written:int
+    skipped:int
+    _hashes:Dict[Hashable,bytes]
+    _versions:Dict[Hashable,int]
+
+    def __init__(self) -> None:
+        self.version = 0
+        self.written = 0
+        self.skipped = 0
+        self._hashes = {}
+        self._versions = {}
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def is_unchanged(self, key:InputKey, digest:bytes) -> bool:
+        if self._hashes.get(key) == digest:
+            self.skipped += 1
+            return True
+        return False
+
+    def record(self, key:InputKey, digest:Optional[bytes]) -> None:
+        # Called after the value has been written to the core. A value that could not be hashed is recorded as changed,
+        # but will be written again the next time it is set
+        self.version += 1
+        self.written += 1
+        if digest is None:
+            self._hashes.pop(key, None)
+        else:
+            self._hashes[key] = digest
+        # Keep the keys in the order they were last changed
+        self._versions.pop(key, None)
+        self._versions[key] = self.version
+
+    def mark(self) -> int:
+        return self.version
+
+    def changed_since(self, mark:int) -> List[InputKey]:
+        # The attributes written with a new value after mark was taken, in the order they were last written
+        return [key for key, version in self._versions.items() if version > mark]
+
+    def forget(self, object_type:str, object_name:str) -> None:
+        # Drop the hashes of an object that has been removed from the core
+        for key in [key for key in self._versions if key[0] == object_type and key[1] == object_name]:
+            self._hashes.pop(key, None)
+            del self._versions[key]
+
+    def clear(self) -> None:
+        # The values in the core are no longer known. The version is kept, so earlier marks stay valid
+        self._hashes.clear()
+        self._versions.clear()
+
+    def get_info(self) -> Dict[str,int]:
+        return dict(written=self.written, skipped=self.skipped, size=len(self._hashes), version=self.version)
@@ -1,11 +1,24 @@
-from typing import Callable, Dict, List, Optional, Union
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+import json
 import webbrowser
 from graphviz import Digraph
+import numpy as np
 import pandas as pd
 
 from ..helpers.typing_annotations import ShopApi, ShopDatatypes, XyType
-from ..shopcore.shop_api import get_attribute_value, get_xyt_attribute, get_attribute_info, \
+from ..helpers.curve_batch import CurveBatch
+from ..shopcore.shop_api import get_attribute_value, get_attribute_values, get_xyt_attribute, get_attribute_info, \
     set_attribute, get_object_info
+from ..shopcore.datatype_codecs import call_shop_api_batched, check_output_format, format_value, \
+    get_codec, get_output_format_name
+from ..shopcore.input_mirror import InputKey, InputMirror, hash_value
+from ..shopcore.object_index import ObjectIndex
+from ..shopcore.result_cache import MISSING, ResultCache
+from ..shopcore.schema import ObjectTypeSchema, SchemaRegistry
+from ..shopcore.time_grid import TimeGrid, TimeGridCache
+from ..shopcore.topology import TopologyIndex
+from ..shopcore.topology_export import build_graphviz, select_objects, to_adjacency_dict, to_graphml
 
 # This check can be used to stops infinite recursion in some debuggers when stepping into __init__. Debuggers can call
 # __dir__ before/during the initialization, and if any class attributes are referred to in both __dir__ and __getattr__
@@ -13,17 +26,79 @@ from ..shopcore.shop_api import get_attribute_value, get_xyt_attribute, get_attr
 def is_private_attr(attr:str) -> bool:
     return attr[0] == '_'
 
+# Cells of a DataFrame that are None or NaN are not set by bulk_add
+def is_missing_value(value:Any) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
+
+def get_cached_value(result_cache:ResultCache, object_type:str, object_name:str, attribute_name:str, datatype:str,
+                     raw:bool, output_format:Optional[str]) -> Any:
+    # An output value from the result cache, or a value merged into it formatted in the given output format. Returns
+    # MISSING if neither is found
+    value = result_cache.get((object_type, object_name, attribute_name, raw, output_format))
+    if value is not MISSING:
+        return value
+    merged = result_cache.get_merged((object_type, object_name, attribute_name))
+    if merged is not MISSING:
+        return format_value(merged, datatype, get_output_format_name(True, raw, output_format), attribute_name)
+    return MISSING
+
+CONNECTION_TYPES = {'standard': 'connection_standard', 'spill': 'connection_spill', 'bypass': 'connection_bypass'}
+EDGE_COLUMNS = ['from_type', 'from_name', 'to_type', 'to_name', 'connection_type']
+
+def get_relation_type(shop_api:ShopApi, from_type:str, to_type:str, connection_type:str,
+                      default_relation_types:Optional[Dict[Tuple[str,str],str]]=None) -> str:
+    # Translate a connection type ("standard", "spill" or "bypass", or the full relation type name) to a relation type.
+    # The default relation type of the core is used if none is given, and is memoized in default_relation_types
+    connection_type = connection_type.lower() if connection_type else ''
+    if not connection_type:
+        if default_relation_types is None:
+            return shop_api.GetDefaultRelationType(from_type, to_type)
+        key = (from_type, to_type)
+        if key not in default_relation_types:
+            default_relation_types[key] = shop_api.GetDefaultRelationType(from_type, to_type)
+        return default_relation_types[key]
+    if connection_type in CONNECTION_TYPES:
+        return CONNECTION_TYPES[connection_type]
+    if connection_type in CONNECTION_TYPES.values():
+        return connection_type
+    raise ValueError(f'Unknown connection type: "{connection_type}"\nPyShop will use default connection '
+                     f'types if none are provided. Provided values can be "spill" or "bypass"')
+
 class ModelBuilderType(object):
 
     _shop_api:ShopApi
     _all_types:List[str]
     _types:Dict[str,'ModelBuilderObject']
-
-    def __init__(self, shop_api:ShopApi) -> None: # pragma: no cover
+    _index:ObjectIndex
+    _time_grid:TimeGridCache
+    _output_format:str
+    _schemas:SchemaRegistry
+    _result_cache:Optional[ResultCache]
+    _topology:Optional[TopologyIndex]
+    _input_mirror:Optional[InputMirror]
+    _pending:Optional[Dict[InputKey,Tuple[str,ShopDatatypes]]]
+    _batch_depth:int
+
+    def __init__(self, shop_api:ShopApi, time_grid:Optional[TimeGridCache]=None,
+                 output_format:str='pandas', result_cache:Optional[ResultCache]=None,
+                 input_mirror:Optional[InputMirror]=None) -> None: # pragma: no cover
+        # Output attributes are only cached if a result cache is given, since the owner of the cache is responsible for
+        # invalidating it when commands are executed. Likewise, writes of unchanged input values are only skipped if an
+        # input mirror is given, and its owner clears it when the core is changed outside of the attribute setters
         self._shop_api = shop_api
+        self._time_grid = time_grid if time_grid is not None else TimeGridCache(shop_api)
+        self._result_cache = result_cache
+        self._input_mirror = input_mirror
+        self._pending = None
+        self._batch_depth = 0
+        check_output_format(output_format)
+        self._output_format = output_format
+        self._schemas = SchemaRegistry(shop_api)
         self._all_types = [object_type for object_type in shop_api.GetObjectTypeNames()
                            if shop_api.GetObjectInfo(object_type, 'isInput')]
         self._types = {}
+        self._index = ObjectIndex()
+        self._topology = None
         self.update()
 
     def __getattr__(self, object_type:str) -> Optional['ModelBuilderObject']: # pragma: no cover
@@ -42,104 +117,422 @@ class ModelBuilderType(object):
     def __getitem__(self, item:str) -> Optional['ModelBuilderObject']: # pragma: no cover
         return self.__getattr__(item)
 
-    def update(self) -> None: # pragma: no cover
-        objects = {object_type: [] for object_type in self._all_types}
-        for object_name, object_type in zip(self._shop_api.GetObjectNamesInSystem(),
-                                            self._shop_api.GetObjectTypesInSystem()):
-            objects[object_type].append(object_name)
-        self._types = {object_type: ModelBuilderObject(self._shop_api, self, object_type, object_names)
-                       for object_type, object_names in objects.items()}
-
-    def build_connection_tree(self, filename:str='topology', write_file:bool=False, display_units:bool=False) -> Digraph:
-        types = ['reservoir', 'plant', 'gate', 'junction', 'junction_gate', 'creek_intake', 'tunnel', 'river']
-        relation_types = ['connection_standard', 'connection_spill', 'connection_bypass']
-        object_types = self._shop_api.GetObjectTypesInSystem()
-        object_names = self._shop_api.GetObjectNamesInSystem()
-        dot = Digraph(comment='SHOP topology')
-        connections = []
-        networks = []
-        subgraphs = []
-        for i, (name, object_type) in enumerate(zip(object_names, object_types)):
-            if object_type in types:
-                shape = 'ellipse'
-                bgcolor = 'none'
-                subgraph = None
-                if object_type == 'plant':
-                    shape = 'box'
-                    bgcolor = 'rosybrown1'
-                elif object_type == 'reservoir':
-                    shape = 'invtriangle'
-                    bgcolor = 'skyblue'
-                    added_to_network = self._shop_api.GetIntValue(object_type, name, "added_to_network")
-                    if added_to_network:
-                        network_no = self._shop_api.GetIntValue(object_type, name, "network_no")
-                        if network_no not in networks:
-                            networks.append(network_no)
-                            s = Digraph(comment='Network')
-                            s.attr(rank='same')
-                            subgraphs.append(s)
-                        subgraph = subgraphs[networks.index(network_no)]
-                elif object_type == 'junction' or object_type == 'junction_gate':
-                    shape = 'point'
-                elif object_type == 'tunnel':
-                    shape = 'box'
-                    bgcolor = 'gray83'
-                elif object_type == 'river':
-                    shape = 'invtrapezium'
-                    bgcolor = 'lightsteelblue2'
-                dot.node('{0}_{1}'.format(object_type, name), label=name, shape=shape, style='filled',
-                         fillcolor=bgcolor)
-                if subgraph is not None:
-                    subgraph.node('{0}_{1}'.format(object_type, name), label=name, shape=shape, style='filled',
-                                  fillcolor=bgcolor)
-                for relation in relation_types:
-                    for connection in self._shop_api.GetRelations(object_type, name, relation):
-                        connections.append((i, connection, relation))
-        for connection in connections:
-            input_type = object_types[connection[0]]
-            output_type = object_types[connection[1]]
-
-            # Don't add generators and pumps to the graph if display_units is False
-            if input_type in ["generator", "pump"] or output_type in ["generator", "pump"]:
-                if not display_units:
+    def get_time_grid(self) -> TimeGrid: # pragma: no cover
+        return self._time_grid.get()
+
+    def get_object_types(self) -> List[str]: # pragma: no cover
+        if self._shop_api.UpdateNeeded():
+            self.update()
+        return list(self._types.keys())
+
+    def get_schema(self, object_type:str) -> ObjectTypeSchema: # pragma: no cover
+        return self._schemas.get(object_type)
+
+    def get_output_attributes(self, object_type:str) -> Mapping[str,str]: # pragma: no cover
+        # The names and datatypes of the output attributes of an object type
+        return self._schemas.get(object_type).get_output_attributes()
+
+    def get_result_cache(self) -> Optional[ResultCache]: # pragma: no cover
+        return self._result_cache
+
+    def invalidate_results(self) -> None: # pragma: no cover
+        if self._result_cache is not None:
+            self._result_cache.invalidate()
+
+    def get_output_result_cache(self, object_type:str, attribute_name:str) -> Optional[ResultCache]: # pragma: no cover
+        # The result cache, if the attribute is an output attribute. Inputs are read from the core every time
+        if self._result_cache is None or attribute_name not in self.get_output_attributes(object_type):
+            return None
+        return self._result_cache
+
+    def get_merged_results(self, object_type:str, object_names:Sequence[str],
+                           attribute_name:str) -> Dict[str,ShopDatatypes]: # pragma: no cover
+        # The values merged with merge_results for the attribute of the given objects, by object name, in the "numpy"
+        # output format. Objects without a merged value are left out
+        result_cache = self.get_output_result_cache(object_type, attribute_name)
+        if result_cache is None:
+            return {}
+        merged = {}
+        for object_name in object_names:
+            value = result_cache.get_merged((object_type, object_name, attribute_name))
+            if value is not MISSING:
+                merged[object_name] = value
+        return merged
+
+    def get_values(self, object_type:str, object_names:Sequence[str], attribute_names:Sequence[str], raw:bool=False,
+                   output_format:Optional[str]=None) -> List[Dict[str,ShopDatatypes]]: # pragma: no cover
+        """
+        The values of the given attributes of the given objects, as one dict from attribute name to value per object.
+        The values are the same as returned by get(), and output values are cached in the same way. The core calls of
+        all values that are not cached are made together, in one round trip for backends that support it.
+        """
+        self.flush()
+        if output_format is None and not raw:
+            output_format = self._output_format
+        format_name = get_output_format_name(True, raw, output_format)
+        datatypes = self._schemas.get(object_type).datatypes
+        time_grid = self.get_time_grid() if any(datatypes[a] in ['txy', 'xyt'] for a in attribute_names) else None
+
+        values = [{} for _ in object_names]
+        fetches = []
+        calls = []
+        for attribute_name in attribute_names:
+            codec = get_codec(datatypes[attribute_name])
+            result_cache = self.get_output_result_cache(object_type, attribute_name)
+            for i, object_name in enumerate(object_names):
+                if codec is None:
+                    values[i][attribute_name] = None
                     continue
-            elif input_type not in types or output_type not in types:
-                continue
+                if result_cache is not None:
+                    value = get_cached_value(result_cache, object_type, object_name, attribute_name, codec.datatype,
+                                             raw, output_format)
+                    if value is not MISSING:
+                        values[i][attribute_name] = value
+                        continue
+                object_calls = codec.get_calls(object_type, object_name, attribute_name, time_grid)
+                fetches.append((i, object_name, attribute_name, codec, len(object_calls), result_cache))
+                calls += object_calls
+        if not fetches:
+            return values
+
+        try:
+            results = call_shop_api_batched(self._shop_api, calls)
+            decoded = []
+            position = 0
+            for _, _, _, codec, n_calls, _ in fetches:
+                decoded.append(codec.decode(results[position:position + n_calls], time_grid))
+                position += n_calls
+        except AttributeError:
+            # Cores without some of the calls, like GetXyTCurveTimeStrings before SHOP 14.4.3.0, are read one value at
+            # a time by the codecs, which know how to work around them
+            decoded = [codec.get(self._shop_api, object_type, object_name, attribute_name, time_grid)
+                       for _, object_name, attribute_name, codec, _, _ in fetches]
+        for (i, object_name, attribute_name, codec, _, result_cache), value in zip(fetches, decoded):
+            value = format_value(value, codec.datatype, format_name, attribute_name)
+            values[i][attribute_name] = value
+            if result_cache is not None:
+                result_cache.put((object_type, object_name, attribute_name, raw, output_format), value)
+        return values
+
+    def get_input_mirror(self) -> Optional[InputMirror]: # pragma: no cover
+        return self._input_mirror
+
+    def mark_inputs(self) -> int: # pragma: no cover
+        # A mark that can be passed to changed_since later
+        if self._input_mirror is None:
+            raise ValueError('Changes can only be tracked in a model with an input mirror')
+        return self._input_mirror.mark()
+
+    def changed_since(self, mark:int) -> List[InputKey]: # pragma: no cover
+        # The (object type, object name, attribute name) of the inputs that have been set to a new value after mark
+        if self._input_mirror is None:
+            raise ValueError('Changes can only be tracked in a model with an input mirror')
+        return self._input_mirror.changed_since(mark)
+
+    def _get_digest(self, key:InputKey, datatype:str, value:ShopDatatypes,
+                    time_grid:Optional[TimeGrid]) -> Tuple[bool,Optional[bytes]]: # pragma: no cover
+        # Whether the write can be skipped because the input mirror has recorded the same value for the attribute, and
+        # the digest of the value. The value is hashed as given, before the codec fits it to the time grid
+        if self._input_mirror is None:
+            return False, None
+        digest = hash_value((datatype, value, time_grid if get_codec(datatype).uses_time_grid else None))
+        return digest is not None and self._input_mirror.is_unchanged(key, digest), digest
+
+    def write_attribute(self, object_type:str, object_name:str, attribute_name:str, datatype:str, value:ShopDatatypes,
+                        time_grid:Optional[TimeGrid]=None) -> bool: # pragma: no cover
+        # Write an attribute with the codec of its datatype. Returns False if the write was skipped because the input
+        # mirror has recorded the same value for the attribute. The result cache is not invalidated here
+        codec = get_codec(datatype)
+        if codec is None:
+            return False
+        if codec.uses_time_grid and time_grid is None:
+            time_grid = self.get_time_grid()
+        key = (object_type, object_name, attribute_name)
+        unchanged, digest = self._get_digest(key, datatype, value, time_grid)
+        if unchanged:
+            return False
+        call_shop_api_batched(self._shop_api, codec.set_calls(object_type, object_name, attribute_name, value,
+                                                              time_grid))
+        if self._input_mirror is not None:
+            self._input_mirror.record(key, digest)
+        return True
+
+    @contextmanager
+    def batch(self) -> Iterator[None]: # pragma: no cover
+        """
+        Queue the attribute values set inside the block and write them when the block exits. Repeated writes to the
+        same attribute are coalesced so only the last value is written, and the queued writes are grouped by datatype
+        and written in one pass with a single time grid. Backends that support it, like the REST client, receive all
+        writes in a single request. Values are not copied when they are queued, so they should not be modified before
+        the block exits. Reading a queued attribute, or calling a command on the session, writes the queue
+        first. Nested blocks are written when the outermost block exits. If the outermost block raises, the values still
+        queued are discarded instead of written, while values already written by a read or a command stay written.
+        """
+        if self._pending is None:
+            self._pending = {}
+        self._batch_depth += 1
+        completed = False
+        try:
+            yield
+            completed = True
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                pending, self._pending = self._pending, None
+                if completed:
+                    self._write_pending(pending)
+
+    def queue_write(self, object_type:str, object_name:str, attribute_name:str, datatype:str,
+                    value:ShopDatatypes) -> bool: # pragma: no cover
+        # Returns False if no batch is active, in which case the value must be written directly
+        if self._pending is None:
+            return False
+        key = (object_type, object_name, attribute_name)
+        # Move the key to the end, so that the writes of each datatype keep the order of their last set()
+        self._pending.pop(key, None)
+        self._pending[key] = (datatype, value)
+        return True
+
+    def is_pending(self, object_type:str, object_name:str, attribute_name:str) -> bool: # pragma: no cover
+        return self._pending is not None and (object_type, object_name, attribute_name) in self._pending
+
+    def flush(self) -> None: # pragma: no cover
+        # Write the queued values now, without leaving the batch
+        if self._pending:
+            pending, self._pending = self._pending, {}
+            self._write_pending(pending)
+
+    def _write_pending(self, pending:Dict[InputKey,Tuple[str,ShopDatatypes]]) -> None: # pragma: no cover
+        # The writes are grouped by datatype, so that each codec can share work between the writes of its datatype
+        groups = {}
+        for key, (datatype, value) in pending.items():
+            if get_codec(datatype) is not None:
+                groups.setdefault(datatype, []).append((key, value))
+        if not groups:
+            return
+        time_grid = self.get_time_grid() if any(get_codec(d).uses_time_grid for d in groups) else None
+        calls = []
+        digests = []
+        for datatype, writes in groups.items():
+            codec = get_codec(datatype)
+            changed = []
+            for key, value in writes:
+                unchanged, digest = self._get_digest(key, datatype, value, time_grid)
+                if not unchanged:
+                    changed.append(key + (value,))
+                    digests.append((key, digest))
+            for write_calls in codec.set_calls_many(changed, time_grid):
+                calls += write_calls
+        if not digests:
+            return
+        call_shop_api_batched(self._shop_api, calls)
+        if self._input_mirror is not None:
+            for key, digest in digests:
+                self._input_mirror.record(key, digest)
+        self.invalidate_results()
+
+    def get_output_format(self) -> str: # pragma: no cover
+        return self._output_format
+
+    def set_output_format(self, output_format:str) -> None: # pragma: no cover
+        # The output format used by attribute getters that are not given one explicitly
+        check_output_format(output_format)
+        self._output_format = output_format
+
+    def get_topology(self) -> TopologyIndex: # pragma: no cover
+        # The relations between all objects in the system. The index is built on first use and kept until objects or
+        # relations are added through the model, or the session invalidates it after commands and file reads
+        if self._shop_api.UpdateNeeded():
+            self.update()
+        if self._topology is None:
+            self._topology = TopologyIndex(self._shop_api, self._index.names, self._index.types)
+        return self._topology
+
+    def invalidate_topology(self) -> None: # pragma: no cover
+        self._topology = None
+
+    def connected_components(self, shared_types:Optional[Iterable[str]]=None
+                             ) -> List[List['AttributeBuilderObject']]: # pragma: no cover
+        # The groups of objects that are not related to each other, such as independent watercourses. Objects of the
+        # shared types (by default the types without relations, e.g. global_settings and market) are not included. See
+        # TopologyIndex.get_connected_components
+        topology = self.get_topology()
+        components, _ = topology.get_connected_components(shared_types)
+        return [[self._types[topology.types[i]].__getattr__(topology.names[i]) for i in component]
+                for component in components]
+
+    def merge_results(self, results:Mapping[Tuple[str,str,str],ShopDatatypes]) -> None: # pragma: no cover
+        # Serve output attributes solved in other sessions from the result cache until the solve epoch ends. results
+        # maps (object type, object name, attribute name) to values in the "numpy" output format, as returned by
+        # decomposition.collect_results
+        if self._result_cache is None:
+            raise ValueError('Results can only be merged into a model with a result cache')
+        self._result_cache.merge(results)
 
-            if (input_type == 'gate' or output_type == 'gate') and connection[2] != 'connection_standard':
-                dot.attr('edge', style='dashed')
+    def update(self) -> None: # pragma: no cover
+        # Only the objects added since the last update are indexed, and the existing ModelBuilderObjects and their
+        # cached AttributeBuilderObjects are kept
+        n_objects = len(self._index)
+        removed = self._index.sync(self._shop_api.GetObjectNamesInSystem(), self._shop_api.GetObjectTypesInSystem())
+        if removed or len(self._index) != n_objects:
+            self._topology = None
+        for object_type in self._all_types:
+            if object_type not in self._types:
+                self._types[object_type] = ModelBuilderObject(self._shop_api, self, object_type,
+                                                              self._index.get_names(object_type))
             else:
-                dot.attr('edge', style='solid', arrowtail='none', arrowhead='none')
-
-            dot.edge(
-                '{0}_{1}'.format(input_type, object_names[connection[0]]),
-                '{0}_{1}'.format(output_type, object_names[connection[1]])
-            )
-        for s in subgraphs:
-            dot.subgraph(s)
-        if write_file:
-            dot.render(filename + '.gv', view=True)
-        return dot
+                self._types[object_type]._names = self._index.get_names(object_type)
+        for object_type, object_name in removed:
+            self._types[object_type].attributes.pop(object_name, None)
+            if self._input_mirror is not None:
+                self._input_mirror.forget(object_type, object_name)
 
+    def get_object_index(self) -> ObjectIndex: # pragma: no cover
+        return self._index
 
-class ModelBuilderObjectIterator(object): # pragma: no cover
-    
-    _model_builder_object: 'ModelBuilderObject'
-    _index: int
+    def get_object_names(self, object_type:str) -> List[str]: # pragma: no cover
+        if self._shop_api.UpdateNeeded():
+            self.update()
+        return list(self._index.get_names(object_type))
 
-    def __init__(self, model_builder_object:'ModelBuilderObject') -> None:
-        self._model_builder_object = model_builder_object
-        self._index = 0
+    def add_object(self, object_type:str, name:str) -> Optional['AttributeBuilderObject']: # pragma: no cover
+        # Sync first, so that the change flag of the core afterwards only tells if this object was added. The new object
+        # is then appended to the index without reading all objects in the system again
+        if self._shop_api.UpdateNeeded():
+            self.update()
+        self._shop_api.AddObject(object_type, name)
+        if self._shop_api.UpdateNeeded() and (object_type, name) not in self._index:
+            self._index.append(object_type, name)
+            self._topology = None
+        return self._types[object_type].__getattr__(name)
+
+    def bulk_add(self, object_type:str, df:pd.DataFrame) -> List['AttributeBuilderObject']: # pragma: no cover
+        """
+        Create one object for each row of df, named by the index, and set the attributes given by the columns. The
+        attributes are written together as in batch(), missing values (None or NaN) are skipped, and the object index
+        is refreshed once after all objects have been added. Backends that support it receive the new objects in one
+        request and the attribute values in another.
+        """
+        schema = self._schemas.get(object_type)
+        unknown = [attribute_name for attribute_name in df.columns if attribute_name not in schema]
+        if unknown:
+            raise ValueError(f'Unknown attributes for object type "{object_type}": {unknown}')
+        if not df.index.is_unique:
+            raise ValueError(f'Duplicate object names: {list(df.index[df.index.duplicated()].unique())}')
+
+        names = [str(name) for name in df.index]
+        # Values queued in a batch are written first, so they do not overwrite the values of df when the batch ends
+        self.flush()
+        if self._shop_api.UpdateNeeded():
+            self.update()
+        call_shop_api_batched(self._shop_api, [('AddObject', (object_type, name)) for name in names])
+        self.update()
+        missing = [name for name in names if (object_type, name) not in self._index]
+        if missing:
+            raise ValueError(f'Could not add {object_type} objects: {missing}')
+
+        with self.batch():
+            for attribute_name in df.columns:
+                datatype = schema.datatypes[attribute_name]
+                for name, value in zip(names, df[attribute_name].tolist()):
+                    if not is_missing_value(value):
+                        self.queue_write(object_type, name, attribute_name, datatype, value)
+        self.invalidate_results()
+        return [self._types[object_type].__getattr__(name) for name in names]
+
+    def connect_many(self, edges:Union[pd.DataFrame,Iterable[Sequence[str]]]) -> int: # pragma: no cover
+        """
+        Add many relations at once. edges is a DataFrame with the columns from_type, from_name, to_type, to_name and
+        optionally connection_type, or an iterable of (from_type, from_name, to_type, to_name[, connection_type])
+        tuples. The connection type is "standard", "spill", "bypass" or a full relation type name, and the default
+        relation type of the core is used if it is empty. All objects are checked against the object index before any
+        relation is added, and the default relation type is only looked up once for each pair of object types. Returns
+        the number of relations added.
+        """
+        if isinstance(edges, pd.DataFrame):
+            # Only the connection type is optional
+            missing = [c for c in EDGE_COLUMNS[:4] if c not in edges.columns]
+            if missing:
+                raise ValueError(f'Missing edge columns: {missing}')
+            columns = [c for c in EDGE_COLUMNS if c in edges.columns]
+            edges = edges[columns].itertuples(index=False, name=None)
+        edges = [tuple(edge) for edge in edges]
+        invalid = [edge for edge in edges if len(edge) not in (4, 5)]
+        if invalid:
+            raise ValueError(f'Edges must have 4 or 5 values, got: {invalid[:5]}')
+        edges = [edge + ('',) * (5 - len(edge)) for edge in edges]
 
-    def __next__(self) -> Optional['AttributeBuilderObject']:
-        if self._index < len(self._model_builder_object.get_object_names()):
-            self._index += 1
-            return self._model_builder_object.__getattr__(
-                self._model_builder_object.get_object_names()[self._index - 1])
-        raise StopIteration
+        if self._shop_api.UpdateNeeded():
+            self.update()
+        unknown = sorted(set(key for edge in edges for key in [(edge[0], edge[1]), (edge[2], edge[3])]
+                             if key not in self._index))
+        if unknown:
+            raise ValueError(f'Unknown objects: {unknown}')
+
+        default_relation_types = {}
+        relations = []
+        for from_type, from_name, to_type, to_name, connection_type in edges:
+            if is_missing_value(connection_type):
+                connection_type = ''
+            relation_type = get_relation_type(self._shop_api, from_type, to_type, connection_type,
+                                              default_relation_types)
+            relations.append((from_type, from_name, relation_type, to_type, to_name))
+        call_shop_api_batched(self._shop_api, [('AddRelation', relation) for relation in relations])
+        self._topology = None
+        return len(relations)
+
+    def get_edge_list(self, relation_types:Optional[Sequence[str]]=None) -> pd.DataFrame: # pragma: no cover
+        # All relations in the system, in the format accepted by connect_many, with the category of each relation.
+        # Logical relations are only listed once, although the core lists them in both directions
+        topology = self.get_topology()
+        if relation_types is None:
+            relation_types = topology.relation_types
+        sources, targets, kinds, logical = topology.get_relation_list(relation_types)
+        order = np.lexsort((kinds, sources))
+        types = np.array(topology.types, dtype=object)
+        names = np.array(topology.names, dtype=object)
+        return pd.DataFrame({
+            'from_type': types[sources[order]],
+            'from_name': names[sources[order]],
+            'to_type': types[targets[order]],
+            'to_name': names[targets[order]],
+            'connection_type': np.array(relation_types, dtype=object)[kinds[order]],
+            'relation_category': np.where(logical[order], 'logical', 'physical'),
+        }, columns=EDGE_COLUMNS + ['relation_category'])
+
+    def build_connection_tree(self, filename:str='topology', write_file:bool=False, display_units:bool=False,
+                              root:Optional[Any]=None, depth:Optional[int]=None,
+                              watercourse:Optional[Any]=None) -> Digraph: # pragma: no cover
+        # Draw the hydropower system from the cached topology. Only part of the system is drawn if root or watercourse
+        # is given, see topology_export.select_objects
+        topology = self.get_topology()
+        selected = select_objects(topology, root, depth, watercourse)
+        dot = build_graphviz(self._shop_api, topology, selected, display_units)
+        if write_file:
+            dot.render(filename + '.gv', view=True)
+        return dot
+
+    def export_topology(self, format:str='json', path:str='', root:Optional[Any]=None, depth:Optional[int]=None,
+                        watercourse:Optional[Any]=None) -> Union[Dict[str,List[Dict[str,Any]]],str]: # pragma: no cover
+        # All objects and relations, or the part selected by root and watercourse, as an adjacency dict ("json") or a
+        # GraphML string ("graphml"). The result is also written to path if one is given
+        if format not in ['json', 'graphml']:
+            raise ValueError(f'Unknown topology format: "{format}", valid formats are "json" and "graphml"')
+        topology = self.get_topology()
+        selected = select_objects(topology, root, depth, watercourse)
+        if format == 'json':
+            result = to_adjacency_dict(topology, selected)
+            text = json.dumps(result)
+        else:
+            result = text = to_graphml(topology, selected)
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return result
 
 
 class ModelBuilderObject(object): # pragma: no cover
+    __slots__ = ['_shop_api', '_parent', '_type', '_names', 'attributes']
 
     _shop_api:ShopApi
     _parent:'ModelBuilderType'
@@ -159,11 +552,8 @@ class ModelBuilderObject(object): # pragma: no cover
         if is_private_attr(name):
             return
 
-        if name in self._names:
-            if name not in self.attributes:
-                attribute = AttributeBuilderObject(self._shop_api, self._type, name)
-                self.attributes[name] = attribute
-            return self.attributes[name]
+        if (self._type, name) in self._parent.get_object_index():
+            return self._get_object(name)
         else:
             raise AttributeError()
 
@@ -174,51 +564,104 @@ class ModelBuilderObject(object): # pragma: no cover
         return self.__getattr__(item)
 
     def add_object(self, name:str) -> Optional['AttributeBuilderObject']:
-        self._shop_api.AddObject(self._type, name)
-        if name in self._shop_api.GetObjectNamesInSystem():
-            self._add_object_name(name)
-        return self._parent.__getattr__(self._type).__getattr__(name)
+        return self._parent.add_object(self._type, name)
 
-    def _add_object_name(self, name:str) -> None:
-        self._names.append(name)
+    def bulk_add(self, df:pd.DataFrame) -> List['AttributeBuilderObject']:
+        return self._parent.bulk_add(self._type, df)
 
     def get_object_names(self) -> List[str]:
         return self._names
 
     def get_attribute_names(self) -> List[str]:
-        return self._shop_api.GetObjectTypeAttributeNames(self._type)
+        return list(self._parent.get_schema(self._type).attribute_names)
+
+    def get_attribute(self, attribute_name:str, names:Optional[List[str]]=None,
+                      dataframe:bool=True) -> Union[pd.DataFrame,pd.Series]:
+        # Get an attribute for all (or the given) objects of this type in one pass. TXY attributes are returned as a
+        # DataFrame with the object names as columns, or a long DataFrame if the results are stochastic
+        datatype_dict = self._parent.get_schema(self._type).datatypes
+        if attribute_name not in datatype_dict:
+            raise ValueError(f'Unknown attribute: "{attribute_name}" for object type "{self._type}"')
+        if names is None:
+            names = self._names
+        else:
+            known_names = set(self._names)
+            unknown_names = [name for name in names if name not in known_names]
+            if unknown_names:
+                raise ValueError(f'Unknown {self._type} objects: {unknown_names}')
+        datatype = datatype_dict[attribute_name]
+        self._parent.flush()
+        time_grid = self._parent.get_time_grid() if datatype in ['txy', 'xyt'] else None
+        merged = self._parent.get_merged_results(self._type, names, attribute_name)
+        return get_attribute_values(self._shop_api, list(names), self._type, attribute_name, datatype, dataframe,
+                                    time_grid, merged)
 
     def info(self):
         return get_object_info(self._shop_api, self._type)
 
-    def __iter__(self) -> ModelBuilderObjectIterator:
-        return ModelBuilderObjectIterator(self)
+    def _get_object(self, name:str) -> 'AttributeBuilderObject':
+        # The cached proxy of an object that is known to be in the object index
+        attribute = self.attributes.get(name)
+        if attribute is None:
+            attribute = AttributeBuilderObject(self._shop_api, self._type, name, self._parent)
+            self.attributes[name] = attribute
+        return attribute
+
+    def __iter__(self) -> Iterator['AttributeBuilderObject']:
+        # Objects added while iterating are not included
+        for name in list(self._names):
+            yield self._get_object(name)
+
+    def iter_with(self, attribute_names:Sequence[str], chunk_size:int=100, raw:bool=False,
+                  output_format:Optional[str]=None) -> Iterator[Tuple['AttributeBuilderObject',Dict[str,ShopDatatypes]]]:
+        """
+        Iterate over the objects of this type together with the values of the given attributes, as a dict from
+        attribute name to the value that get() would return. The values are fetched chunk_size objects at a time, so
+        the core calls of a chunk can be sent together, and cached output values are taken from the result cache.
+        """
+        schema = self._parent.get_schema(self._type)
+        unknown = [attribute_name for attribute_name in attribute_names if attribute_name not in schema]
+        if unknown:
+            raise ValueError(f'Unknown attributes for object type "{self._type}": {unknown}')
+        names = list(self._names)
+        for start in range(0, len(names), chunk_size):
+            chunk = names[start:start + chunk_size]
+            values = self._parent.get_values(self._type, chunk, attribute_names, raw, output_format)
+            for name, object_values in zip(chunk, values):
+                yield self._get_object(name), object_values
 
 
 class AttributeBuilderObject(object): # pragma: no cover
+    # The attribute names and datatypes are taken from the schema of the object type, which is shared by all objects of
+    # the type in the session
+    __slots__ = ['_shop_api', '_type', '_name', '_model', '_schema']
 
     _shop_api:ShopApi
     _type:str
     _name:str
-    _attr_names:List[str]
-    _attr_types:List[str]
-    datatype_dict:Dict[str,str]
+    _model:Optional['ModelBuilderType']
+    _schema:ObjectTypeSchema
 
-    def __init__(self, shop_api:ShopApi, object_type:str, object_name:str) -> None:
+    def __init__(self, shop_api:ShopApi, object_type:str, object_name:str,
+                 model:Optional['ModelBuilderType']=None) -> None:
         self._shop_api = shop_api
         self._type = object_type
         self._name = object_name
-        self._attr_names = list(shop_api.GetObjectTypeAttributeNames(object_type))
-        self._attr_types = list(shop_api.GetObjectTypeAttributeDatatypes(object_type))
-        self.datatype_dict = dict(zip(self._attr_names, self._attr_types))
+        self._model = model
+        self._schema = model.get_schema(object_type) if model is not None else ObjectTypeSchema(shop_api, object_type)
+
+    @property
+    def datatype_dict(self) -> Mapping[str,str]:
+        return self._schema.datatypes
 
     def __getattr__(self, attr_name:str) -> Optional[Union['AttributeObject',List['AttributeBuilderObject']]]:
         # Recursion guard
         if is_private_attr(attr_name):
             return
 
-        if attr_name in self._attr_names:
-            return AttributeObject(self._shop_api, self._type, self._name, attr_name, self.datatype_dict[attr_name])
+        datatype = self._schema.get_datatype(attr_name)
+        if datatype is not None:
+            return AttributeObject(self._shop_api, self._type, self._name, attr_name, datatype, self._model)
         elif attr_name == 'generators' and self._type == 'plant':
             return self._get_generators()
         elif attr_name == 'pumps' and self._type == 'plant':
@@ -231,7 +674,7 @@ class AttributeBuilderObject(object): # pragma: no cover
             raise ValueError(f'Unknown attribute: "{attr_name}" for "{self._name}" ({self._type})')
 
     def __dir__(self) -> List[str]:
-        dirs = [x for x in super().__dir__() if x[0] != '_'] + self._attr_names
+        dirs = [x for x in super().__dir__() if x[0] != '_'] + list(self._schema.attribute_names)
         if self._type == 'plant':
             return dirs + ['generators','pumps','unit_combinations']
         else:
@@ -240,49 +683,30 @@ class AttributeBuilderObject(object): # pragma: no cover
     def __getitem__(self, item:str) -> Optional[Union['AttributeObject',List['AttributeBuilderObject']]]:
         return self.__getattr__(item)
 
+    def _get_topology(self) -> TopologyIndex:
+        if self._model is not None:
+            return self._model.get_topology()
+        return TopologyIndex(self._shop_api, self._shop_api.GetObjectNamesInSystem(),
+                             self._shop_api.GetObjectTypesInSystem())
+
+    def _get_connected_objects(self, object_type:str) -> List['AttributeBuilderObject']:
+        # The objects of the given type that this object is connected to by standard output relations
+        topology = self._get_topology()
+        related = topology.get_related(topology.get_position(self), 'output', ['connection_standard'])
+        return [AttributeBuilderObject(self._shop_api, object_type, topology.names[i], self._model)
+                for i in related if topology.types[i] == object_type]
+
     def _get_generators(self) -> List['AttributeBuilderObject']:
-        object_names = self._shop_api.GetObjectNamesInSystem()
-        object_types = self._shop_api.GetObjectTypesInSystem()
-        connected_indices = self._shop_api.GetRelations(self._type, self._name, 'connection_standard')
-        gen_names = [object_names[i] for i in connected_indices if object_types[i] == 'generator']
-        gen_objects = []
-        for gen_name in gen_names:
-            new_gen = AttributeBuilderObject(self._shop_api, 'generator', gen_name)
-            gen_objects.append(new_gen)
-        return gen_objects
+        return self._get_connected_objects('generator')
 
     def _get_pumps(self) -> List['AttributeBuilderObject']:
-        object_names = self._shop_api.GetObjectNamesInSystem()
-        object_types = self._shop_api.GetObjectTypesInSystem()
-        connected_indices = self._shop_api.GetRelations(self._type, self._name, 'connection_standard')
-        pump_names = [object_names[i] for i in connected_indices if object_types[i] == 'pump']
-        pump_objects = []
-        for pump_name in pump_names:
-            new_pump = AttributeBuilderObject(self._shop_api, 'pump', pump_name)
-            pump_objects.append(new_pump)
-        return pump_objects        
+        return self._get_connected_objects('pump')
 
     def _get_unit_combinations(self) -> List['AttributeBuilderObject']:
-        object_names = self._shop_api.GetObjectNamesInSystem()
-        object_types = self._shop_api.GetObjectTypesInSystem()
-        connected_indices = self._shop_api.GetRelations(self._type, self._name, 'connection_standard')
-        comb_names = [object_names[i] for i in connected_indices if object_types[i] == 'unit_combination']
-        comb_objects = []
-        for comb_name in comb_names:
-            new_comb = AttributeBuilderObject(self._shop_api, 'unit_combination', comb_name)
-            comb_objects.append(new_comb)
-        return comb_objects
-    
+        return self._get_connected_objects('unit_combination')
+
     def _get_needle_combinations(self) -> List['AttributeBuilderObject']:
-        object_names = self._shop_api.GetObjectNamesInSystem()
-        object_types = self._shop_api.GetObjectTypesInSystem()
-        connected_indices = self._shop_api.GetRelations(self._type, self._name, 'connection_standard')
-        needle_comb_names = [object_names[i] for i in connected_indices if object_types[i] == 'needle_combination']
-        needle_comb_objects = []
-        for needle_comb_name in needle_comb_names:
-            new_needle_comb = AttributeBuilderObject(self._shop_api, 'needle_combination', needle_comb_name)
-            needle_comb_objects.append(new_needle_comb)
-        return needle_comb_objects        
+        return self._get_connected_objects('needle_combination')
 
     def get_relations(self, direction:str="both", relation_type:str="all", relation_category:str='both') -> List['AttributeBuilderObject']:
         direction = direction.lower()
@@ -292,70 +716,37 @@ class AttributeBuilderObject(object): # pragma: no cover
             raise ValueError('Unknown direction, valid values are "both", "input" and "output"')
         if relation_category not in ["both", "physical", "logical"]:
             raise ValueError('Unknown relation_category, valid values are "both", "physical" and "logical"')
-        object_names = self._shop_api.GetObjectNamesInSystem()
-        object_types = self._shop_api.GetObjectTypesInSystem()
+        topology = self._get_topology()
+        position = topology.get_position(self)
         if relation_type == "all":
-            relation_types = self._shop_api.GetValidRelationTypes(self._type)
+            relation_types = topology.get_valid_relation_types(self._type)
         else:
             relation_types = [relation_type]
 
-        obj_list = []
+        related = []
         if direction == "input" or direction == "both":
-            for relation_type in relation_types:
-                input_relations = self._shop_api.GetInputRelations(self._type, self._name, relation_type)
-                for object_index in input_relations:
-                    # Filter out connections with wrong relation_category
-                    from_type = object_types[object_index]
-                    category = self._shop_api.GetRelationInfo(from_type, self._type, "relationCategory")
-                    if relation_category != "both" and relation_category != category:
-                        continue
-
-                    # Build AttributeBuilderObject to represent the connected object and add to returned list
-                    rel_object = AttributeBuilderObject(self._shop_api, object_types[object_index],
-                                                        object_names[object_index])
-                    obj_list.append(rel_object)
+            related.append(topology.get_related(position, 'input', relation_types, relation_category))
         if direction == "output" or direction == "both":
-            for relation_type in relation_types:
-                output_relations = self._shop_api.GetRelations(self._type, self._name, relation_type)
-                for object_index in output_relations:
-                    # Filter out connections with wrong relation_category
-                    to_type = object_types[object_index]
-                    category = self._shop_api.GetRelationInfo(self._type, to_type, "relationCategory")
-                    if relation_category != "both" and relation_category != category:
-                        continue
-
-                    # Ignore a connection if it has already been seen. This happens for logical connections when the
-                    # direction == 'both', since their bidirectional nature will ensure that they are already added
-                    # in the 'input' loop above
-                    if direction == "both" and category == "logical":
-                        continue
-
-                    # Build AttributeBuilderObject to represent the connected object and add to returned list
-                    rel_object = AttributeBuilderObject(self._shop_api, object_types[object_index],
-                                                        object_names[object_index])
-                    obj_list.append(rel_object)
-        return obj_list
+            # Logical relations are bidirectional, so they are already included among the input relations when
+            # direction == 'both'
+            if direction == "both":
+                if relation_category != "logical":
+                    related.append(topology.get_related(position, 'output', relation_types, 'physical'))
+            else:
+                related.append(topology.get_related(position, 'output', relation_types, relation_category))
+        return [AttributeBuilderObject(self._shop_api, topology.types[i], topology.names[i], self._model)
+                for positions in related for i in positions]
 
     def connect(self, connection_type:str='') -> 'ConnectToObjectType':
         connection_type = connection_type.lower()
-        return ConnectToObjectType(self._shop_api, self._type, self._name, connection_type)
+        return ConnectToObjectType(self._shop_api, self._type, self._name, connection_type, self._model)
 
     def connect_to(self, related_object:'AttributeBuilderObject', connection_type:str='') -> None:
-        connection_type = connection_type.lower()
-        if not connection_type:
-            connection_type = self._shop_api.GetDefaultRelationType(self._type, related_object.get_type())
-        else:
-            if connection_type == "spill":
-                connection_type = "connection_spill"
-            elif connection_type == "bypass":
-                connection_type = "connection_bypass"
-            elif connection_type == "standard":
-                connection_type = "connection_standard"
-            else:
-                raise ValueError(f'Unknown connection type: "{connection_type}"\nPyShop will use default connection '
-                                 f'types if none are provided. Provided values can be "spill" or "bypass"')
+        connection_type = get_relation_type(self._shop_api, self._type, related_object.get_type(), connection_type)
         self._shop_api.AddRelation(self._type, self._name, connection_type, related_object.get_type(),
                                    related_object.get_name())
+        if self._model is not None:
+            self._model.invalidate_topology()
 
     def get_name(self) -> str:
         return self._name
@@ -365,19 +756,23 @@ class AttributeBuilderObject(object): # pragma: no cover
 
 
 class AttributeObject(object): # pragma: no cover
+    __slots__ = ['_shop_api', '_type', '_name', '_attr_name', '_attr_datatype', '_model']
 
     _shop_api:ShopApi
     _type:str
     _name:str
     _attr_name:str
     _attr_datatype:str
+    _model:Optional['ModelBuilderType']
 
-    def __init__(self, shop_api:ShopApi, object_type:str, name:str, attr_name:str, attr_datatype:str) -> None:
+    def __init__(self, shop_api:ShopApi, object_type:str, name:str, attr_name:str, attr_datatype:str,
+                 model:Optional['ModelBuilderType']=None) -> None:
         self._shop_api = shop_api
         self._type = object_type
         self._name = name
         self._attr_name = attr_name
         self._attr_datatype = attr_datatype
+        self._model = model
 
     def __getattr__(self, call:str) -> Optional[Callable[[],ShopDatatypes]]:
         # Recursion guard
@@ -398,17 +793,58 @@ class AttributeObject(object): # pragma: no cover
     def __getitem__(self, item:str) -> Optional[Callable[[],ShopDatatypes]]:
         return self.__getattr__(item)
 
-    def _get(self) -> ShopDatatypes:
-        return get_attribute_value(self._shop_api, self._name, self._type, self._attr_name, self._attr_datatype)
-
-    def _get_xyt(self, start_time:Optional[pd.Timestamp]=None, end_time:Optional[pd.Timestamp]=None) -> List[XyType]:
+    def _get_time_grid(self) -> Optional[TimeGrid]:
+        # Time dependent attributes use the cached time grid of the session, if there is one
+        if self._model is None or self._attr_datatype not in ['txy', 'xyt']:
+            return None
+        return self._model.get_time_grid()
+
+    def _get_output_format(self, raw:bool, output_format:Optional[str]) -> Optional[str]:
+        if output_format is None and not raw and self._model is not None:
+            return self._model.get_output_format()
+        return output_format
+
+    def _get_result_cache(self) -> Optional[ResultCache]:
+        # Only output attributes are cached, inputs are read from the core every time
+        if self._model is None:
+            return None
+        return self._model.get_output_result_cache(self._type, self._attr_name)
+
+    def _get(self, raw:bool=False, output_format:Optional[str]=None) -> ShopDatatypes:
+        if self._model is not None and self._model.is_pending(self._type, self._name, self._attr_name):
+            self._model.flush()
+        output_format = self._get_output_format(raw, output_format)
+        result_cache = self._get_result_cache()
+        if result_cache is not None:
+            value = get_cached_value(result_cache, self._type, self._name, self._attr_name, self._attr_datatype, raw,
+                                     output_format)
+            if value is not MISSING:
+                return value
+        value = get_attribute_value(self._shop_api, self._name, self._type, self._attr_name, self._attr_datatype, raw=raw,
+                                    time_grid=self._get_time_grid(), output_format=output_format)
+        if result_cache is not None:
+            result_cache.put((self._type, self._name, self._attr_name, raw, output_format), value)
+        return value
+
+    def _get_xyt(self, start_time:Optional[pd.Timestamp]=None, end_time:Optional[pd.Timestamp]=None,
+                 raw:bool=False, output_format:Optional[str]=None) -> Union[List[XyType],CurveBatch]:
+        output_format = self._get_output_format(raw, output_format)
         if start_time and end_time:
-            return get_xyt_attribute(self._shop_api, self._name, self._type, self._attr_name, start_time, end_time)
+            if self._model is not None and self._model.is_pending(self._type, self._name, self._attr_name):
+                self._model.flush()
+            return get_xyt_attribute(self._shop_api, self._name, self._type, self._attr_name, start_time, end_time,
+                                     raw=raw, time_grid=self._get_time_grid(), output_format=output_format)
         else:
-            return get_attribute_value(self._shop_api, self._name, self._type, self._attr_name, self._attr_datatype)
+            return self._get(raw, output_format)
 
     def set(self, value:ShopDatatypes) -> None:
-        set_attribute(self._shop_api, self._name, self._type, self._attr_name, self._attr_datatype, value)
+        if self._model is None:
+            set_attribute(self._shop_api, self._name, self._type, self._attr_name, self._attr_datatype, value)
+        elif self._model.queue_write(self._type, self._name, self._attr_name, self._attr_datatype, value):
+            return
+        elif self._model.write_attribute(self._type, self._name, self._attr_name, self._attr_datatype, value,
+                                         self._get_time_grid()):
+            self._model.invalidate_results()
 
     def help(self) -> None:
         print(self._shop_api.GetAttributeInfo(self._type, self._attr_name, 'description'))
@@ -437,24 +873,29 @@ class AttributeObject(object): # pragma: no cover
 
 
 class ConnectToObjectType(object): # pragma: no cover
+    __slots__ = ['_shop_api', '_from_type', '_from_name', '_connection_type', '_model']
 
     _shop_api:ShopApi
     _from_type:str
     _from_name:str
     _connection_type:str
+    _model:Optional['ModelBuilderType']
 
-    def __init__(self, shop_api:ShopApi, from_type:str, from_name:str, connection_type:str):
+    def __init__(self, shop_api:ShopApi, from_type:str, from_name:str, connection_type:str,
+                 model:Optional['ModelBuilderType']=None):
         self._shop_api = shop_api
         self._from_type = from_type
         self._from_name = from_name
         self._connection_type = connection_type
+        self._model = model
 
     def __getattr__(self, object_type:str) -> Optional['ConnectToObject']:
         # Recursion guard
         if is_private_attr(object_type):
             return
 
-        return ConnectToObject(self._shop_api, self._from_type, self._from_name, self._connection_type, object_type)
+        return ConnectToObject(self._shop_api, self._from_type, self._from_name, self._connection_type, object_type,
+                               self._model)
         # print('Get item: '+str(item))
 
     def __getitem__(self, item:str) -> Optional['ConnectToObject']:
@@ -483,6 +924,7 @@ class ConnectToObjectType(object): # pragma: no cover
 
 
 class ConnectToObject(object): # pragma: no cover
+    __slots__ = ['_shop_api', '_type', '_from_type', '_from_name', '_connection_type', '_names', '_model']
 
     _shop_api:ShopApi
     _type:str
@@ -490,16 +932,22 @@ class ConnectToObject(object): # pragma: no cover
     _from_name:str
     _connection_type:str
     _names:List[str]
+    _model:Optional['ModelBuilderType']
 
-    def __init__(self, shop_api:ShopApi, from_type:str, from_name:str, connection_type:str, object_type:str) -> None:
+    def __init__(self, shop_api:ShopApi, from_type:str, from_name:str, connection_type:str, object_type:str,
+                 model:Optional['ModelBuilderType']=None) -> None:
         # print('init connect to obj from: '+ from_type + ' ' + from_name + ' ' + type)
         self._shop_api = shop_api
         self._type = object_type
         self._from_type = from_type
         self._from_name = from_name
         self._connection_type = connection_type
-        self._names = [n for n, t in zip(self._shop_api.GetObjectNamesInSystem(),
-                                         self._shop_api.GetObjectTypesInSystem()) if t == object_type]
+        self._model = model
+        if model is not None:
+            self._names = model.get_object_names(object_type)
+        else:
+            self._names = [n for n, t in zip(self._shop_api.GetObjectNamesInSystem(),
+                                             self._shop_api.GetObjectTypesInSystem()) if t == object_type]
 
     def __dir__(self) -> List[str]:
         return [x for x in super().__dir__() if x[0] != '_'] + self._names
@@ -509,13 +957,15 @@ class ConnectToObject(object): # pragma: no cover
         if is_private_attr(name):
             return
 
-        return Connection(self._shop_api, self._from_type, self._from_name, self._connection_type, self._type, name)
+        return Connection(self._shop_api, self._from_type, self._from_name, self._connection_type, self._type, name,
+                          self._model)
 
     def __getitem__(self, item:str) -> 'Connection':
         return self.__getattr__(item)
 
 
 class Connection(object): # pragma: no cover
+    __slots__ = ['_shop_api', '_from_type', '_from_name', '_connection_type', '_to_name', '_to_type', '_model']
 
     _shop_api:ShopApi
     _from_type:str
@@ -523,26 +973,20 @@ class Connection(object): # pragma: no cover
     _connection_type:str
     _to_name:str
     _to_type:str
+    _model:Optional['ModelBuilderType']
 
-    def __init__(self, shop_api:ShopApi, from_type:str, from_name:str, connection_type:str, to_type:str, to_name:str) -> None:
+    def __init__(self, shop_api:ShopApi, from_type:str, from_name:str, connection_type:str, to_type:str, to_name:str,
+                 model:Optional['ModelBuilderType']=None) -> None:
         self._shop_api = shop_api
         self._from_type = from_type
         self._from_name = from_name
         self._connection_type = connection_type
         self._to_name = to_name
         self._to_type = to_type
+        self._model = model
 
     def add(self) -> None:
-        if not self._connection_type:
-            connection_type = self._shop_api.GetDefaultRelationType(self._from_type, self._to_type)
-        else:
-            if self._connection_type == "spill":
-                connection_type = "connection_spill"
-            elif self._connection_type == "bypass":
-                connection_type = "connection_bypass"
-            elif self._connection_type == "standard":
-                connection_type = "connection_standard"
-            else:
-                raise ValueError(f'Unknown connection type: "{self._connection_type}"\nPyShop will use default '
-                                 f'connection types if none are provided. Provided values can be "spill" or "bypass"')
+        connection_type = get_relation_type(self._shop_api, self._from_type, self._to_type, self._connection_type)
         self._shop_api.AddRelation(self._from_type, self._from_name, connection_type, self._to_type, self._to_name)
+        if self._model is not None:
+            self._model.invalidate_topology()
@@ -0,0 +1,68 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class ObjectIndex(object):
+    """
+    The objects in the system, in the order used by the core, with the names of each object type and constant time
+    lookups of the position of an object. The index is kept in sync with the core by only applying the objects that
+    have been added since the last sync, and is only rebuilt if objects have been removed or reordered.
+    """
+
+    names:List[str]
+    types:List[str]
+    _positions:Dict[Tuple[str,str],int]
+    _type_names:Dict[str,List[str]]
+    _type_positions:Dict[str,Dict[str,int]]
+
+    def __init__(self) -> None:
+        self._reset()
+
+    def _reset(self) -> None:
+        self.names = []
+        self.types = []
+        self._positions = {}
+        self._type_names = {}
+        self._type_positions = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, key:Tuple[str,str]) -> bool:
+        # key is a (object_type, object_name) tuple
+        return key in self._positions
+
+    def append(self, object_type:str, object_name:str) -> int:
+        position = len(self.names)
+        self.names.append(object_name)
+        self.types.append(object_type)
+        self._positions[(object_type, object_name)] = position
+        type_names = self._type_names.setdefault(object_type, [])
+        self._type_positions.setdefault(object_type, {})[object_name] = len(type_names)
+        type_names.append(object_name)
+        return position
+
+    def sync(self, names:Sequence[str], types:Sequence[str]) -> List[Tuple[str,str]]:
+        # Bring the index up to date with the object names and types in the system. Returns the removed objects
+        n_known = len(self.names)
+        if len(names) >= n_known and list(names[:n_known]) == self.names and list(types[:n_known]) == self.types:
+            for object_name, object_type in zip(names[n_known:], types[n_known:]):
+                self.append(object_type, object_name)
+            return []
+
+        known = list(self._positions)
+        self._reset()
+        for object_name, object_type in zip(names, types):
+            self.append(object_type, object_name)
+        return [key for key in known if key not in self._positions]
+
+    def get_position(self, object_type:str, object_name:str) -> Optional[int]:
+        # The position of the object among all objects in the system, as used in the relations of the core
+        return self._positions.get((object_type, object_name), None)
+
+    def get_type_position(self, object_type:str, object_name:str) -> Optional[int]:
+        # The position of the object among the objects of its type
+        return self._type_positions.get(object_type, {}).get(object_name, None)
+
+    def get_names(self, object_type:str) -> List[str]:
+        # The names of all objects of a type. The list is updated in place when objects are added
+        return self._type_names.setdefault(object_type, [])
@@ -0,0 +1,382 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import wire_format
+from .shop_rest import NumpyArrayEncoder
+
+# A reference server for the REST protocol spoken by ShopSession(host=...) and AsyncShopSession:
+#
+#   POST   /session                  create a session, answers {"session_id", "session_name", "wire_format"}
+#   DELETE /session                  close the session given by the session-id header
+#   GET    /internal                 the names of the core calls
+#   POST   /internal/<name>          one core call, {"args": [...], "kwargs": {...}}
+#   POST   /internal/batch           several core calls in order, {"calls": [{"name", "args", "kwargs"}, ...]}
+#   GET    /metrics                  request, call and byte counters of the server
+#   GET    /metrics/sessions         call counters and busy time of each session
+#
+# Calls are sent as JSON, or in the binary wire format by sessions that asked for it when they were created. Every
+# session owns a core created by a core factory, e.g. ShopCoreFactory for shop_pybind.ShopCore, and a worker that runs
+# the calls of the session one at a time: a thread, or a process that isolates the core from the other sessions
+
+# Creates the core of a new session from the body of its POST /session request
+CoreFactory = Callable[[Dict[str,Any]], Any]
+CallTuple = Tuple[str, List[Any], Dict[str,Any]]
+
+_worker_state = threading.local()
+
+
+def _start_core(core_factory:CoreFactory, session_request:Dict[str,Any]) -> List[str]:
+    # Runs in the worker of the session, which keeps the core until the session is closed
+    core = core_factory(session_request)
+    _worker_state.core = core
+    return [name for name in dir(core) if name[0].isupper()]
+
+
+def _run_calls(calls:List[CallTuple]) -> List[Any]:
+    core = _worker_state.core
+    return [getattr(core, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+
+def _to_arrays(value:Any) -> Any:
+    # Lists of numbers are sent as arrays in the binary wire format, as shop_pybind would return them
+    if isinstance(value, list) and value:
+        try:
+            a = np.asarray(value)
+        except ValueError:
+            a = None
+        if a is not None and a.dtype.kind in 'iuf':
+            return a
+        return [_to_arrays(v) for v in value]
+    return value
+
+
+class ShopCoreFactory(object):
+    # Creates shop_pybind.ShopCore instances the way ShopSession does for local sessions. The factory can be pickled, so
+    # it can also be used with process workers
+
+    def __init__(self, license_path:str='', solver_path:str='', silent:bool=True, suppress_log:bool=False,
+                 log_gets:bool=False) -> None:
+        self.license_path = license_path
+        self.solver_path = os.path.abspath(solver_path) if solver_path else ''
+        self.silent = silent
+        self.suppress_log = suppress_log
+        self.log_gets = log_gets
+
+    def __call__(self, session_request:Dict[str,Any]) -> Any:
+        if self.license_path:
+            os.environ['ICC_COMMAND_PATH'] = self.license_path
+        path = self.solver_path or os.environ.get('ICC_COMMAND_PATH', '')
+        if path and path not in sys.path:
+            sys.path.insert(1, path)
+        import shop_pybind as pb
+        log_file = session_request.get('log_file', '')
+        if log_file:
+            core = pb.ShopCore(self.silent, self.suppress_log, log_file, self.log_gets)
+        else:
+            core = pb.ShopCore(self.silent, self.suppress_log)
+        if self.solver_path:
+            core.OverrideDllPath(self.solver_path)
+        return core
+
+
+class ServerSession(object):
+    # A session of the server and the worker that owns its core
+
+    session_id:int
+    name:str
+    wire_format:str
+    commands:List[str]
+    requests:int
+    calls:int
+    busy_time:float
+    created:float
+    _executor:Executor
+    _lock:threading.Lock
+
+    def __init__(self, session_id:int, name:str, wire_format_name:str, executor:Executor, commands:List[str]) -> None:
+        self.session_id = session_id
+        self.name = name
+        self.wire_format = wire_format_name
+        self.commands = commands
+        self.requests = 0
+        self.calls = 0
+        self.busy_time = 0.0
+        self.created = time.time()
+        self._executor = executor
+        self._lock = threading.Lock()
+
+    def execute(self, calls:List[CallTuple]) -> List[Any]:
+        # Requests on several connections to the same session are queued by the worker and run in the order they arrive
+        t0 = time.perf_counter()
+        try:
+            return self._executor.submit(_run_calls, calls).result()
+        finally:
+            with self._lock:
+                self.requests += 1
+                self.calls += len(calls)
+                self.busy_time += time.perf_counter() - t0
+
+    def get_metrics(self) -> Dict[str,Any]:
+        return dict(session_id=self.session_id, session_name=self.name, wire_format=self.wire_format,
+                    requests=self.requests, calls=self.calls, busy_time=self.busy_time,
+                    age=time.time() - self.created)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+class ShopRestRequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps the connection open between requests, as long as every response has a Content-Length
+    protocol_version = 'HTTP/1.1'
+    # The headers and the body are written separately, which would otherwise stall every response on a kept-alive
+    # connection until the client acknowledges the headers
+    disable_nagle_algorithm = True
+    server:'ShopRestServer'
+
+    def log_message(self, format:str, *args:Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.count('connections')
+
+    def _send(self, value:Any, status:int=200, binary:bool=False) -> None:
+        if binary:
+            body = wire_format.encode(value)
+            content_type = wire_format.BINARY_CONTENT_TYPE
+        else:
+            body = json.dumps(value, cls=NumpyArrayEncoder).encode()
+            content_type = 'application/json'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count('bytes_sent', len(body))
+        if status >= 400:
+            self.server.count('errors')
+
+    def _read_body(self) -> Any:
+        length = int(self.headers.get('Content-Length', 0))
+        if not length:
+            return {}
+        body = self.rfile.read(length)
+        self.server.count('bytes_received', length)
+        if self.headers.get('Content-Type') == wire_format.BINARY_CONTENT_TYPE:
+            return wire_format.decode(body)
+        return json.loads(body)
+
+    def _get_session(self) -> Optional[ServerSession]:
+        try:
+            return self.server.get_session(int(self.headers.get('session-id', 0)))
+        except ValueError:
+            return None
+
+    def _handle(self, method:Callable[[], None]) -> None:
+        t0 = time.perf_counter()
+        try:
+            method()
+        except Exception as e:
+            self._send(dict(error=f'{type(e).__name__}: {e}'), 500)
+        self.server.count_request(time.perf_counter() - t0)
+
+    def do_GET(self) -> None:
+        self._handle(self._get)
+
+    def do_POST(self) -> None:
+        self._handle(self._post)
+
+    def do_DELETE(self) -> None:
+        self._handle(self._delete)
+
+    def _get(self) -> None:
+        if self.path == '/internal':
+            session = self._get_session()
+            self._send(session.commands if session is not None else self.server.commands)
+        elif self.path == '/metrics':
+            self._send(self.server.get_metrics())
+        elif self.path == '/metrics/sessions':
+            self._send([session.get_metrics() for session in self.server.get_sessions()])
+        else:
+            self._send(dict(error=f'Unknown path {self.path}'), 404)
+
+    def _post(self) -> None:
+        body = self._read_body()
+        if self.path == '/session':
+            session = self.server.create_session(body)
+            self._send(dict(session_id=session.session_id, session_name=session.name, wire_format=session.wire_format))
+            return
+        session = self._get_session()
+        if session is None or not self.path.startswith('/internal/'):
+            self._send(dict(error='Unknown session or path'), 404)
+            return
+        name = self.path[len('/internal/'):]
+        if name == 'batch':
+            calls = [(call['name'], call.get('args', []), call.get('kwargs', {})) for call in body['calls']]
+        else:
+            calls = [(name, body.get('args', []), body.get('kwargs', {}))]
+        unknown = sorted(set(call[0] for call in calls if call[0] not in session.commands))
+        if unknown:
+            self._send(dict(error=f'Unknown calls: {unknown}'), 404 if name != 'batch' else 400)
+            return
+        self.server.count('core_calls', len(calls))
+        if name == 'batch':
+            self.server.count('batches')
+        results = session.execute(calls)
+        binary = self.headers.get('Accept') == wire_format.BINARY_CONTENT_TYPE and session.wire_format == 'binary'
+        if binary:
+            # Each result is converted on its own, so the results of a batch stay a list of results
+            results = [_to_arrays(result) for result in results]
+        self._send(results if name == 'batch' else results[0], binary=binary)
+
+    def _delete(self) -> None:
+        session = self._get_session()
+        if self.path != '/session' or session is None:
+            self._send(dict(error='Unknown session or path'), 404)
+            return
+        self.server.close_session(session.session_id)
+        self._send(dict(session_id=session.session_id, closed=True))
+
+
+class ShopRestServer(ThreadingHTTPServer):
+    """
+    A reference server for the REST protocol of ShopSession(host=...), for load testing and benchmarking the client on
+    one machine. Each connection is served by its own thread. Each session gets its core from core_factory, called
+    with the body of the POST /session request, and a worker that owns the core: a thread (worker='thread') or a
+    process (worker='process'). With process workers the factory must be picklable, since the processes are started
+    with start_method. Use start() to serve from a background thread and stop() to shut the server and all sessions
+    down.
+    """
+
+    daemon_threads = True
+    core_factory:CoreFactory
+    worker:str
+    start_method:str
+    verbose:bool
+    commands:List[str]
+    _sessions:Dict[int,ServerSession]
+    _next_id:int
+    _counters:Dict[str,float]
+    _lock:threading.Lock
+    _started:float
+
+    def __init__(self, core_factory:CoreFactory, address:Tuple[str,int]=('127.0.0.1', 0), worker:str='thread',
+                 start_method:str='spawn', verbose:bool=False) -> None:
+        if worker not in ('thread', 'process'):
+            raise ValueError(f'Unknown worker "{worker}", expected "thread" or "process"')
+        super().__init__(address, ShopRestRequestHandler)
+        self.core_factory = core_factory
+        self.worker = worker
+        self.start_method = start_method
+        self.verbose = verbose
+        self.commands = []
+        self._sessions = {}
+        self._next_id = 1
+        self._counters = dict(connections=0, requests=0, errors=0, core_calls=0, batches=0, bytes_received=0,
+                              bytes_sent=0, request_time=0.0, max_request_time=0.0)
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> 'ShopRestServer':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        for session in self.get_sessions():
+            self.close_session(session.session_id)
+
+    def create_session(self, session_request:Dict[str,Any]) -> ServerSession:
+        if self.worker == 'thread':
+            executor = ThreadPoolExecutor(max_workers=1)
+        else:
+            executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context(self.start_method))
+        try:
+            commands = executor.submit(_start_core, self.core_factory, session_request).result()
+        except BaseException:
+            executor.shutdown(wait=False)
+            raise
+        # The first of the client's wire formats that the server supports
+        supported = [f for f in session_request.get('wire_formats', []) if f in ('binary', 'json')]
+        with self._lock:
+            session_id = self._next_id
+            self._next_id += 1
+            session = ServerSession(session_id, session_request.get('session_name', 'unnamed'),
+                                    supported[0] if supported else 'json', executor, commands)
+            self._sessions[session_id] = session
+            self.commands = commands
+        return session
+
+    def get_session(self, session_id:int) -> Optional[ServerSession]:
+        return self._sessions.get(session_id, None)
+
+    def get_sessions(self) -> List[ServerSession]:
+        with self._lock:
+            return list(self._sessions.values())
+
+    def close_session(self, session_id:int) -> None:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.close()
+
+    def count(self, name:str, value:float=1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def count_request(self, elapsed:float) -> None:
+        with self._lock:
+            self._counters['requests'] += 1
+            self._counters['request_time'] += elapsed
+            self._counters['max_request_time'] = max(self._counters['max_request_time'], elapsed)
+
+    def get_metrics(self) -> Dict[str,Any]:
+        with self._lock:
+            metrics = dict(self._counters)
+            metrics['sessions'] = len(self._sessions)
+        metrics['worker'] = self.worker
+        metrics['uptime'] = time.time() - self._started
+        metrics['mean_request_time'] = metrics['request_time'] / metrics['requests'] if metrics['requests'] else 0.0
+        return metrics
+
+
+def main(argv:Optional[List[str]]=None) -> None:
+    parser = argparse.ArgumentParser(description='Serve shop_pybind sessions over the pyshop REST protocol')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--worker', choices=['thread', 'process'], default='process')
+    parser.add_argument('--license-path', default='')
+    parser.add_argument('--solver-path', default='')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+    server = ShopRestServer(ShopCoreFactory(args.license_path, args.solver_path), (args.host, args.port), args.worker,
+                            verbose=args.verbose)
+    print(f'Serving SHOP sessions on http://{args.host}:{server.port} with {args.worker} workers')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for session in server.get_sessions():
+            server.close_session(session.session_id)
+
+
+if __name__ == '__main__':
+    main()
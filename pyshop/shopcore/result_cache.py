@@ -0,0 +1,79 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+import copy
+import pandas as pd
+
+# A cached value was not found. None is a valid attribute value, so it can not be used to signal a miss
+MISSING = object()
+
+
+def copy_value(value:Any) -> Any:
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return value.copy()
+    return copy.deepcopy(value)
+
+
+class ResultCache(object):
+    """
+    A bounded LRU cache of output attribute values. Output attributes only change when the model is solved, so the
+    cache is valid for one solve epoch, which ends when a command is executed or an input is set. Copies of the cached
+    values are returned, so callers are free to modify them. Results solved in other sessions can be merged into the
+    cache, and are kept without a size bound until the epoch ends.
+    """
+
+    max_size:int
+    epoch:int
+    hits:int
+    misses:int
+    _values:'OrderedDict[Hashable,Any]'
+    _merged:Dict[Hashable,Any]
+
+    def __init__(self, max_size:int=256) -> None:
+        self.max_size = max_size
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self._values = OrderedDict()
+        self._merged = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, key:Hashable) -> Any:
+        # Returns MISSING if the key is not cached
+        value = self._values.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        self._values.move_to_end(key)
+        return copy_value(value)
+
+    def put(self, key:Hashable, value:Any) -> None:
+        if self.max_size <= 0:
+            return
+        self._values[key] = copy_value(value)
+        self._values.move_to_end(key)
+        while len(self._values) > self.max_size:
+            self._values.popitem(last=False)
+
+    def merge(self, values:Dict[Hashable,Any]) -> None:
+        self._merged.update(values)
+
+    def get_merged(self, key:Hashable) -> Any:
+        # Returns MISSING if no value has been merged for the key
+        value = self._merged.get(key, MISSING)
+        if value is MISSING:
+            return MISSING
+        return copy_value(value)
+
+    def invalidate(self) -> None:
+        # Start a new solve epoch
+        self._values.clear()
+        self._merged.clear()
+        self.epoch += 1
+
+    def get_info(self) -> Dict[str,int]:
+        return dict(hits=self.hits, misses=self.misses, size=len(self._values), max_size=self.max_size,
+                    epoch=self.epoch)
+
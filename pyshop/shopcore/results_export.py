@@ -0,0 +1,211 @@
+from typing import Any, Dict, List, Optional, Sequence
+import zipfile
+import numpy as np
+import pandas as pd
+
+from ..helpers.typing_annotations import ShopApi, ShopDatatypes
+from .datatype_codecs import get_codec, import_pyarrow
+from .model_builder import ModelBuilderType
+from .time_grid import TimeGrid
+
+# Output attributes are exported as one long table with these columns. Scalar results have no time and scenario 0,
+# and curve results (xy, xy_array, ...) do not fit the table and are left out
+RESULT_COLUMNS = ['object_type', 'object_name', 'attribute', 'scenario', 'time', 'value']
+EXPORT_DATATYPES = ['txy', 'double', 'int']
+EXPORT_FORMATS = ['parquet', 'arrow', 'npz']
+
+
+class ResultBatch(object):
+    # Collects the rows of several attributes until the batch is large enough to be written as one row group
+
+    labels:List[Any]
+    counts:List[int]
+    scenarios:List[np.ndarray]
+    times:List[np.ndarray]
+    values:List[np.ndarray]
+    n_rows:int
+
+    def __init__(self) -> None:
+        self.labels = []
+        self.counts = []
+        self.scenarios = []
+        self.times = []
+        self.values = []
+        self.n_rows = 0
+
+    def add(self, object_type:str, object_name:str, attribute:str, scenario:np.ndarray, time:np.ndarray,
+            value:np.ndarray) -> None:
+        if value.size == 0:
+            return
+        self.labels.append((object_type, object_name, attribute))
+        self.counts.append(value.size)
+        self.scenarios.append(scenario)
+        self.times.append(time)
+        self.values.append(value)
+        self.n_rows += value.size
+
+    def get_columns(self) -> Dict[str,np.ndarray]:
+        if self.n_rows == 0:
+            return get_empty_columns()
+        # The label columns are built by repeating the label of each attribute once per row
+        labels = np.array(self.labels, dtype=str).reshape(-1, 3)
+        columns = {name: np.repeat(labels[:, i], self.counts) for i, name in enumerate(RESULT_COLUMNS[:3])}
+        columns['scenario'] = np.concatenate(self.scenarios).astype(np.int64)
+        columns['time'] = np.concatenate(self.times).astype('datetime64[ns]')
+        columns['value'] = np.concatenate(self.values).astype(float)
+        return columns
+
+
+class NpzResultWriter(object):
+    # Writes each batch as separate .npy members of a zip file, so that only one batch is held in memory. The members of
+    # batch i are named "<column>_<i>", and the time zone of the wall time column is stored in the "tz_name" member
+
+    _zip:zipfile.ZipFile
+    _n_batches:int
+
+    def __init__(self, path:str, tz_name:str) -> None:
+        self._zip = zipfile.ZipFile(path, 'w')
+        self._n_batches = 0
+        self._write_array('tz_name', np.array(tz_name))
+
+    def _write_array(self, name:str, values:np.ndarray) -> None:
+        with self._zip.open(f'{name}.npy', 'w', force_zip64=True) as f:
+            np.lib.format.write_array(f, values, allow_pickle=False)
+
+    def write(self, columns:Dict[str,np.ndarray]) -> None:
+        for name, values in columns.items():
+            self._write_array(f'{name}_{self._n_batches:05d}', values)
+        self._n_batches += 1
+
+    def close(self) -> None:
+        self._zip.close()
+
+
+class ArrowResultWriter(object):
+    # Writes each batch as a row group of a parquet file, or as a record batch of an Arrow IPC file
+
+    def __init__(self, path:str, tz_name:str, file_format:str='parquet') -> None:
+        pa = import_pyarrow(f'Exporting results to {file_format}')
+        self._pa = pa
+        self._tz_name = tz_name
+        self._schema = pa.schema([
+            ('object_type', pa.string()),
+            ('object_name', pa.string()),
+            ('attribute', pa.string()),
+            ('scenario', pa.int64()),
+            ('time', pa.timestamp('ns', tz=tz_name if tz_name else None)),
+            ('value', pa.float64()),
+        ])
+        if file_format == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self._schema)
+        else:
+            self._writer = pa.ipc.new_file(path, self._schema)
+
+    def write(self, columns:Dict[str,np.ndarray]) -> None:
+        time = pd.DatetimeIndex(columns['time'])
+        if self._tz_name:
+            time = time.tz_localize(self._tz_name)
+        arrays = [self._pa.array(columns[name]) for name in RESULT_COLUMNS[:4]]
+        arrays += [self._pa.array(time), self._pa.array(columns['value'])]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def get_result_rows(shop_api:ShopApi, object_type:str, object_name:str, attribute_name:str, datatype:str,
+                    time_grid:TimeGrid) -> Optional[List[np.ndarray]]:
+    # The scenario, time and value columns of one output attribute, with missing values left out
+    return get_value_rows(get_codec(datatype).get(shop_api, object_type, object_name, attribute_name, time_grid),
+                          datatype)
+
+
+def get_value_rows(value:ShopDatatypes, datatype:str) -> Optional[List[np.ndarray]]:
+    # The rows of a value in the "numpy" output format
+    if value is None:
+        return None
+    if datatype != 'txy':
+        return [np.zeros(1, dtype=np.int64), np.array(['NaT'], dtype='datetime64[ns]'), np.array([value], dtype=float)]
+    y = value.y.reshape(value.t.size, -1)
+    n_times, n_scenarios = y.shape
+    scenario = np.repeat(np.arange(n_scenarios), n_times)
+    time = np.tile(value.get_datetimes(), n_scenarios)
+    y = y.T.reshape(-1)
+    valid = ~np.isnan(y)
+    return [scenario[valid], time[valid], y[valid]]
+
+
+def export_results(shop_api:ShopApi, model:ModelBuilderType, path:str, object_types:Optional[Sequence[str]]=None,
+                   attributes:Optional[Sequence[str]]=None, format:str='parquet', batch_rows:int=1000000) -> int:
+    """
+    Export the output attributes of all objects, or of the given object types and attribute names, as one long table
+    with the columns object_type, object_name, attribute, scenario, time and value. Attributes are read one at a time
+    and written in batches of about batch_rows rows, so memory use is bounded by the batch size and not by the size of
+    the results. Times are given in the time zone of the session. Returns the number of rows written.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f'Unknown export format "{format}", expected one of {EXPORT_FORMATS}')
+    time_grid = model.get_time_grid()
+    if format == 'npz':
+        writer = NpzResultWriter(path, time_grid.tz_name)
+    else:
+        writer = ArrowResultWriter(path, time_grid.tz_name, format)
+
+    if object_types is None:
+        object_types = model.get_object_types()
+    n_rows = 0
+    batch = ResultBatch()
+    try:
+        for object_type in object_types:
+            output_attributes = model.get_output_attributes(object_type)
+            names = [name for name, datatype in output_attributes.items() if datatype in EXPORT_DATATYPES and
+                     (attributes is None or name in attributes)]
+            if not names:
+                continue
+            object_names = model[object_type].get_object_names()
+            # Results merged from other sessions are exported instead of the values in the core, as get() returns them
+            merged = {attribute_name: model.get_merged_results(object_type, object_names, attribute_name)
+                      for attribute_name in names}
+            for object_name in object_names:
+                for attribute_name in names:
+                    if object_name in merged[attribute_name]:
+                        rows = get_value_rows(merged[attribute_name][object_name], output_attributes[attribute_name])
+                    else:
+                        rows = get_result_rows(shop_api, object_type, object_name, attribute_name,
+                                               output_attributes[attribute_name], time_grid)
+                    if rows is None:
+                        continue
+                    batch.add(object_type, object_name, attribute_name, *rows)
+                    if batch.n_rows >= batch_rows:
+                        writer.write(batch.get_columns())
+                        n_rows += batch.n_rows
+                        batch = ResultBatch()
+        # An empty last batch is only written if nothing else is, so the file always has a schema
+        if batch.n_rows > 0 or n_rows == 0:
+            writer.write(batch.get_columns())
+            n_rows += batch.n_rows
+    finally:
+        writer.close()
+    return n_rows
+
+
+def get_empty_columns() -> Dict[str,np.ndarray]:
+    columns = {name: np.array([], dtype=str) for name in RESULT_COLUMNS[:3]}
+    columns['scenario'] = np.array([], dtype=np.int64)
+    columns['time'] = np.array([], dtype='datetime64[ns]')
+    columns['value'] = np.array([], dtype=float)
+    return columns
+
+
+def read_npz_results(path:str) -> pd.DataFrame:
+    # Read a results file written with format='npz' back into one DataFrame
+    with np.load(path, allow_pickle=False) as data:
+        tz_name = str(data['tz_name'])
+        n_batches = len([name for name in data.files if name.startswith('value_')])
+        df = pd.DataFrame({
+            name: np.concatenate([data[f'{name}_{i:05d}'] for i in range(n_batches)]) for name in RESULT_COLUMNS
+        })
+    if tz_name:
+        df['time'] = df['time'].dt.tz_localize(tz_name)
+    return df
@@ -0,0 +1,83 @@
+from types import MappingProxyType
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+
+from ..helpers.typing_annotations import ShopApi
+
+
+class AttributeInfo(NamedTuple):
+    is_input:bool
+    license_name:str
+
+
+class ObjectTypeSchema(object):
+    """
+    The attributes of one object type and their datatypes. A schema is shared by all proxies of the type, so it is
+    read-only. The attribute info (isInput and licenseName) takes one core call per attribute and is only fetched the
+    first time it is needed.
+    """
+
+    object_type:str
+    attribute_names:Tuple[str,...]
+    datatypes:Mapping[str,str]
+    _shop_api:ShopApi
+    _info:Optional[Mapping[str,AttributeInfo]]
+    _output_attributes:Optional[Mapping[str,str]]
+
+    def __init__(self, shop_api:ShopApi, object_type:str) -> None:
+        self._shop_api = shop_api
+        self.object_type = object_type
+        self.attribute_names = tuple(shop_api.GetObjectTypeAttributeNames(object_type))
+        self.datatypes = MappingProxyType(dict(zip(self.attribute_names,
+                                                   shop_api.GetObjectTypeAttributeDatatypes(object_type))))
+        self._info = None
+        self._output_attributes = None
+
+    def __contains__(self, attribute_name:str) -> bool:
+        return attribute_name in self.datatypes
+
+    def get_datatype(self, attribute_name:str) -> Optional[str]:
+        return self.datatypes.get(attribute_name, None)
+
+    def get_info(self) -> Mapping[str,AttributeInfo]:
+        if self._info is None:
+            has_license = 'licenseName' in self._shop_api.GetValidAttributeInfoKeys()
+            info = {}
+            for name in self.attribute_names:
+                is_input = self._shop_api.GetAttributeInfo(self.object_type, name, 'isInput') != 'False'
+                license_name = self._shop_api.GetAttributeInfo(self.object_type, name, 'licenseName') if has_license else ''
+                info[name] = AttributeInfo(is_input, license_name)
+            self._info = MappingProxyType(info)
+        return self._info
+
+    def is_input(self, attribute_name:str) -> bool:
+        return self.get_info()[attribute_name].is_input
+
+    def get_license_name(self, attribute_name:str) -> str:
+        return self.get_info()[attribute_name].license_name
+
+    def get_output_attributes(self) -> Mapping[str,str]:
+        # The names and datatypes of the output attributes
+        if self._output_attributes is None:
+            self._output_attributes = MappingProxyType({
+                name: self.datatypes[name] for name, info in self.get_info().items() if not info.is_input
+            })
+        return self._output_attributes
+
+
+class SchemaRegistry(object):
+    # The schemas of all object types used in a session. The attributes of a type do not change during a session, so each
+    # schema is only built once
+
+    _shop_api:ShopApi
+    _schemas:Dict[str,ObjectTypeSchema]
+
+    def __init__(self, shop_api:ShopApi) -> None:
+        self._shop_api = shop_api
+        self._schemas = {}
+
+    def get(self, object_type:str) -> ObjectTypeSchema:
+        schema = self._schemas.get(object_type, None)
+        if schema is None:
+            schema = ObjectTypeSchema(self._shop_api, object_type)
+            self._schemas[object_type] = schema
+        return schema
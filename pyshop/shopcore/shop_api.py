@@ -1,143 +1,154 @@
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
 import numpy as np
 import pandas as pd
 
 from ..helpers.typing_annotations import ShopApi, ShopDatatypes, XyType
-from ..helpers.time import get_shop_datetime, get_shop_timestring
-from ..helpers.timeseries import create_constant_time_series, get_timestamp_indexed_series, resample_resolution
-
-def get_attribute_value(shop_api:ShopApi, object_name:str, object_type:str, attribute_name:str, datatype:str, dataframe:bool=True) -> ShopDatatypes:
-    value = None
-    if datatype == 'int':
-        value = shop_api.GetIntValue(object_type, object_name, attribute_name)
-    elif datatype == 'int_array':
-        value = list(shop_api.GetIntArray(object_type, object_name, attribute_name))
-        if len(value) == 0:
-            value = None
-    elif datatype == 'double':
-        value = shop_api.GetDoubleValue(object_type, object_name, attribute_name)
-    elif datatype == 'double_array':
-        value = list(shop_api.GetDoubleArray(object_type, object_name, attribute_name))
-        if len(value) == 0:
-            value = None
-    elif datatype == 'string':
-        value = shop_api.GetStringValue(object_type, object_name, attribute_name)
-    elif datatype == 'string_array':
-        value = shop_api.GetStringArray(object_type, object_name, attribute_name)
-    elif datatype == 'xy':
-        ref = shop_api.GetXyCurveReference(object_type, object_name, attribute_name)
-        x = np.fromiter(shop_api.GetXyCurveX(object_type, object_name, attribute_name), float)
-        y = np.fromiter(shop_api.GetXyCurveY(object_type, object_name, attribute_name), float)
-        if x.size == 0:
-            value = None
-        else:
-            if dataframe:
-                value = pd.Series(y, index=x, name=ref)
-            else:
-                xy = [[x, y] for x, y in zip(x, y)]
-                value = dict(ref=ref, xy=xy)
-    elif datatype == 'sy':
-        s = shop_api.GetSyCurveS(object_type, object_name, attribute_name)
-        y = np.fromiter(shop_api.GetSyCurveY(object_type, object_name, attribute_name), float)
-        if y.size == 0:
-            value = None
+from ..helpers.curve_batch import CurveBatch
+from .datatype_codecs import format_value, get_codec, get_output_format_name
+from .time_grid import TimeGrid, get_time_grid
+from ..helpers.time import get_shop_datetime64
+from ..helpers.timeseries import TxyArrays, get_time_unit_timedelta
+
+def get_attribute_value(shop_api:ShopApi, object_name:str, object_type:str, attribute_name:str, datatype:str, dataframe:bool=True,
+                        raw:bool=False, time_grid:Optional[TimeGrid]=None, output_format:Optional[str]=None) -> ShopDatatypes:
+    # The value is read by the codec registered for the datatype and returned in the given output format. raw=True is
+    # short for the "numpy" format, where e.g. xy_array and xyt attributes are returned as a CurveBatch and txy
+    # attributes as TxyArrays, and dataframe=False for the "python" format. The time zone, time unit and horizon of time
+    # dependent attributes are taken from time_grid when it is given, instead of being queried from the core
+    codec = get_codec(datatype)
+    if codec is None:
+        return None
+    value = codec.get(shop_api, object_type, object_name, attribute_name, time_grid)
+    return format_value(value, datatype, get_output_format_name(dataframe, raw, output_format), attribute_name)
+
+
+def get_attribute_values(shop_api:ShopApi, object_names:Sequence[str], object_type:str, attribute_name:str, datatype:str,
+                         dataframe:bool=True, time_grid:Optional[TimeGrid]=None,
+                         merged:Optional[Mapping[str,ShopDatatypes]]=None) -> Union[pd.DataFrame,pd.Series]:
+    # Get the same attribute for several objects of one type in a single pass. merged maps object names to values in
+    # the "numpy" output format, e.g. results merged from other sessions, which are used instead of reading the core
+    if merged is None:
+        merged = {}
+    if datatype == 'txy':
+        return get_txy_attribute_frame(shop_api, object_names, object_type, attribute_name, time_grid, merged)
+    elif datatype in ['int', 'double', 'string']:
+        values = [merged[name] if name in merged else
+                  get_attribute_value(shop_api, name, object_type, attribute_name, datatype) for name in object_names]
+        return pd.Series(values, index=pd.Index(object_names, name='object_name'), name=attribute_name)
+    else:
+        if datatype == 'xyt' and time_grid is None:
+            time_grid = get_time_grid(shop_api)
+        format_name = get_output_format_name(dataframe, False, None)
+        values = [format_value(merged[name], datatype, format_name, attribute_name) if name in merged else
+                  get_attribute_value(shop_api, name, object_type, attribute_name, datatype, dataframe,
+                                      time_grid=time_grid) for name in object_names]
+        return pd.Series(values, index=pd.Index(object_names, name='object_name'), name=attribute_name, dtype=object)
+
+
+def get_txy_attribute_frame(shop_api:ShopApi, object_names:Sequence[str], object_type:str, attribute_name:str,
+                            time_grid:Optional[TimeGrid]=None,
+                            merged:Optional[Mapping[str,Optional[TxyArrays]]]=None) -> pd.DataFrame:
+    # Get a TXY attribute for several objects as one DataFrame. Deterministic series are returned as a wide frame with
+    # the object names as columns, while stochastic series are returned as a long frame with one row per object,
+    # scenario and time. The time zone, time unit and time index are only fetched and built once. The series of the
+    # objects in merged are taken from there instead of the core
+    if time_grid is None:
+        time_grid = get_time_grid(shop_api)
+    if merged is None:
+        merged = {}
+    tz_name = time_grid.tz_name
+    time_unit = time_grid.timeunit
+    delta = get_time_unit_timedelta(time_unit)
+
+    # Start times are parsed with a cache, so each distinct start time is only parsed once
+    starts = []
+    t_list = []
+    y_list = []
+    for name in object_names:
+        if name in merged:
+            value = merged[name]
+            start = None if value is None else value.start
+            if start is not None:
+                t = np.asarray(value.t, dtype=np.int64) * (get_time_unit_timedelta(value.time_unit) // delta)
+                y = np.array(value.y, dtype=float)
         else:
-            if dataframe:
-                value = pd.Series(y, index=s)
-            else:
-                sy = [[s, y] for s, y in zip(s, y)]
-                value = dict(sy=sy)
-    elif datatype == 'xy_array':
-        refs = np.fromiter(shop_api.GetXyCurveArrayReferences(object_type, object_name, attribute_name), float)
-        n = np.fromiter(shop_api.GetXyCurveArrayNPoints(object_type, object_name, attribute_name), int)
-        x = np.fromiter(shop_api.GetXyCurveArrayX(object_type, object_name, attribute_name), float)
-        y = np.fromiter(shop_api.GetXyCurveArrayY(object_type, object_name, attribute_name), float)
-        value = []
-        offset = 0
-        if n.size == 0:
-            value = None
+            start_string = shop_api.GetTxySeriesStartTime(object_type, name, attribute_name)
+            start = get_shop_datetime64(start_string) if start_string else None
+            if start is not None:
+                t = np.asarray(shop_api.GetTxySeriesT(object_type, name, attribute_name), dtype=np.int64)
+                y = np.array(shop_api.GetTxySeriesY(object_type, name, attribute_name), dtype=float)
+                y[y >= 1.0e40] = np.nan
+        starts.append(start)
+        if start is not None:
+            t_list.append(t)
+            y_list.append(y.reshape(y.shape[0], -1) if y.size > 0 else y.reshape(0, 1))
         else:
-            if dataframe:
-                for n_items, ref in zip(n, refs):
-                    df = pd.Series(y[offset:offset + n_items], index=x[offset:offset + n_items], name=ref)
-                    value.append(df)
-                    offset += n_items
-            else:
-                for n_items, ref in zip(n, refs):
-                    xy = [[x[i], y[i]] for i in range(offset, offset + n_items)]
-                    v = dict(ref=ref, xy=xy)
-                    value.append(v)
-                    offset += n_items
-    elif datatype == 'xyt':
-        tz_name = get_shop_timzone_name(shop_api)
-        start = get_shop_datetime(shop_api.GetStartTime(), tz_name)
-        end = get_shop_datetime(shop_api.GetEndTime(), tz_name)
-        value = get_xyt_attribute(shop_api, object_name, object_type, attribute_name, start, end, dataframe)
-    elif datatype == 'txy':
-        start_time = shop_api.GetTxySeriesStartTime(object_type, object_name, attribute_name)
-        if start_time:
-            tz_name = get_shop_timzone_name(shop_api)
-            start_time = get_shop_datetime(start_time, tz_name)
-            t = shop_api.GetTxySeriesT(object_type, object_name, attribute_name)
-            y = shop_api.GetTxySeriesY(object_type, object_name, attribute_name)
-            time_unit = shop_api.GetTimeUnit()
-            value = get_timestamp_indexed_series(start_time, time_unit, t, y, column_name=attribute_name)
-    else:
-        value = None
-    return value
-
-
-def get_xyt_attribute(shop_api:ShopApi, object_name:str, object_type:str, attribute_name:str, start:pd.Timestamp, end:pd.Timestamp, dataframe:bool=True) -> List[XyType]:
-
-    tz_name = get_shop_timzone_name(shop_api)
-    
-    #Get the time stamp for each xy function in the xyt attribute
-    try:
-        time_strings = shop_api.GetXyTCurveTimeStrings(object_type, object_name, attribute_name)
-        time_list = [get_shop_datetime(t, tz_name) for t in time_strings]
-    #To keep backwards compatibility before GetXyTCurveTimeStrings was implemented in the API. Get the time indices instead
-    except AttributeError:
-        time_indices = shop_api.GetXyTCurveTimes(object_type, object_name, attribute_name)
-        shop_start_time = get_shop_datetime(shop_api.GetStartTime(), tz_name)
+            t_list.append(None)
+            y_list.append(None)
 
-        time_unit = shop_api.GetTimeUnit()
-        delta = pd.Timedelta(hours=1)
-        if time_unit == 'minute':
-            delta = pd.Timedelta(minutes=1)
-        elif time_unit == 'second':
-            delta = pd.Timedelta(seconds=1)
-
-        time_list = [shop_start_time + t*delta for t in time_indices]
-
-    x = np.fromiter(shop_api.GetXyTCurveX(object_type, object_name, attribute_name,
-                                          get_shop_timestring(start), get_shop_timestring(end)), float)
-    y = np.fromiter(shop_api.GetXyTCurveY(object_type, object_name, attribute_name,
-                                          get_shop_timestring(start), get_shop_timestring(end)), float)
-    n = np.fromiter(shop_api.GetXyTCurveN(object_type, object_name, attribute_name,
-                                          get_shop_timestring(start), get_shop_timestring(end)), int)
-    
-    #Before SHOP 14.4.3.0, the function GetXyTCurveN returned a value for every time step in the optimization.
-    #This can result in many 0 values for time steps where there is no xy table defined. 
-    #Remove these zeros since the x and y arrays only return values for times where there is an xy
-    n = n[n != 0]
-    
-    value = []
-    offset = 0
-    if n.size == 0:
-        value = None
+    # Express all series as time unit offsets from the earliest start time
+    present_starts = [start for start in starts if start is not None]
+    if present_starts:
+        reference = min(present_starts)
+    else:
+        reference = time_grid.starttime.tz_localize(None).to_datetime64()
+    offsets = []
+    for start, t in zip(starts, t_list):
+        if t is None:
+            offsets.append(None)
+        else:
+            offsets.append(t + int((start - reference) // delta))
+
+    # Reuse the time index directly if all series share it, otherwise build the union of all time points
+    present = [o for o in offsets if o is not None]
+    if present and all(o.size == present[0].size and (o == present[0]).all() for o in present[1:]):
+        union = present[0]
+        shared = True
+    elif present:
+        union = np.unique(np.concatenate(present))
+        shared = False
     else:
-        if dataframe:            
-            for n_items, time in zip(n, time_list):
-                df = pd.Series(y[offset:offset + n_items], index=x[offset:offset + n_items], name=time)
-                value.append(df)
-                offset += n_items
+        union = np.zeros(0, dtype=np.int64)
+        shared = True
+
+    index = pd.DatetimeIndex(reference + union * delta, name='time')
+    if tz_name:
+        index = index.tz_localize(tz_name)
+
+    n_scenarios = max([y.shape[1] for y in y_list if y is not None], default=1)
+    values = np.full((union.size, len(object_names), n_scenarios), np.nan)
+    for i, (o, y) in enumerate(zip(offsets, y_list)):
+        if o is None:
+            continue
+        if shared:
+            values[:, i, :y.shape[1]] = y
         else:
-            for n_items, time in zip(n, time_list):
-                xy = [[x[i], y[i]] for i in range(offset, offset + n_items)]
-                v = dict(time=time, xy=xy)
-                value.append(v)
-                offset += n_items
-    return value
+            # TXY series are step functions, so forward fill each series onto the union of the time points
+            position = np.searchsorted(o, union, side='right') - 1
+            valid = position >= 0
+            values[valid, i, :y.shape[1]] = y[position[valid]]
+
+    if n_scenarios == 1:
+        return pd.DataFrame(values[:, :, 0], index=index, columns=pd.Index(object_names, name='object_name'))
+
+    n_times = union.size
+    n_objects = len(object_names)
+    return pd.DataFrame({
+        'object_name': np.tile(np.repeat(np.asarray(object_names, dtype=object), n_scenarios), n_times),
+        'scenario': np.tile(np.arange(n_scenarios), n_times * n_objects),
+        'time': index.repeat(n_objects * n_scenarios),
+        'value': values.reshape(-1),
+    }).dropna(subset=['value']).reset_index(drop=True)
+
+
+def get_xyt_attribute(shop_api:ShopApi, object_name:str, object_type:str, attribute_name:str, start:pd.Timestamp, end:pd.Timestamp, dataframe:bool=True,
+                      raw:bool=False, time_grid:Optional[TimeGrid]=None,
+                      output_format:Optional[str]=None) -> Union[List[XyType],CurveBatch]:
+    if time_grid is None:
+        time_grid = get_time_grid(shop_api)
+    value = get_codec('xyt').get(shop_api, object_type, object_name, attribute_name,
+                                 time_grid._replace(starttime=start, endtime=end))
+    return format_value(value, 'xyt', get_output_format_name(dataframe, raw, output_format), attribute_name)
 
 
 def get_attribute_info(shop_api:ShopApi, object_type:str, attribute_name:str, key:str='') -> Union[str,Dict[str,str]]:
@@ -155,168 +166,13 @@ def get_object_info(shop_api:ShopApi, object_type:str, key:str='') -> Union[str,
     else:
         return {key: shop_api.GetObjectInfo(object_type, key) for key in shop_api.GetValidObjectInfoKeys()}
 
-def set_attribute(shop_api:ShopApi, object_name:str, object_type:str, attribute_name:str, datatype:str, value:ShopDatatypes) -> None:
-    # Set a attribute in the SHOP core.
-    # datatype = get_attribute_info(shop_api, object_type, attribute_name, 'datatype')
-    if datatype == 'int':
-        shop_api.SetIntValue(object_type, object_name, attribute_name, int(value))
-    elif datatype == 'int_array':
-        shop_api.SetIntArray(object_type, object_name, attribute_name, value)
-    elif datatype == 'double':
-        shop_api.SetDoubleValue(object_type, object_name, attribute_name, value)
-    elif datatype == 'double_array':
-        shop_api.SetDoubleArray(object_type, object_name, attribute_name, value)
-    elif datatype == 'string':
-        shop_api.SetStringValue(object_type, object_name, attribute_name, value)
-    elif datatype == 'string_array':
-        shop_api.SetStringArray(object_type, object_name, attribute_name, value)
-    elif datatype == 'xy':
-        if isinstance(value, pd.Series):
-            ref = value.name
-            if ref is None:
-                ref = 0.0
-            ref = float(ref)
-            shop_api.SetXyCurve(object_type, object_name, attribute_name, ref, value.index.values,
-                                value.values)
-        else:
-            x = [x[0] for x in value['xy']]
-            y = [x[1] for x in value['xy']]
-            shop_api.SetXyCurve(object_type, object_name, attribute_name, value['ref'], x, y)
-    elif datatype == 'sy':
-        if isinstance(value, pd.Series):
-            shop_api.SetSyCurve(object_type, object_name, attribute_name, value.index.to_list(),
-                                value.values)
-        else:
-            s = [s[0] for s in value['sy']]
-            y = [x[1] for x in value['sy']]
-            shop_api.SetSyCurve(object_type, object_name, attribute_name, list(s), y)
-    elif datatype == 'xy_array':
-        if len(value) == 0:
-            return
-        ref = np.array([])
-        x = np.array([])
-        y = np.array([])
-        n = np.array([])
-        if isinstance(value[0], pd.DataFrame):
-            for df in value:
-                ref = np.append(ref, float(df.columns[0]))
-                n = np.append(n, df.size)
-                x = np.append(x, df.index.values)
-                y = np.append(y, df.iloc[:, 0].values)
-        elif isinstance(value[0], pd.Series):
-            for ser in value:
-                ref = np.append(ref, float(ser.name))
-                n = np.append(n, ser.size)
-                x = np.append(x, ser.index.values)
-                y = np.append(y, ser.values)
-        else:
-            for xy in value:
-                ref = np.append(ref, xy['ref'])
-                n = np.append(n, len(xy['xy']))
-                x = np.append(x, [x[0] for x in xy['xy']])
-                y = np.append(y, [x[1] for x in xy['xy']])
-        shop_api.SetXyCurveArray(object_type, object_name, attribute_name, ref, n, x, y)
-    elif datatype == 'xyt':
-        if len(value) == 0:
-            return
-
-        #XYT curves are XY curves specified for different times
-        #Convert times from timestamp to time strings in SHOP format
-        times = []
-        x = np.array([])
-        y = np.array([])
-        n = np.array([])
-        if isinstance(value[0], pd.DataFrame):
-            for df in value:
-                t = pd.Timestamp(str(df.columns[0]))
-                times.append(get_shop_timestring(t))
-                n = np.append(n, df.size)
-                x = np.append(x, df.index.values)
-                y = np.append(y, df.iloc[:, 0].values)
-        elif isinstance(value[0], pd.Series):
-            for ser in value:
-                t = pd.Timestamp(str(ser.name))
-                times.append(get_shop_timestring(t))
-                n = np.append(n, ser.size)
-                x = np.append(x, ser.index.values)
-                y = np.append(y, ser.values)
-        else:
-            for xy in value:
-                t = pd.Timestamp(str(xy['time']))
-                times.append(get_shop_timestring(t))
-                n = np.append(n, len(xy['xy']))
-                x = np.append(x, [x[0] for x in xy['xy']])
-                y = np.append(y, [x[1] for x in xy['xy']])
-        
-        #Note that times is a regular python list while n, x, and y are np arrays
-        shop_api.SetXyTCurve(object_type, object_name, attribute_name, times, n, x, y)        
-
-    elif datatype == 'txy':
-        time = get_time_resolution(shop_api)
-
-        # Make sure we continue on with a Series or a DataFrame
-        if isinstance(value, float) or isinstance(value, int):
-            df = create_constant_time_series(value, time['starttime'])
-        else:
-            df = value
-
-        if df.shape[0] == 0:
-            shop_api.SetTxySeries(
-                object_type, object_name, attribute_name,
-                get_shop_timestring(time['starttime']), [], []
-            )
-            return
-
-        # Extract data in time interval
-        if df.loc[time['starttime']:time['starttime']].empty:
-            df.loc[time['starttime']] = df.loc[:time['starttime']].iloc[-1]
-            df.sort_index(inplace=True)
-        df = df.loc[time['starttime']:time['endtime']]
-
-        # Get scaling factor
-        freq = 'H'
-        delta = 1/3600
-        if time['timeunit'] == 'minute':
-            freq = 'T'
-            delta = 1/60
-        elif time['timeunit'] == 'second':
-            freq = 'S'
-            delta = 1
-        txy_start_time = df.index[0]
-
-        # If we have a non-constant time resolution, we need to resample input accordingly
-        if time['timeresolution'].shape[0] > 1:
-            if df.index[-1] != time['endtime']:
-                if isinstance(df, pd.DataFrame):
-                    new_row = pd.DataFrame(df[-1:].values, index=[time['endtime']], columns=df.columns)
-                else:
-                    new_row = pd.Series(df[-1], index=[time['endtime']])
-                df = pd.concat([df, new_row])
-            df = df.asfreq(freq=freq, method='ffill')
-            df = df[:-1]
-            time_resolution = pd.Series(data=shop_api.GetTimeResolutionY(), index=shop_api.GetTimeResolutionT())
-            df = resample_resolution(time, df, delta, time_resolution)
-            t = df.index
-        else:
-            t = (df.index - time['starttime']).total_seconds() * delta
-        y = df.values
-        shop_api.SetTxySeries(object_type, object_name, attribute_name, get_shop_timestring(txy_start_time),
-                              t.astype(int), y)
+def set_attribute(shop_api:ShopApi, object_name:str, object_type:str, attribute_name:str, datatype:str, value:ShopDatatypes,
+                  time_grid:Optional[TimeGrid]=None) -> None:
+    # Set a attribute in the SHOP core. TXY values are fitted to time_grid, which is queried from the core if not given
+    codec = get_codec(datatype)
+    if codec is not None:
+        codec.set(shop_api, object_type, object_name, attribute_name, value, time_grid)
 
 
 def get_time_resolution(shop_api:ShopApi) -> Dict[str,Any]:
-    tz_name = get_shop_timzone_name(shop_api)
-    starttime = get_shop_datetime(shop_api.GetStartTime(), tz_name)
-    endtime = get_shop_datetime(shop_api.GetEndTime(), tz_name)
-    timeunit = shop_api.GetTimeUnit()
-    t = shop_api.GetTimeResolutionT()
-    y = shop_api.GetTimeResolutionY()
-    timeresolution = get_timestamp_indexed_series(starttime, timeunit, t, y)
-    return dict(starttime=starttime, endtime=endtime, timeunit=timeunit, timeresolution=timeresolution)
-
-def get_shop_timzone_name(shop_api:ShopApi) -> str:
-    try:
-        tz_name = shop_api.GetTimeZone()
-    except AttributeError:  # For backwards compatability to SHOP 13
-        tz_name = ""
-    return tz_name
+    return get_time_grid(shop_api).as_dict()
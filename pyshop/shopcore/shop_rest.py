@@ -1,10 +1,19 @@
-from typing import Any, Callable, Dict
-from .. import shop_runner 
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from .. import shop_runner
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import struct
+import time
 import numpy as np
 import pandas as pd
 
+from . import wire_format
+
+# A timeout in seconds for both connecting and reading, or a (connect timeout, read timeout) tuple
+Timeout = Optional[Union[float,Tuple[float,float]]]
+
 
 class NumpyArrayEncoder(json.JSONEncoder):
     def default(self, obj:Any) -> Any:
@@ -12,34 +21,236 @@ class NumpyArrayEncoder(json.JSONEncoder):
             return obj.tolist()
         elif isinstance(obj, pd.Index):
             return obj.tolist()
+        elif isinstance(obj, np.generic):
+            return obj.item()
         return json.JSONEncoder.default(self, obj)
 
 
+def encode_body(value:Any, wire_format_name:str) -> Union[str,bytes]:
+    if wire_format_name == 'binary':
+        return wire_format.encode(value)
+    return json.dumps(value, cls=NumpyArrayEncoder)
+
+
+def decode_body(content_type:Optional[str], content:bytes) -> Any:
+    # Responses are decoded according to their content type, so that a server can always answer in JSON, e.g. with an
+    # error
+    if content_type == wire_format.BINARY_CONTENT_TYPE:
+        # The payload is copied once into a bytearray, so that the decoded arrays are writable like the arrays
+        # returned by a local core
+        return wire_format.decode(bytearray(content))
+    return json.loads(content)
+
+
+def get_content_type(wire_format_name:str) -> str:
+    return wire_format.BINARY_CONTENT_TYPE if wire_format_name == 'binary' else 'application/json'
+
+
+class RestTransport(object):
+    """
+    The HTTP connection of a session to a SHOP REST server. All requests go through one requests.Session, which keeps
+    up to pool_size connections to the server alive, so a request does not open a new TCP connection. The number of
+    round trips and the time spent waiting for them are counted.
+
+    Values are posted as JSON, or in the binary format of wire_format once set_wire_format('binary') has been called
+    after the server agreed to it.
+    """
+
+    base_url:str
+    headers:Dict[str,str]
+    timeout:Timeout
+    wire_format:str
+    round_trips:int
+    total_time:float
+    max_time:float
+    _http:requests.Session
+
+    def __init__(self, host:str, port:int, pool_size:int=10, timeout:Timeout=None) -> None:
+        self.base_url = f'http://{host}:{port}'
+        self.headers = {'Content-Type': 'application/json'}
+        self.timeout = timeout
+        self.wire_format = 'json'
+        self.round_trips = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self._http = requests.Session()
+        self._http.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        # The proxy and .netrc settings of the environment are looked up once instead of for every request
+        self._http.proxies = requests.utils.get_environ_proxies(self.base_url)
+        self._http.auth = requests.utils.get_netrc_auth(self.base_url)
+        self._http.trust_env = False
+
+    def request(self, method:str, path:str, **kwargs:Any) -> requests.Response:
+        t0 = time.perf_counter()
+        response = self._http.request(method, self.base_url + path, headers=self.headers, timeout=self.timeout,
+                                      **kwargs)
+        elapsed = time.perf_counter() - t0
+        self.round_trips += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        return response
+
+    def set_wire_format(self, name:str) -> None:
+        if name not in ('json', 'binary'):
+            raise ValueError(f'Unknown wire format "{name}", expected "json" or "binary"')
+        self.wire_format = name
+        self.headers['Content-Type'] = get_content_type(name)
+        self.headers['Accept'] = get_content_type(name)
+
+    def send(self, path:str, value:Any) -> requests.Response:
+        return self.request('POST', path, data=encode_body(value, self.wire_format))
+
+    def decode(self, response:requests.Response) -> Any:
+        return decode_body(response.headers.get('Content-Type'), response.content)
+
+    def post(self, path:str, value:Any) -> Any:
+        return self.decode(self.send(path, value))
+
+    def get_info(self) -> Dict[str,Any]:
+        mean_time = self.total_time / self.round_trips if self.round_trips else 0.0
+        return dict(round_trips=self.round_trips, total_time=self.total_time, mean_latency=mean_time,
+                    max_latency=self.max_time, wire_format=self.wire_format)
+
+    def close(self) -> None:
+        self._http.close()
+
+
+class DeferredResult(object):
+    # The result of a core call made inside a pipeline, set when the pipeline is sent
+
+    done:bool
+    _value:Any
+
+    def __init__(self) -> None:
+        self.done = False
+        self._value = None
+
+    def set(self, value:Any) -> None:
+        self._value = value
+        self.done = True
+
+    @property
+    def value(self) -> Any:
+        if not self.done:
+            raise RuntimeError('The result is not available before the pipeline has been sent')
+        return self._value
+
+
+# Reads that do not start with Get, and commands. Their results are needed at once, e.g. by the model and by
+# ShopSession.execute_command, so they are not deferred inside a pipeline
+READ_CALLS = frozenset(['UpdateNeeded', 'AttributeIsDefault', 'DumpYamlString'])
+COMMAND_CALLS = frozenset(['ExecuteCommand', 'ExecuteCommandList'])
+
+
+def is_immediate_call(name:str) -> bool:
+    return name.startswith('Get') or name in READ_CALLS or name in COMMAND_CALLS
+
+
 class ShopRestNative(object):
-    
+
     _session:'shop_runner.ShopSession'
+    _transport:RestTransport
+    _pipeline:Optional[List[Tuple[Dict[str,Any],DeferredResult]]]
+    _batch_supported:bool
     commands:Dict
 
     def __init__(self, shop_session:'shop_runner.ShopSession') -> None:
-        self._session = shop_session        
-        self.commands = requests.get(
-                f'http://{shop_session._host}:{shop_session._port}/internal',
-                headers={**shop_session._auth_headers, "session-id": str(shop_session._id)}
-            ).json()
-        # {shop_api._session_id}
+        self._session = shop_session
+        self._transport = shop_session._transport
+        self._pipeline = None
+        self._batch_supported = True
+        self.commands = self._transport.request('GET', '/internal').json()
 
     def __dir__(self) -> Dict:
         return self.commands
 
     def __getattr__(self, name:str) -> Callable:
-        return self._generate_command_func(self._session, name)
+        # Private names are never core calls, and must not be looked up before __init__ has run, e.g. when copying
+        if name[0] == '_':
+            raise AttributeError(name)
+        # The function is stored on the instance, so later calls do not go through __getattr__ again
+        command_func = self._generate_command_func(self._session, name)
+        self.__dict__[name] = command_func
+        return command_func
+
+    def get_transport_info(self) -> Dict[str,Any]:
+        # Round trip counters and the wire format of the connection to the server
+        return self._transport.get_info()
+
+    @contextmanager
+    def pipeline(self) -> Iterator[None]:
+        """
+        Record the core calls made inside the block instead of sending them. Each call returns a DeferredResult, and
+        all calls are sent in order in a single request to the batch endpoint when the block exits, after which the
+        results can be read from the value of the deferred results. Nested blocks are sent with the outermost block,
+        and nothing is sent if the block raises. Reads and commands, see is_immediate_call, and calls made with
+        call_many inside the block need their results at once, and are sent right away together with the calls
+        recorded so far, so the model and the commands of the session can be used inside the block and return their
+        usual values. Other calls, like AddObject and the Set calls, return a DeferredResult inside the block.
+        """
+        if self._pipeline is not None:
+            yield
+            return
+        self._pipeline = []
+        try:
+            yield
+            pending = self._pipeline
+        finally:
+            self._pipeline = None
+        if pending:
+            results = self._send_batch([call for call, _ in pending])
+            for (_, deferred), result in zip(pending, results):
+                deferred.set(result)
+
+    def call_many(self, calls:List[Tuple[str,Tuple[Any, ...]]]) -> List[Any]:
+        # Execute several core calls, in order, in a single request to the batch endpoint of the server. The results of
+        # the calls are returned as a list. Inside a pipeline the calls recorded so far are sent first in the same request
+        batch = [dict(name=name, args=args) for name, args in calls]
+        if self._pipeline:
+            return self._send_with_pending(batch)
+        return self._send_batch(batch)
+
+    def _send_with_pending(self, calls:List[Dict[str,Any]]) -> List[Any]:
+        # Send the calls recorded in the pipeline followed by calls, and return the results of calls
+        pending, self._pipeline = self._pipeline, []
+        results = self._send_batch([call for call, _ in pending] + calls)
+        for (_, deferred), result in zip(pending, results):
+            deferred.set(result)
+        return results[len(pending):]
+
+    def _send_batch(self, calls:List[Dict[str,Any]]) -> List[Any]:
+        if not self._batch_supported:
+            # The calls are posted directly, since calling the command functions inside a pipeline would record them
+            return [self._transport.post(f'/internal/{call["name"]}', dict(args=call['args'],
+                                                                           kwargs=call.get('kwargs', {})))
+                    for call in calls]
+        response = self._transport.send('/internal/batch', dict(calls=calls))
+        if response.status_code == 404:
+            # A server without the batch endpoint gets one request per call from now on
+            self._batch_supported = False
+            return self._send_batch(calls)
+        if not response.ok:
+            # The error body is only used if it can be decoded and holds an error message
+            try:
+                error = self._transport.decode(response)
+            except (ValueError, struct.error):
+                error = None
+            message = error.get('error', response.status_code) if isinstance(error, dict) else response.status_code
+            raise RuntimeError(f'Batch of {len(calls)} calls failed: {message}')
+        return self._transport.decode(response)
 
     def _generate_command_func(self, shop_session:'shop_runner.ShopSession', name:str) -> Callable:
+        transport = self._transport
+        path = f'/internal/{name}'
         def command_func(*args, **kwargs):
-            return requests.post(
-                f'http://{shop_session._host}:{shop_session._port}/internal/{name}',
-                headers={**shop_session._auth_headers, "session-id": str(shop_session._id)},
-                # params=dict(session=shop_session._id),
-                data=json.dumps(dict(args=args, kwargs=kwargs), cls=NumpyArrayEncoder)
-            ).json()
+            if self._pipeline is not None:
+                call = dict(name=name, args=args)
+                if kwargs:
+                    call['kwargs'] = kwargs
+                if is_immediate_call(name):
+                    return self._send_with_pending([call])[0]
+                deferred = DeferredResult()
+                self._pipeline.append((call, deferred))
+                return deferred
+            return transport.post(path, dict(args=args, kwargs=kwargs))
         return command_func
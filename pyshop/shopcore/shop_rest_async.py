@@ -0,0 +1,227 @@
+import asyncio
+import json
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .shop_rest import decode_body, encode_body, get_content_type
+
+
+class AsyncResponse(NamedTuple):
+    status_code:int
+    # Header names are lower case
+    headers:Dict[str,str]
+    content:bytes
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class StaleConnectionError(ConnectionResetError):
+    # The server closed the connection before any part of the response was read
+    pass
+
+
+class AsyncRestTransport(object):
+    """
+    The asyncio counterpart of RestTransport, a minimal HTTP/1.1 client on asyncio streams. It keeps up to
+    max_connections connections to one server alive and never has more requests in flight than that, so a transport
+    shared by all sessions on a host bounds the load on the host. timeout is the time in seconds allowed for a request,
+    including the wait for a free connection. The number of round trips and the time spent waiting for them are counted.
+    """
+
+    host:str
+    port:int
+    max_connections:int
+    timeout:Optional[float]
+    round_trips:int
+    total_time:float
+    max_time:float
+    _idle:List[Tuple[asyncio.StreamReader,asyncio.StreamWriter]]
+    _semaphore:Optional[asyncio.Semaphore]
+
+    def __init__(self, host:str, port:int, max_connections:int=10, timeout:Optional[float]=None) -> None:
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.round_trips = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self._idle = []
+        # Created in the event loop of the first request
+        self._semaphore = None
+
+    async def request(self, method:str, path:str, body:bytes=b'', headers:Optional[Dict[str,str]]=None) -> AsyncResponse:
+        t0 = time.perf_counter()
+        if self.timeout is None:
+            response = await self._request(method, path, body, headers)
+        else:
+            response = await asyncio.wait_for(self._request(method, path, body, headers), self.timeout)
+        elapsed = time.perf_counter() - t0
+        self.round_trips += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        return response
+
+    async def _request(self, method:str, path:str, body:bytes, headers:Optional[Dict[str,str]]) -> AsyncResponse:
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', f'Content-Length: {len(body)}']
+        lines += [f'{key}: {value}' for key, value in (headers or {}).items()]
+        message = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+        async with self._semaphore:
+            while self._idle:
+                reader, writer = self._idle.pop()
+                try:
+                    return await self._exchange(reader, writer, message)
+                except StaleConnectionError:
+                    # The server closed the kept-alive connection before answering, so the request is sent again on
+                    # another connection. Requests that failed after the response started are not sent again, since
+                    # the server has already executed them
+                    continue
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+            return await self._exchange(reader, writer, message)
+
+    async def _exchange(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter,
+                        message:bytes) -> AsyncResponse:
+        # The connection is only put back in the pool after a complete response, and closed on any error, also when
+        # the request is cancelled by a timeout
+        try:
+            try:
+                writer.write(message)
+                await writer.drain()
+                status_line = await reader.readline()
+            except (ConnectionResetError, BrokenPipeError) as e:
+                raise StaleConnectionError('The connection was closed by the server') from e
+            if not status_line:
+                raise StaleConnectionError('The connection was closed by the server')
+            response_headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                key, _, value = line.decode('latin-1').partition(':')
+                response_headers[key.strip().lower()] = value.strip()
+            keep_alive = status_line.startswith(b'HTTP/1.1') and response_headers.get('connection', '').lower() != 'close'
+            if 'content-length' in response_headers:
+                content = await reader.readexactly(int(response_headers['content-length']))
+            elif response_headers.get('transfer-encoding', '').lower() == 'chunked':
+                content = await read_chunked(reader)
+            else:
+                content = await reader.read()
+                keep_alive = False
+        except BaseException:
+            writer.close()
+            raise
+        if keep_alive:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+        return AsyncResponse(int(status_line.split()[1]), response_headers, content)
+
+    def get_info(self) -> Dict[str,Any]:
+        mean_time = self.total_time / self.round_trips if self.round_trips else 0.0
+        return dict(round_trips=self.round_trips, total_time=self.total_time, mean_latency=mean_time,
+                    max_latency=self.max_time, idle_connections=len(self._idle))
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+        for _, writer in idle:
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def read_chunked(reader:asyncio.StreamReader) -> bytes:
+    chunks = []
+    while True:
+        size = int((await reader.readline()).split(b';')[0], 16)
+        if size == 0:
+            # Skip the trailer
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            return b''.join(chunks)
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+
+_host_transports:'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop,Dict[Tuple[str,int],AsyncRestTransport]]' = \
+    weakref.WeakKeyDictionary()
+
+
+def get_host_transport(host:str, port:int, max_connections:int=10, timeout:Optional[float]=None) -> AsyncRestTransport:
+    # The transport shared by all sessions on host:port in the running event loop. max_connections and timeout are only
+    # used when the transport is created by the first session on the host
+    transports = _host_transports.setdefault(asyncio.get_running_loop(), {})
+    transport = transports.get((host, port), None)
+    if transport is None:
+        transport = AsyncRestTransport(host, port, max_connections, timeout)
+        transports[(host, port)] = transport
+    return transport
+
+
+class AsyncShopRestNative(object):
+    # The asyncio counterpart of ShopRestNative. Every core call is a coroutine function, e.g.
+    # await shop_api.GetDoubleValue('reservoir', 'R1', 'max_vol')
+
+    _transport:AsyncRestTransport
+    _headers:Dict[str,str]
+    _batch_supported:bool
+    wire_format:str
+    commands:List[str]
+
+    def __init__(self, transport:AsyncRestTransport, session_id:int, wire_format:str='json',
+                 commands:Optional[List[str]]=None) -> None:
+        self._transport = transport
+        self._headers = {'Content-Type': get_content_type(wire_format), 'Accept': get_content_type(wire_format),
+                         'session-id': str(session_id)}
+        self._batch_supported = True
+        self.wire_format = wire_format
+        self.commands = commands or []
+
+    def __dir__(self) -> List[str]:
+        return self.commands
+
+    def __getattr__(self, name:str) -> Callable[..., Awaitable[Any]]:
+        if name[0] == '_':
+            raise AttributeError(name)
+        command_func = self._generate_command_func(name)
+        self.__dict__[name] = command_func
+        return command_func
+
+    def get_transport_info(self) -> Dict[str,Any]:
+        return dict(self._transport.get_info(), wire_format=self.wire_format)
+
+    async def call_many(self, calls:List[Tuple[str,Tuple[Any, ...]]]) -> List[Any]:
+        # Execute several core calls, in order, in a single request to the batch endpoint of the server
+        if not self._batch_supported:
+            return [await getattr(self, name)(*args) for name, args in calls]
+        response = await self._post('/internal/batch', dict(calls=[dict(name=name, args=args) for name, args in calls]))
+        if response.status_code == 404:
+            self._batch_supported = False
+            return await self.call_many(calls)
+        results = decode_body(response.headers.get('content-type'), response.content)
+        if not response.ok:
+            raise RuntimeError(f'Batch of {len(calls)} calls failed: {results.get("error", response.status_code)}')
+        return results
+
+    async def _post(self, path:str, value:Any) -> AsyncResponse:
+        body = encode_body(value, self.wire_format)
+        if isinstance(body, str):
+            body = body.encode()
+        return await self._transport.request('POST', path, body, self._headers)
+
+    def _generate_command_func(self, name:str) -> Callable[..., Awaitable[Any]]:
+        path = f'/internal/{name}'
+        async def command_func(*args, **kwargs):
+            response = await self._post(path, dict(args=args, kwargs=kwargs))
+            return decode_body(response.headers.get('content-type'), response.content)
+        return command_func
@@ -0,0 +1,114 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+
+from ..helpers.typing_annotations import ShopApi
+from ..helpers.time import get_shop_datetime, get_shop_timestring
+from ..helpers.timeseries import get_timestamp_indexed_series
+
+
+class TimeGrid(NamedTuple):
+    # The time horizon and time resolution of a SHOP session
+    starttime:pd.Timestamp
+    endtime:pd.Timestamp
+    timeunit:str
+    timeresolution:pd.Series
+    tz_name:str
+    resolution_t:np.ndarray
+    resolution_y:np.ndarray
+
+    def has_constant_resolution(self) -> bool:
+        return self.resolution_t.size <= 1
+
+    def as_dict(self) -> Dict[str,Any]:
+        # The format returned by get_time_resolution
+        return dict(starttime=self.starttime, endtime=self.endtime, timeunit=self.timeunit,
+                    timeresolution=self.timeresolution.copy())
+
+
+def build_time_grid(start_string:str, end_string:str, timeunit:str, tz_name:str, t:Sequence[int],
+                    y:Sequence[float]) -> TimeGrid:
+    starttime = get_shop_datetime(start_string, tz_name)
+    endtime = get_shop_datetime(end_string, tz_name)
+    resolution_t = np.array(t, dtype=np.int64)
+    resolution_y = np.array(y, dtype=float)
+    resolution_t.flags.writeable = False
+    resolution_y.flags.writeable = False
+    timeresolution = get_timestamp_indexed_series(starttime, timeunit, resolution_t, resolution_y.copy())
+    return TimeGrid(starttime, endtime, timeunit, timeresolution, tz_name, resolution_t, resolution_y)
+
+
+def get_time_grid(shop_api:ShopApi) -> TimeGrid:
+    return build_time_grid(shop_api.GetStartTime(), shop_api.GetEndTime(), shop_api.GetTimeUnit(),
+                           get_shop_timzone_name(shop_api), shop_api.GetTimeResolutionT(),
+                           shop_api.GetTimeResolutionY())
+
+
+# The calls that read the time grid, with results in the order of the arguments of build_time_grid
+TIME_GRID_CALLS = [('GetStartTime', ()), ('GetEndTime', ()), ('GetTimeUnit', ()), ('GetTimeZone', ()),
+                   ('GetTimeResolutionT', ()), ('GetTimeResolutionY', ())]
+
+
+def get_time_resolution_calls(starttime:pd.Timestamp, endtime:pd.Timestamp, timeunit:str,
+                              timeresolution:Optional[Union[pd.DataFrame,pd.Series]]=None) -> List[Tuple[str,Tuple]]:
+    # The calls that set the time resolution, see ShopSession.set_time_resolution
+    # Reformat timestamps to format expected by Shop
+    start_string = get_shop_timestring(starttime)
+    end_string = get_shop_timestring(endtime)
+    # Handle time resolution
+    # Constant
+    if not isinstance(timeresolution, pd.DataFrame) and not isinstance(timeresolution, pd.Series):
+        calls = [('SetTimeResolution', (start_string, end_string, timeunit))]
+    # Timestamp indexed
+    elif isinstance(timeresolution.index, pd.DatetimeIndex):
+        # Handle time horizon outside time resolution definition
+        if timeresolution.loc[starttime:starttime].empty:
+            timeresolution.loc[starttime] = np.nan
+            timeresolution.sort_index(inplace=True)
+            timeresolution.ffill(inplace=True)
+        timeresolution = timeresolution[starttime:endtime]
+        # Transform timestamp index to integer index expected by Shop
+        timeunit_delta = pd.Timedelta(hours=1) if timeunit == 'hour' else pd.Timedelta(minutes=1)
+        timeres_t = [int((t - starttime) / timeunit_delta) for t in timeresolution.index]
+        calls = [('SetTimeResolution', (start_string, end_string, timeunit, timeres_t, timeresolution.values))]
+    # Integer indexed
+    else:
+        timeres_t = timeresolution.index.values
+        calls = [('SetTimeResolution', (start_string, end_string, timeunit, timeres_t, timeresolution.values))]
+
+    # Save the time zone in the API so that it can be added to the output TXYs
+    tz_name = starttime.tzname()
+    if tz_name is not None:
+        calls.append(('SetTimeZone', (tz_name,)))
+    return calls
+
+
+def get_shop_timzone_name(shop_api:ShopApi) -> str:
+    try:
+        tz_name = shop_api.GetTimeZone()
+    except AttributeError:  # For backwards compatability to SHOP 13
+        tz_name = ""
+    return tz_name
+
+
+class TimeGridCache(object):
+    # Holds the time grid of a session between changes to the time resolution. The version is bumped every time the
+    # cache is invalidated, i.e. when the time resolution may have changed in the core
+
+    _shop_api:ShopApi
+    _time_grid:Optional[TimeGrid]
+    version:int
+
+    def __init__(self, shop_api:ShopApi) -> None:
+        self._shop_api = shop_api
+        self._time_grid = None
+        self.version = 0
+
+    def get(self) -> TimeGrid:
+        if self._time_grid is None:
+            self._time_grid = get_time_grid(self._shop_api)
+        return self._time_grid
+
+    def invalidate(self) -> None:
+        self._time_grid = None
+        self.version += 1
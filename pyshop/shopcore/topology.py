@@ -0,0 +1,216 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+
+from ..helpers.typing_annotations import ShopApi
+
+ObjectKey = Tuple[str, str]
+
+
+class RelationAdjacency(NamedTuple):
+    # Relations of one type in compressed sparse row form. The related objects of object i are
+    # neighbors[offsets[i]:offsets[i+1]], and logical is True for the relations that are logical rather than physical
+    offsets:np.ndarray
+    neighbors:np.ndarray
+    logical:np.ndarray
+
+
+def build_adjacency(n_objects:int, source:np.ndarray, target:np.ndarray, logical:np.ndarray) -> RelationAdjacency:
+    # A stable sort keeps the relations of each object in the order given by the core
+    order = np.argsort(source, kind='stable')
+    offsets = np.zeros(n_objects + 1, dtype=np.int64)
+    np.cumsum(np.bincount(source, minlength=n_objects), out=offsets[1:])
+    return RelationAdjacency(offsets, target[order], logical[order])
+
+
+class TopologyIndex(object):
+    """
+    All relations between the objects in the system, read from the core once. Objects are identified by their position
+    in the system, as in the relations returned by the core. For each relation type the output relations and the input
+    relations are stored as adjacency arrays. The input relations are the transpose of the output relations, since the
+    core lists logical relations in both directions. The relation category (physical or logical) is looked up once for
+    each pair of object types.
+    """
+
+    names:List[str]
+    types:List[str]
+    relation_types:List[str]
+    _positions:Dict[ObjectKey,int]
+    _valid_relation_types:Dict[str,List[str]]
+    _categories:Dict[Tuple[str,str],str]
+    _output:Dict[str,RelationAdjacency]
+    _input:Dict[str,RelationAdjacency]
+    _output_lists:Dict[str,Tuple[List[int],List[int],List[bool]]]
+    _input_lists:Dict[str,Tuple[List[int],List[int],List[bool]]]
+
+    def __init__(self, shop_api:ShopApi, names:Sequence[str], types:Sequence[str]) -> None:
+        self.names = list(names)
+        self.types = list(types)
+        self._positions = {key: i for i, key in enumerate(zip(self.types, self.names))}
+        self._valid_relation_types = {object_type: list(shop_api.GetValidRelationTypes(object_type))
+                                      for object_type in set(self.types)}
+        self._categories = {}
+
+        edges = {}
+        for position, (object_name, object_type) in enumerate(zip(self.names, self.types)):
+            for relation_type in self._valid_relation_types[object_type]:
+                related = shop_api.GetRelations(object_type, object_name, relation_type)
+                if len(related) > 0:
+                    sources, targets = edges.setdefault(relation_type, ([], []))
+                    sources.extend([position] * len(related))
+                    targets.extend(related)
+        self.relation_types = sorted(set(t for types in self._valid_relation_types.values() for t in types))
+
+        n_objects = len(self.names)
+        type_codes = {object_type: i for i, object_type in enumerate(sorted(self._valid_relation_types))}
+        type_ids = np.array([type_codes[t] for t in self.types], dtype=np.int64)
+        type_names = sorted(type_codes, key=type_codes.get)
+        self._output = {}
+        self._input = {}
+        for relation_type in self.relation_types:
+            sources, targets = edges.get(relation_type, ([], []))
+            source = np.asarray(sources, dtype=np.int64)
+            target = np.asarray(targets, dtype=np.int64)
+            # Look up the category of each distinct pair of object types among the relations
+            pair_codes = type_ids[source] * len(type_codes) + type_ids[target]
+            unique_codes, inverse = np.unique(pair_codes, return_inverse=True)
+            is_logical = np.array([
+                self._get_category(shop_api, type_names[code // len(type_codes)], type_names[code % len(type_codes)]) ==
+                'logical' for code in unique_codes
+            ], dtype=bool)
+            logical = is_logical[inverse.reshape(-1)] if source.size > 0 else np.zeros(0, dtype=bool)
+            self._output[relation_type] = build_adjacency(n_objects, source, target, logical)
+            self._input[relation_type] = build_adjacency(n_objects, target, source, logical)
+        # Lookups of the relations of single objects are faster on lists than on small slices of the arrays
+        self._output_lists = {t: tuple(a.tolist() for a in adjacency) for t, adjacency in self._output.items()}
+        self._input_lists = {t: tuple(a.tolist() for a in adjacency) for t, adjacency in self._input.items()}
+
+    def _get_category(self, shop_api:ShopApi, from_type:str, to_type:str) -> str:
+        key = (from_type, to_type)
+        if key not in self._categories:
+            self._categories[key] = shop_api.GetRelationInfo(from_type, to_type, 'relationCategory')
+        return self._categories[key]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def get_position(self, obj:Any) -> int:
+        # obj is either an (object_type, object_name) tuple or an object with get_type() and get_name()
+        key = obj if isinstance(obj, tuple) else (obj.get_type(), obj.get_name())
+        position = self._positions.get(key, None)
+        if position is None:
+            raise ValueError(f'Unknown object: "{key[1]}" ({key[0]})')
+        return position
+
+    def get_key(self, position:int) -> ObjectKey:
+        return self.types[position], self.names[position]
+
+    def get_valid_relation_types(self, object_type:str) -> List[str]:
+        return self._valid_relation_types.get(object_type, [])
+
+    def get_related(self, position:int, direction:str='output', relation_types:Optional[Sequence[str]]=None,
+                    relation_category:str='both') -> List[int]:
+        # The positions of the objects related to the object at the given position. Relations are listed per
+        # relation type, in the order of relation_types
+        adjacencies = self._output_lists if direction == 'output' else self._input_lists
+        if relation_types is None:
+            relation_types = self.get_valid_relation_types(self.types[position])
+        related = []
+        for relation_type in relation_types:
+            adjacency = adjacencies.get(relation_type, None)
+            if adjacency is None:
+                continue
+            offsets, neighbors, logical = adjacency
+            start, stop = offsets[position], offsets[position + 1]
+            if relation_category == 'both':
+                related.extend(neighbors[start:stop])
+            else:
+                is_logical = relation_category == 'logical'
+                related.extend(i for i, category in zip(neighbors[start:stop], logical[start:stop])
+                               if category == is_logical)
+        return related
+
+    def get_edges(self, relation_types:Optional[Sequence[str]]=None) -> Tuple[np.ndarray,np.ndarray,np.ndarray]:
+        # The source and target positions and the relation type index of all output relations
+        if relation_types is None:
+            relation_types = self.relation_types
+        sources, targets, kinds = [], [], []
+        for i, relation_type in enumerate(relation_types):
+            adjacency = self._output.get(relation_type, None)
+            if adjacency is None:
+                continue
+            sources.append(np.repeat(np.arange(len(self.names)), np.diff(adjacency.offsets)))
+            targets.append(adjacency.neighbors)
+            kinds.append(np.full(adjacency.neighbors.size, i, dtype=np.int64))
+        if not sources:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        return np.concatenate(sources), np.concatenate(targets), np.concatenate(kinds)
+
+    def get_relation_list(self, relation_types:Optional[Sequence[str]]=None
+                          ) -> Tuple[np.ndarray,np.ndarray,np.ndarray,np.ndarray]:
+        # Like get_edges, with a flag telling if each relation is logical. Logical relations are listed in both
+        # directions by the core, but are only included once here, from the object that comes first in the system
+        if relation_types is None:
+            relation_types = self.relation_types
+        sources, targets, kinds = self.get_edges(relation_types)
+        logical = [self._output[t].logical for t in relation_types if t in self._output]
+        logical = np.concatenate(logical) if logical else np.zeros(0, dtype=bool)
+        keep = ~logical | (sources < targets)
+        return sources[keep], targets[keep], kinds[keep], logical[keep]
+
+    def get_connected_components(self, shared_types:Optional[Iterable[str]]=None) -> Tuple[List[List[int]],List[int]]:
+        """
+        Split the objects of the system into groups that are not related to each other, e.g. hydraulically independent
+        watercourses. Objects of the shared types are left out of the components and returned separately, as they are
+        needed by all of them. By default the shared types are the types without any relations in the system, such as
+        global_settings and market. Both physical and logical relations join objects into the same component, since
+        logical relations couple the optimization of the objects. Returns the positions of the objects in each
+        component, ordered by their first object, and the positions of the shared objects.
+        """
+        sources, targets, _ = self.get_edges()
+        sources = sources.tolist()
+        targets = targets.tolist()
+        if shared_types is None:
+            related_types = set(self.types[i] for i in set(sources) | set(targets))
+            shared_types = set(self.types) - related_types
+        else:
+            shared_types = set(shared_types)
+
+        parents = list(range(len(self.names)))
+
+        def find(i:int) -> int:
+            while parents[i] != i:
+                parents[i] = parents[parents[i]]
+                i = parents[i]
+            return i
+
+        for source, target in zip(sources, targets):
+            if self.types[source] in shared_types or self.types[target] in shared_types:
+                continue
+            source_root, target_root = find(source), find(target)
+            if source_root != target_root:
+                parents[max(source_root, target_root)] = min(source_root, target_root)
+
+        components = {}
+        shared = []
+        for i, object_type in enumerate(self.types):
+            if object_type in shared_types:
+                shared.append(i)
+            else:
+                components.setdefault(find(i), []).append(i)
+        return list(components.values()), shared
+
+    def _get_keys(self, positions:List[int]) -> List[ObjectKey]:
+        return [(self.types[i], self.names[i]) for i in positions]
+
+    def downstream(self, obj:Any) -> List[ObjectKey]:
+        # The objects the given object is physically connected to, by any relation type
+        return self._get_keys(self.get_related(self.get_position(obj), 'output', relation_category='physical'))
+
+    def upstream(self, obj:Any) -> List[ObjectKey]:
+        return self._get_keys(self.get_related(self.get_position(obj), 'input', relation_category='physical'))
+
+    def units_of(self, plant:Any,
+                 unit_types:Sequence[str]=('generator', 'pump')) -> List[ObjectKey]:
+        related = self.get_related(self.get_position(plant), 'output', ['connection_standard'])
+        return [key for key in self._get_keys(related) if key[0] in unit_types]
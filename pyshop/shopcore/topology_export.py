@@ -0,0 +1,151 @@
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from xml.sax.saxutils import escape
+from graphviz import Digraph
+
+from ..helpers.typing_annotations import ShopApi
+from .topology import TopologyIndex
+
+# The object types drawn by build_graphviz, and the shape and fill color of their nodes
+NODE_TYPES = ['reservoir', 'plant', 'gate', 'junction', 'junction_gate', 'creek_intake', 'tunnel', 'river']
+UNIT_TYPES = ['generator', 'pump']
+NODE_STYLES = {
+    'plant': ('box', 'rosybrown1'),
+    'reservoir': ('invtriangle', 'skyblue'),
+    'junction': ('point', 'none'),
+    'junction_gate': ('point', 'none'),
+    'tunnel': ('box', 'gray83'),
+    'river': ('invtrapezium', 'lightsteelblue2'),
+}
+DRAWN_RELATION_TYPES = ['connection_standard', 'connection_spill', 'connection_bypass']
+
+
+def get_node_id(object_type:str, object_name:str) -> str:
+    return f'{object_type}_{object_name}'
+
+
+def get_neighbors(topology:TopologyIndex, position:int) -> List[int]:
+    # The objects related to an object in either direction
+    return topology.get_related(position, 'output') + topology.get_related(position, 'input')
+
+
+def select_objects(topology:TopologyIndex, root:Optional[Any]=None, depth:Optional[int]=None,
+                   watercourse:Optional[Any]=None) -> Optional[Set[int]]:
+    """
+    The positions of the objects to export, or None for all objects. watercourse selects the connected component of
+    the given object (an (object_type, object_name) tuple or an object), while root selects the objects within depth
+    relations from the given object in either direction, or its whole component if depth is None. Both can be given, in
+    which case the intersection is selected.
+    """
+    selected = None
+    if watercourse is not None:
+        position = topology.get_position(watercourse)
+        components, _ = topology.get_connected_components()
+        selected = next((set(c) for c in components if position in c), {position})
+    if root is not None:
+        position = topology.get_position(root)
+        reached = {position}
+        frontier = [position]
+        level = 0
+        while frontier and (depth is None or level < depth):
+            next_frontier = []
+            for i in frontier:
+                for j in get_neighbors(topology, i):
+                    if j not in reached:
+                        reached.add(j)
+                        next_frontier.append(j)
+            frontier = next_frontier
+            level += 1
+        selected = reached if selected is None else selected & reached
+    return selected
+
+
+def get_relations(topology:TopologyIndex, selected:Optional[Set[int]]=None,
+                  relation_types:Optional[Sequence[str]]=None) -> List[Tuple[int,int,str,str]]:
+    # (source, target, relation type, category) of the relations between the selected objects, grouped by source
+    if relation_types is None:
+        relation_types = topology.relation_types
+    sources, targets, kinds, logical = topology.get_relation_list(relation_types)
+    relations = []
+    for source, target, kind, is_logical in zip(sources.tolist(), targets.tolist(), kinds.tolist(), logical.tolist()):
+        if selected is None or (source in selected and target in selected):
+            relations.append((source, target, relation_types[kind], 'logical' if is_logical else 'physical'))
+    relations.sort(key=lambda relation: relation[0])
+    return relations
+
+
+def build_graphviz(shop_api:ShopApi, topology:TopologyIndex, selected:Optional[Set[int]]=None,
+                   display_units:bool=False) -> Digraph:
+    # Reservoirs in the same network are placed on the same rank. The style of each edge is given as attributes of the
+    # edge itself, so the size of the DOT source is linear in the number of edges
+    dot = Digraph(comment='SHOP topology')
+    subgraphs = {}
+    drawn_types = NODE_TYPES + UNIT_TYPES if display_units else NODE_TYPES
+    positions = range(len(topology)) if selected is None else sorted(selected)
+    for i in positions:
+        object_type, name = topology.get_key(i)
+        if object_type not in NODE_TYPES:
+            continue
+        shape, bgcolor = NODE_STYLES.get(object_type, ('ellipse', 'none'))
+        node_id = get_node_id(object_type, name)
+        dot.node(node_id, label=name, shape=shape, style='filled', fillcolor=bgcolor)
+        if object_type == 'reservoir' and shop_api.GetIntValue(object_type, name, 'added_to_network'):
+            network_no = shop_api.GetIntValue(object_type, name, 'network_no')
+            if network_no not in subgraphs:
+                subgraphs[network_no] = Digraph(comment='Network')
+                subgraphs[network_no].attr(rank='same')
+            subgraphs[network_no].node(node_id, label=name, shape=shape, style='filled', fillcolor=bgcolor)
+
+    units = set()
+    for source, target, relation_type, _ in get_relations(topology, selected, DRAWN_RELATION_TYPES):
+        source_type, source_name = topology.get_key(source)
+        target_type, target_name = topology.get_key(target)
+        if source_type not in NODE_TYPES or target_type not in drawn_types:
+            continue
+        for object_type, name in [(source_type, source_name), (target_type, target_name)]:
+            if object_type in UNIT_TYPES and (object_type, name) not in units:
+                units.add((object_type, name))
+                dot.node(get_node_id(object_type, name), label=name)
+        if (source_type == 'gate' or target_type == 'gate') and relation_type != 'connection_standard':
+            edge_style = dict(style='dashed')
+        else:
+            edge_style = dict(style='solid', arrowtail='none', arrowhead='none')
+        dot.edge(get_node_id(source_type, source_name), get_node_id(target_type, target_name), **edge_style)
+    for subgraph in subgraphs.values():
+        dot.subgraph(subgraph)
+    return dot
+
+
+def to_adjacency_dict(topology:TopologyIndex, selected:Optional[Set[int]]=None,
+                      relation_types:Optional[Sequence[str]]=None) -> Dict[str,List[Dict[str,Any]]]:
+    # A JSON friendly description of the objects and relations. Relations refer to the objects by their id, which is
+    # the position of the object in the system
+    positions = range(len(topology)) if selected is None else sorted(selected)
+    return dict(
+        nodes=[dict(id=i, type=topology.types[i], name=topology.names[i]) for i in positions],
+        edges=[dict(source=source, target=target, relation_type=relation_type, category=category)
+               for source, target, relation_type, category in get_relations(topology, selected, relation_types)],
+    )
+
+
+def to_graphml(topology:TopologyIndex, selected:Optional[Set[int]]=None,
+               relation_types:Optional[Sequence[str]]=None) -> str:
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">',
+        '  <key id="type" for="node" attr.name="type" attr.type="string"/>',
+        '  <key id="name" for="node" attr.name="name" attr.type="string"/>',
+        '  <key id="relation_type" for="edge" attr.name="relation_type" attr.type="string"/>',
+        '  <key id="category" for="edge" attr.name="category" attr.type="string"/>',
+        '  <graph id="topology" edgedefault="directed">',
+    ]
+    positions = range(len(topology)) if selected is None else sorted(selected)
+    for i in positions:
+        object_type, name = topology.get_key(i)
+        lines.append(f'    <node id="n{i}"><data key="type">{escape(object_type)}</data>'
+                     f'<data key="name">{escape(name)}</data></node>')
+    for source, target, relation_type, category in get_relations(topology, selected, relation_types):
+        lines.append(f'    <edge source="n{source}" target="n{target}">'
+                     f'<data key="relation_type">{relation_type}</data><data key="category">{category}</data></edge>')
+    lines += ['  </graph>', '</graphml>', '']
+    return '\n'.join(lines)
+
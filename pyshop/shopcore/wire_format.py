@@ -0,0 +1,90 @@
+import json
+import struct
+from typing import Any, List, Union
+import numpy as np
+import pandas as pd
+
+# The binary payload of the REST protocol. A payload is
+#
+#   MAGIC | header length (uint32, little endian) | header (JSON) | padding | array buffers
+#
+# The header holds the value with every numeric array replaced by {"__array__": i}, and a list of [dtype, shape, offset]
+# for the arrays. The buffers are the raw little-endian bytes of the arrays, each starting at a multiple of 8 bytes
+# after the end of the padded header, so that they can be decoded with np.frombuffer without copying
+BINARY_CONTENT_TYPE = 'application/x-pyshop-binary'
+MAGIC = b'PSB1'
+_ALIGNMENT = 8
+_ARRAY_KEY = '__array__'
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def _padding(length:int) -> int:
+    return -length % _ALIGNMENT
+
+
+def _to_skeleton(value:Any, arrays:List[np.ndarray]) -> Any:
+    # Replace the arrays in value by placeholders, and convert the other values to what json can serialize
+    if isinstance(value, pd.Index):
+        value = value.to_numpy()
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind not in 'biufcmM':
+            return value.tolist()
+        if value.dtype.byteorder == '>':
+            value = value.astype(value.dtype.newbyteorder('<'))
+        arrays.append(np.require(value, requirements='C'))
+        return {_ARRAY_KEY: len(arrays) - 1}
+    if isinstance(value, (list, tuple)):
+        return [_to_skeleton(item, arrays) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_skeleton(item, arrays) for key, item in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def encode(value:Any) -> bytes:
+    # Encode a value made of dicts, lists, tuples, json scalars and numpy arrays. Tuples are decoded as lists, and
+    # arrays of strings or objects are sent as lists
+    arrays:List[np.ndarray] = []
+    skeleton = _to_skeleton(value, arrays)
+    array_info = []
+    offset = 0
+    for a in arrays:
+        array_info.append([a.dtype.str, list(a.shape), offset])
+        offset += a.nbytes + _padding(a.nbytes)
+    header = json.dumps(dict(value=skeleton, arrays=array_info)).encode()
+    parts = [MAGIC, struct.pack('<I', len(header)), header, b'\0' * _padding(len(MAGIC) + 4 + len(header))]
+    for a in arrays:
+        parts.append(a.reshape(-1).view(np.uint8))
+        parts.append(b'\0' * _padding(a.nbytes))
+    return b''.join(parts)
+
+
+def _from_skeleton(value:Any, arrays:List[np.ndarray]) -> Any:
+    if isinstance(value, list):
+        return [_from_skeleton(item, arrays) for item in value]
+    if isinstance(value, dict):
+        if len(value) == 1 and _ARRAY_KEY in value:
+            return arrays[value[_ARRAY_KEY]]
+        return {key: _from_skeleton(item, arrays) for key, item in value.items()}
+    return value
+
+
+def decode(payload:Buffer) -> Any:
+    # The arrays share memory with payload, and are only writable if payload is, e.g. a bytearray
+    payload = memoryview(payload)
+    if payload[:len(MAGIC)] != MAGIC:
+        raise ValueError('The payload is not in the binary wire format')
+    header_length, = struct.unpack_from('<I', payload, len(MAGIC))
+    header_end = len(MAGIC) + 4 + header_length
+    header = json.loads(bytes(payload[len(MAGIC) + 4:header_end]))
+    data_start = header_end + _padding(header_end)
+    arrays = []
+    for dtype_str, shape, offset in header['arrays']:
+        dtype = np.dtype(dtype_str)
+        count = int(np.prod(shape))
+        a = np.frombuffer(payload, dtype=dtype, count=count, offset=data_start + offset)
+        arrays.append(a.reshape(tuple(shape)))
+    return _from_skeleton(header['value'], arrays)
+
@@ -0,0 +1,414 @@
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+import time
+
+import numpy as np
+
+# In-memory stand-in for shop_pybind.ShopCore. It implements the subset of the core API used by pyshop, and is used by
+# the tests and benchmarks to exercise the python layer with large models without the SHOP binaries. Output TXYs are
+# filled with deterministic values when "start sim" is executed.
+
+# (attribute name, datatype, is input)
+OBJECT_TYPES = {
+    'global_settings': [
+        ('n_scenarios', 'int', True),
+        ('time_delay_unit', 'string', True),
+    ],
+    'reservoir': [
+        ('lrl', 'double', True),
+        ('hrl', 'double', True),
+        ('max_vol', 'double', True),
+        ('start_head', 'double', True),
+        ('network_no', 'int', True),
+        ('added_to_network', 'int', True),
+        ('vol_head', 'xy', True),
+        ('flow_descr', 'xy', True),
+        ('inflow', 'txy', True),
+        ('storage', 'txy', False),
+        ('head', 'txy', False),
+    ],
+    'plant': [
+        ('outlet_line', 'double', True),
+        ('main_loss', 'double_array', True),
+        ('penstock_loss', 'double_array', True),
+        ('num_gen', 'int', False),
+        ('production', 'txy', False),
+        ('discharge', 'txy', False),
+    ],
+    'generator': [
+        ('penstock', 'int', True),
+        ('p_min', 'double', True),
+        ('p_max', 'double', True),
+        ('p_nom', 'double', True),
+        ('startcost', 'txy', True),
+        ('gen_eff_curve', 'xy', True),
+        ('turb_eff_curves', 'xy_array', True),
+        ('production', 'txy', False),
+        ('discharge', 'txy', False),
+    ],
+    'pump': [
+        ('p_max', 'double', True),
+        ('consumption', 'txy', False),
+    ],
+    'gate': [
+        ('max_discharge', 'txy', True),
+        ('discharge', 'txy', False),
+    ],
+    'junction': [
+        ('altitude', 'double', True),
+        ('tunnel_flow_1', 'txy', False),
+    ],
+    'tunnel': [
+        ('loss_factor', 'double', True),
+        ('gate_opening_curve', 'xy', True),
+        ('flow', 'txy', False),
+    ],
+    'river': [
+        ('length', 'double', True),
+        ('flow', 'txy', False),
+    ],
+    'creek_intake': [
+        ('net_head', 'double', True),
+        ('inflow', 'txy', True),
+    ],
+    'market': [
+        ('market_type', 'string', True),
+        ('sale_price', 'txy', True),
+        ('buy_price', 'txy', True),
+        ('max_sale', 'txy', True),
+        ('load', 'txy', True),
+        ('sale', 'txy', False),
+    ],
+    'contract': [
+        ('initial_trade', 'double', True),
+        ('trade', 'txy', False),
+    ],
+    'discharge_group': [
+        ('weighted_discharge_m3s', 'txy', False),
+    ],
+    'unit_combination': [
+        ('discharge', 'txy', False),
+    ],
+}
+
+HYDRO_TYPES = ['reservoir', 'plant', 'generator', 'pump', 'gate', 'junction', 'junction_gate', 'tunnel', 'river',
+               'creek_intake', 'needle_combination', 'unit_combination']
+RELATION_TYPES = ['connection_standard', 'connection_spill', 'connection_bypass']
+COMMANDS = ['start sim', 'start shopsim', 'set time_delay_unit', 'set nseg', 'set code', 'print model', 'penalty flag',
+            'set max_num_threads']
+
+DEFAULT_VALUES = {
+    'int': 0,
+    'double': 0.0,
+    'string': '',
+    'int_array': [],
+    'double_array': [],
+    'string_array': [],
+}
+
+
+class MockShopCore(object):
+
+    object_types:Dict[str,List[Tuple[str,str,bool]]]
+    calls:Counter
+    call_latency:float
+    n_scenarios:int
+
+    def __init__(self, object_types:Dict[str,List[Tuple[str,str,bool]]]=None, call_latency:float=0.0,
+                 n_scenarios:int=1) -> None:
+        self.object_types = OBJECT_TYPES if object_types is None else object_types
+        self.calls = Counter()
+        self.call_latency = call_latency
+        self.n_scenarios = n_scenarios
+        self._names = []
+        self._types = []
+        self._index = {}
+        self._values = {}
+        self._relations = {}
+        self._input_relations = {}
+        self._update_needed = False
+        self._executed_commands = []
+        self._start = '20220101000000'
+        self._end = '20220102000000'
+        self._time_unit = 'hour'
+        self._time_resolution_t = [0]
+        self._time_resolution_y = [1.0]
+        self._time_zone = ''
+        self._attribute_info = {
+            object_type: {name: (datatype, is_input) for name, datatype, is_input in attributes}
+            for object_type, attributes in self.object_types.items()
+        }
+
+    def __getattribute__(self, name:str) -> Any:
+        # Count every call to the public core API, and optionally simulate the round trip latency of a remote core
+        if name[0].isupper():
+            object.__getattribute__(self, 'calls')[name] += 1
+            latency = object.__getattribute__(self, 'call_latency')
+            if latency:
+                time.sleep(latency)
+        return object.__getattribute__(self, name)
+
+    # Objects
+
+    def GetObjectTypeNames(self) -> List[str]:
+        return list(self.object_types.keys())
+
+    def GetObjectInfo(self, object_type:str, key:str) -> Any:
+        if key == 'isInput':
+            return True
+        return ''
+
+    def GetValidObjectInfoKeys(self) -> List[str]:
+        return ['isInput']
+
+    def AddObject(self, object_type:str, object_name:str) -> None:
+        if object_type not in self.object_types or (object_type, object_name) in self._index:
+            return
+        self._index[(object_type, object_name)] = len(self._names)
+        self._names.append(object_name)
+        self._types.append(object_type)
+        self._update_needed = True
+
+    def UpdateNeeded(self) -> bool:
+        update_needed = self._update_needed
+        self._update_needed = False
+        return update_needed
+
+    def GetObjectNamesInSystem(self) -> List[str]:
+        return list(self._names)
+
+    def GetObjectTypesInSystem(self) -> List[str]:
+        return list(self._types)
+
+    def GetObjectTypeAttributeNames(self, object_type:str) -> List[str]:
+        return [a[0] for a in self.object_types[object_type]]
+
+    def GetObjectTypeAttributeDatatypes(self, object_type:str) -> List[str]:
+        return [a[1] for a in self.object_types[object_type]]
+
+    def GetValidAttributeInfoKeys(self) -> List[str]:
+        return ['datatype', 'isInput', 'licenseName', 'description']
+
+    def GetAttributeInfo(self, object_type:str, attribute_name:str, key:str) -> str:
+        datatype, is_input = self._attribute_info[object_type][attribute_name]
+        if key == 'datatype':
+            return datatype
+        elif key == 'isInput':
+            return str(is_input)
+        return ''
+
+    def AttributeIsDefault(self, object_type:str, object_name:str, attribute_name:str) -> bool:
+        return (object_type, object_name, attribute_name) not in self._values
+
+    # Time
+
+    def SetTimeResolution(self, start:str, end:str, time_unit:str, t:List[int]=None, y:List[float]=None) -> None:
+        self._start = start
+        self._end = end
+        self._time_unit = time_unit
+        self._time_resolution_t = [0] if t is None else [int(v) for v in t]
+        self._time_resolution_y = [1.0] if y is None else [float(v) for v in y]
+
+    def SetTimeZone(self, tz_name:str) -> None:
+        self._time_zone = tz_name
+
+    def GetTimeZone(self) -> str:
+        return self._time_zone
+
+    def GetStartTime(self) -> str:
+        return self._start
+
+    def GetEndTime(self) -> str:
+        return self._end
+
+    def GetTimeUnit(self) -> str:
+        return self._time_unit
+
+    def GetTimeResolutionT(self) -> List[int]:
+        return list(self._time_resolution_t)
+
+    def GetTimeResolutionY(self) -> List[float]:
+        return list(self._time_resolution_y)
+
+    # Attributes
+
+    def _get(self, object_type:str, object_name:str, attribute_name:str, default:Any) -> Any:
+        return self._values.get((object_type, object_name, attribute_name), default)
+
+    def _set(self, object_type:str, object_name:str, attribute_name:str, value:Any) -> None:
+        if (object_type, object_name) not in self._index:
+            raise ValueError(f'Unknown object: {object_type} {object_name}')
+        self._values[(object_type, object_name, attribute_name)] = value
+
+    def GetIntValue(self, object_type:str, object_name:str, attribute_name:str) -> int:
+        return self._get(object_type, object_name, attribute_name, 0)
+
+    def GetDoubleValue(self, object_type:str, object_name:str, attribute_name:str) -> float:
+        return self._get(object_type, object_name, attribute_name, 0.0)
+
+    def GetStringValue(self, object_type:str, object_name:str, attribute_name:str) -> str:
+        return self._get(object_type, object_name, attribute_name, '')
+
+    def GetIntArray(self, object_type:str, object_name:str, attribute_name:str) -> List[int]:
+        return list(self._get(object_type, object_name, attribute_name, []))
+
+    def GetDoubleArray(self, object_type:str, object_name:str, attribute_name:str) -> List[float]:
+        return list(self._get(object_type, object_name, attribute_name, []))
+
+    def GetStringArray(self, object_type:str, object_name:str, attribute_name:str) -> List[str]:
+        return list(self._get(object_type, object_name, attribute_name, []))
+
+    def SetIntValue(self, object_type:str, object_name:str, attribute_name:str, value:int) -> None:
+        self._set(object_type, object_name, attribute_name, int(value))
+
+    def SetDoubleValue(self, object_type:str, object_name:str, attribute_name:str, value:float) -> None:
+        self._set(object_type, object_name, attribute_name, float(value))
+
+    def SetStringValue(self, object_type:str, object_name:str, attribute_name:str, value:str) -> None:
+        self._set(object_type, object_name, attribute_name, str(value))
+
+    def SetIntArray(self, object_type:str, object_name:str, attribute_name:str, value:List[int]) -> None:
+        self._set(object_type, object_name, attribute_name, [int(v) for v in value])
+
+    def SetDoubleArray(self, object_type:str, object_name:str, attribute_name:str, value:List[float]) -> None:
+        self._set(object_type, object_name, attribute_name, [float(v) for v in value])
+
+    def SetStringArray(self, object_type:str, object_name:str, attribute_name:str, value:List[str]) -> None:
+        self._set(object_type, object_name, attribute_name, [str(v) for v in value])
+
+    def GetXyCurveReference(self, object_type:str, object_name:str, attribute_name:str) -> float:
+        return self._get(object_type, object_name, attribute_name, (0.0, [], []))[0]
+
+    def GetXyCurveX(self, object_type:str, object_name:str, attribute_name:str) -> List[float]:
+        return list(self._get(object_type, object_name, attribute_name, (0.0, [], []))[1])
+
+    def GetXyCurveY(self, object_type:str, object_name:str, attribute_name:str) -> List[float]:
+        return list(self._get(object_type, object_name, attribute_name, (0.0, [], []))[2])
+
+    def SetXyCurve(self, object_type:str, object_name:str, attribute_name:str, ref:float, x:List[float],
+                   y:List[float]) -> None:
+        self._set(object_type, object_name, attribute_name, (float(ref), [float(v) for v in x], [float(v) for v in y]))
+
+    def GetSyCurveS(self, object_type:str, object_name:str, attribute_name:str) -> List[str]:
+        return list(self._get(object_type, object_name, attribute_name, ([], []))[0])
+
+    def GetSyCurveY(self, object_type:str, object_name:str, attribute_name:str) -> List[float]:
+        return list(self._get(object_type, object_name, attribute_name, ([], []))[1])
+
+    def SetSyCurve(self, object_type:str, object_name:str, attribute_name:str, s:List[str], y:List[float]) -> None:
+        self._set(object_type, object_name, attribute_name, ([str(v) for v in s], [float(v) for v in y]))
+
+    def GetXyCurveArrayReferences(self, object_type:str, object_name:str, attribute_name:str) -> List[float]:
+        return list(self._get(object_type, object_name, attribute_name, ([], [], [], []))[0])
+
+    def GetXyCurveArrayNPoints(self, object_type:str, object_name:str, attribute_name:str) -> List[int]:
+        return list(self._get(object_type, object_name, attribute_name, ([], [], [], []))[1])
+
+    def GetXyCurveArrayX(self, object_type:str, object_name:str, attribute_name:str) -> List[float]:
+        return list(self._get(object_type, object_name, attribute_name, ([], [], [], []))[2])
+
+    def GetXyCurveArrayY(self, object_type:str, object_name:str, attribute_name:str) -> List[float]:
+        return list(self._get(object_type, object_name, attribute_name, ([], [], [], []))[3])
+
+    def SetXyCurveArray(self, object_type:str, object_name:str, attribute_name:str, ref:List[float], n:List[int],
+                        x:List[float], y:List[float]) -> None:
+        self._set(object_type, object_name, attribute_name, ([float(v) for v in ref], [int(v) for v in n],
+                                                             [float(v) for v in x], [float(v) for v in y]))
+
+    def GetXyTCurveTimeStrings(self, object_type:str, object_name:str, attribute_name:str) -> List[str]:
+        return list(self._get(object_type, object_name, attribute_name, ([], [], [], []))[0])
+
+    def GetXyTCurveN(self, object_type:str, object_name:str, attribute_name:str, start:str, end:str) -> List[int]:
+        return list(self._get(object_type, object_name, attribute_name, ([], [], [], []))[1])
+
+    def GetXyTCurveX(self, object_type:str, object_name:str, attribute_name:str, start:str, end:str) -> List[float]:
+        return list(self._get(object_type, object_name, attribute_name, ([], [], [], []))[2])
+
+    def GetXyTCurveY(self, object_type:str, object_name:str, attribute_name:str, start:str, end:str) -> List[float]:
+        return list(self._get(object_type, object_name, attribute_name, ([], [], [], []))[3])
+
+    def SetXyTCurve(self, object_type:str, object_name:str, attribute_name:str, times:List[str], n:List[int],
+                    x:List[float], y:List[float]) -> None:
+        self._set(object_type, object_name, attribute_name, ([str(v) for v in times], [int(v) for v in n],
+                                                             [float(v) for v in x], [float(v) for v in y]))
+
+    def GetTxySeriesStartTime(self, object_type:str, object_name:str, attribute_name:str) -> str:
+        return self._get(object_type, object_name, attribute_name, ('', [], []))[0]
+
+    def GetTxySeriesT(self, object_type:str, object_name:str, attribute_name:str) -> List[int]:
+        return list(self._get(object_type, object_name, attribute_name, ('', [], []))[1])
+
+    def GetTxySeriesY(self, object_type:str, object_name:str, attribute_name:str) -> List[Any]:
+        return list(self._get(object_type, object_name, attribute_name, ('', [], []))[2])
+
+    def SetTxySeries(self, object_type:str, object_name:str, attribute_name:str, start:str, t:List[int],
+                     y:List[Any]) -> None:
+        y = np.asarray(y, dtype=float).tolist()
+        self._set(object_type, object_name, attribute_name, (start, [int(v) for v in t], y))
+
+    # Relations
+
+    def GetValidRelationTypes(self, object_type:str) -> List[str]:
+        return list(RELATION_TYPES)
+
+    def GetDefaultRelationType(self, from_type:str, to_type:str) -> str:
+        return 'connection_standard'
+
+    def GetRelationInfo(self, from_type:str, to_type:str, key:str) -> str:
+        if from_type in HYDRO_TYPES and to_type in HYDRO_TYPES:
+            return 'physical'
+        return 'logical'
+
+    def AddRelation(self, from_type:str, from_name:str, relation_type:str, to_type:str, to_name:str) -> None:
+        from_index = self._index[(from_type, from_name)]
+        to_index = self._index[(to_type, to_name)]
+        self._relations.setdefault((from_index, relation_type), []).append(to_index)
+        self._input_relations.setdefault((to_index, relation_type), []).append(from_index)
+        if self.GetRelationInfo(from_type, to_type, 'relationCategory') == 'logical':
+            self._relations.setdefault((to_index, relation_type), []).append(from_index)
+            self._input_relations.setdefault((from_index, relation_type), []).append(to_index)
+
+    def GetRelations(self, object_type:str, object_name:str, relation_type:str) -> List[int]:
+        return list(self._relations.get((self._index[(object_type, object_name)], relation_type), []))
+
+    def GetInputRelations(self, object_type:str, object_name:str, relation_type:str) -> List[int]:
+        return list(self._input_relations.get((self._index[(object_type, object_name)], relation_type), []))
+
+    # Commands
+
+    def GetCommandTypesInSystem(self) -> List[str]:
+        return list(COMMANDS)
+
+    def ExecuteCommand(self, command:str, options:List[str], values:List[str]) -> bool:
+        self._executed_commands.append(' '.join([command] + ['/' + o for o in options] + values))
+        if command == 'start sim':
+            self._fill_results()
+        return True
+
+    def GetExecutedCommands(self) -> List[str]:
+        return list(self._executed_commands)
+
+    def GetMessages(self) -> str:
+        return '[]'
+
+    def GetVersionString(self) -> str:
+        return '15.0.0.0 mock'
+
+    def _n_time_steps(self) -> int:
+        start = np.datetime64(f'{self._start[:4]}-{self._start[4:6]}-{self._start[6:8]}T{self._start[8:10] or "00"}')
+        end = np.datetime64(f'{self._end[:4]}-{self._end[4:6]}-{self._end[6:8]}T{self._end[8:10] or "00"}')
+        unit = {'hour': 'h', 'minute': 'm', 'second': 's'}[self._time_unit]
+        return int((end - start) / np.timedelta64(1, unit))
+
+    def _fill_results(self) -> None:
+        # Give every output TXY of every object a deterministic result on the full time horizon
+        n = self._n_time_steps()
+        t = list(range(n))
+        for i, (object_name, object_type) in enumerate(zip(self._names, self._types)):
+            for attribute_name, datatype, is_input in self.object_types[object_type]:
+                if datatype != 'txy' or is_input:
+                    continue
+                y = np.arange(n, dtype=float) + i
+                if self.n_scenarios > 1:
+                    y = np.column_stack([y + s for s in range(self.n_scenarios)])
+                self._values[(object_type, object_name, attribute_name)] = (self._start, t, y.tolist())
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyshop.shopcore.datatype_codecs import get_codec
+from pyshop.shopcore.input_mirror import InputMirror
+from pyshop.shopcore.model_builder import ModelBuilderType
+from pyshop.shopcore.result_cache import ResultCache
+
+from .mock_core import MockShopCore
+
+
+class BatchingCore(MockShopCore):
+    # A core that, like the REST client, can execute several calls in one round trip
+
+    def call_many(self, calls):
+        self.calls['call_many'] += 1
+        return [getattr(self, name)(*args) for name, args in calls]
+
+
+def get_model(core=None, input_mirror=None):
+    core = MockShopCore() if core is None else core
+    model = ModelBuilderType(core, result_cache=ResultCache(), input_mirror=input_mirror)
+    for i in range(3):
+        model.reservoir.add_object(f'R{i}')
+    return core, model
+
+
+def test_writes_are_queued_and_coalesced():
+    core, model = get_model()
+    index = pd.date_range(model.get_time_grid().starttime, periods=3, freq='H')
+    core.calls.clear()
+    with model.batch():
+        for i in range(3):
+            model.reservoir[f'R{i}'].max_vol.set(10.0)
+            model.reservoir[f'R{i}'].inflow.set(pd.Series([1.0, 2.0, 3.0], index=index))
+            model.reservoir[f'R{i}'].max_vol.set(20.0 + i)
+        assert core.calls['SetDoubleValue'] == 0
+    assert core.calls['SetDoubleValue'] == 3
+    assert core.calls['SetTxySeries'] == 3
+    assert [model.reservoir[f'R{i}'].max_vol.get() for i in range(3)] == [20.0, 21.0, 22.0]
+
+
+def test_pending_values_are_read_back():
+    core, model = get_model()
+    with model.batch():
+        model.reservoir.R0.max_vol.set(5.0)
+        with model.batch():
+            model.reservoir.R1.max_vol.set(6.0)
+        assert core.calls['SetDoubleValue'] == 0
+        assert model.reservoir.R0.max_vol.get() == 5.0
+        assert core.calls['SetDoubleValue'] == 2
+        model.reservoir.R2.max_vol.set(7.0)
+    assert model.reservoir.get_attribute('max_vol').tolist() == [5.0, 6.0, 7.0]
+
+
+def test_queue_is_discarded_when_the_block_raises():
+    core, model = get_model()
+    with pytest.raises(ValueError):
+        with model.batch():
+            model.reservoir.R0.max_vol.set(5.0)
+            assert model.reservoir.R0.max_vol.get() == 5.0
+            model.reservoir.R1.max_vol.set(6.0)
+            raise ValueError('Aborted')
+    assert model.reservoir.get_attribute('max_vol').tolist() == [5.0, 0.0, 0.0]
+    assert not model.is_pending('reservoir', 'R1', 'max_vol')
+    model.reservoir.R1.max_vol.set(7.0)
+    assert core.GetDoubleValue('reservoir', 'R1', 'max_vol') == 7.0
+
+
+def test_single_round_trip_and_mirror():
+    core, model = get_model(BatchingCore(), InputMirror())
+    model.reservoir.R0.max_vol.set(5.0)
+    core.ExecuteCommand('start sim', [], [])
+    model.reservoir.R0.storage.get()
+    core.calls.clear()
+    with model.batch():
+        for i in range(3):
+            model.reservoir[f'R{i}'].max_vol.set(5.0)
+    assert core.calls['call_many'] == 1
+    assert core.calls['SetDoubleValue'] == 2
+    assert model.changed_since(1) == [('reservoir', 'R1', 'max_vol'), ('reservoir', 'R2', 'max_vol')]
+    assert len(model.get_result_cache()) == 0
+
+
+def test_shared_index_fit_matches_set_calls():
+    core, model = get_model()
+    time_grid = model.get_time_grid()
+    codec = get_codec('txy')
+    for start in [time_grid.starttime, time_grid.starttime - pd.Timedelta(hours=2)]:
+        index = pd.date_range(start, periods=30, freq='H')
+        values = [pd.Series(np.arange(30.0) + i, index=index) for i in range(2)]
+        values.append(pd.DataFrame(np.arange(60.0).reshape(30, 2), index=index))
+        writes = [('reservoir', f'R{i}', 'inflow', value) for i, value in enumerate(values)]
+        for calls, write in zip(codec.set_calls_many(writes, time_grid), writes):
+            expected = codec.set_calls(*write[:3], write[3].copy(), time_grid)
+            assert calls[0][1][3] == expected[0][1][3]
+            np.testing.assert_array_equal(calls[0][1][4], expected[0][1][4])
+            np.testing.assert_array_equal(calls[0][1][5], expected[0][1][5])
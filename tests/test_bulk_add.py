@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyshop.shopcore.model_builder import ModelBuilderType
+
+from .mock_core import MockShopCore
+
+
+def get_generators(n):
+    return pd.DataFrame({
+        'penstock': [1] * n,
+        'p_min': [10.0 * i for i in range(n)],
+        'p_max': [np.nan] + [100.0] * (n - 1),
+        'startcost': [500.0] * n,
+        'gen_eff_curve': [pd.Series([95.0, 98.0], index=[10.0, 100.0], name=0.0)] * n,
+    }, index=[f'G{i}' for i in range(n)])
+
+
+def test_bulk_add():
+    core = MockShopCore()
+    model = ModelBuilderType(core)
+    model.plant.add_object('P1')
+    core.calls.clear()
+    generators = model.generator.bulk_add(get_generators(100))
+
+    assert core.calls['AddObject'] == 100
+    assert core.calls['GetObjectNamesInSystem'] == 1
+    assert [g.get_name() for g in generators] == model.generator.get_object_names()
+    assert generators[0] is model.generator.G0
+    assert model.generator.G3.penstock.get() == 1
+    assert model.generator.G3.p_min.get() == 30.0
+    # Missing values are not set
+    assert core.AttributeIsDefault('generator', 'G0', 'p_max')
+    assert model.generator.G1.p_max.get() == 100.0
+    assert model.generator.G2.startcost.get().iloc[0] == 500.0
+    assert model.generator.G2.gen_eff_curve.get().tolist() == [95.0, 98.0]
+
+
+def test_bulk_add_validates_before_adding():
+    core = MockShopCore()
+    model = ModelBuilderType(core)
+    with pytest.raises(ValueError):
+        model.generator.bulk_add(pd.DataFrame({'unknown': [1.0]}, index=['G1']))
+    with pytest.raises(ValueError):
+        model.generator.bulk_add(pd.DataFrame({'p_max': [1.0, 2.0]}, index=['G1', 'G1']))
+    assert model.generator.get_object_names() == []
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from pyshop.shopcore.model_builder import ModelBuilderType
+
+from .mock_core import MockShopCore
+
+
+def get_model():
+    core = MockShopCore()
+    model = ModelBuilderType(core)
+    model.discharge_group.add_object('D1')
+    for i in range(10):
+        model.reservoir.add_object(f'R{i}')
+        model.plant.add_object(f'P{i}')
+        model.gate.add_object(f'S{i}')
+    return core, model
+
+
+def get_edges():
+    edges = []
+    for i in range(9):
+        edges.append(('reservoir', f'R{i}', 'plant', f'P{i}', ''))
+        edges.append(('plant', f'P{i}', 'reservoir', f'R{i + 1}', 'standard'))
+        edges.append(('reservoir', f'R{i}', 'gate', f'S{i}', 'spill'))
+    edges.append(('reservoir', 'R0', 'discharge_group', 'D1', None))
+    return edges
+
+
+def test_connect_many():
+    core, model = get_model()
+    core.calls.clear()
+    assert model.connect_many(get_edges()) == 28
+    # The default relation type is looked up once per pair of object types
+    assert core.calls['GetDefaultRelationType'] == 2
+    assert core.calls['GetObjectNamesInSystem'] == 0
+    assert model.get_topology().downstream(('reservoir', 'R3')) == [('plant', 'P3'), ('gate', 'S3')]
+
+
+def test_connect_many_validates_objects():
+    core, model = get_model()
+    with pytest.raises(ValueError):
+        model.connect_many([('reservoir', 'R0', 'plant', 'P0'), ('reservoir', 'R0', 'plant', 'unknown')])
+    with pytest.raises(ValueError):
+        model.connect_many([('reservoir', 'R0', 'plant', 'P0', 'overflow')])
+    assert core.calls['AddRelation'] == 0
+
+
+def test_connect_many_requires_edge_columns():
+    core, model = get_model()
+    edges = pd.DataFrame([('R0', 'plant', 'P0')], columns=['from_name', 'to_type', 'to_name'])
+    with pytest.raises(ValueError, match='from_type'):
+        model.connect_many(edges)
+    with pytest.raises(ValueError, match='4 or 5 values'):
+        model.connect_many([('reservoir', 'R0', 'plant')])
+    assert core.calls['AddRelation'] == 0
+    edges['from_type'] = 'reservoir'
+    assert model.connect_many(edges) == 1
+
+
+def test_edge_list_round_trip():
+    core, model = get_model()
+    model.connect_many(pd.DataFrame(get_edges(), columns=['from_type', 'from_name', 'to_type', 'to_name',
+                                                          'connection_type']))
+    edge_list = model.get_edge_list()
+    assert len(edge_list) == 28
+    assert edge_list['relation_category'].value_counts().to_dict() == {'physical': 27, 'logical': 1}
+
+    _, other = get_model()
+    other.connect_many(edge_list)
+    pd.testing.assert_frame_equal(other.get_edge_list(), edge_list)
@@ -0,0 +1,109 @@
+import pickle
+import numpy as np
+import pandas as pd
+
+from pyshop.shopcore.decomposition import apply_snapshot, collect_results, extract_components, solve_components
+from pyshop.shopcore.model_builder import ModelBuilderType
+from pyshop.shopcore.result_cache import ResultCache
+from pyshop.shopcore.results_export import export_results, read_npz_results
+
+from .mock_core import MockShopCore
+
+
+def get_model():
+    core = MockShopCore()
+    model = ModelBuilderType(core, result_cache=ResultCache())
+    model.market.add_object('M1').market_type.set('ENERGY')
+    for i in range(2):
+        upper = model.reservoir.add_object(f'R{i}_upper')
+        lower = model.reservoir.add_object(f'R{i}_lower')
+        plant = model.plant.add_object(f'P{i}')
+        generator = model.generator.add_object(f'G{i}')
+        upper.connect_to(plant)
+        plant.connect_to(lower)
+        plant.connect_to(generator)
+        upper.lrl.set(100.0 + i)
+        upper.inflow.set(pd.Series([10.0, 20.0], index=pd.date_range('2022-01-01', periods=2, freq='H')))
+        plant.main_loss.set([0.1 * i])
+        generator.gen_eff_curve.set(pd.Series([95.0, 98.0], index=[10.0, 20.0], name=0.0))
+    return core, model
+
+
+def solve(snapshot):
+    core = MockShopCore()
+    model = ModelBuilderType(core)
+    apply_snapshot(core, model, snapshot)
+    core.ExecuteCommand('start sim', [], [])
+    return collect_results(core, model, snapshot.objects)
+
+
+def test_connected_components():
+    core, model = get_model()
+    components = model.connected_components()
+    assert [[(o.get_type(), o.get_name()) for o in component] for component in components] == [
+        [('reservoir', 'R0_upper'), ('reservoir', 'R0_lower'), ('plant', 'P0'), ('generator', 'G0')],
+        [('reservoir', 'R1_upper'), ('reservoir', 'R1_lower'), ('plant', 'P1'), ('generator', 'G1')],
+    ]
+    _, shared = model.get_topology().get_connected_components()
+    assert shared == [0]
+
+
+def test_snapshot_round_trip():
+    core, model = get_model()
+    snapshots = pickle.loads(pickle.dumps(extract_components(core, model)))
+    assert len(snapshots) == 2
+    assert ('market', 'M1') in snapshots[1].objects
+
+    child_core = MockShopCore()
+    child = ModelBuilderType(child_core)
+    apply_snapshot(child_core, child, snapshots[1])
+    assert child.get_object_index().names == ['M1', 'R1_upper', 'R1_lower', 'P1', 'G1']
+    assert child.get_topology().downstream(('plant', 'P1')) == [('reservoir', 'R1_lower'), ('generator', 'G1')]
+    assert child.reservoir.R1_upper.lrl.get() == 101.0
+    assert child.market.M1.market_type.get() == 'ENERGY'
+    np.testing.assert_array_equal(child.plant.P1.main_loss.get(), [0.1])
+    pd.testing.assert_series_equal(child.generator.G1.gen_eff_curve.get(), model.generator.G1.gen_eff_curve.get())
+    pd.testing.assert_series_equal(child.reservoir.R1_upper.inflow.get(), model.reservoir.R1_upper.inflow.get())
+
+
+def test_merge_results():
+    core, model = get_model()
+    results = [solve(snapshot) for snapshot in extract_components(core, model)]
+    for component_results in results:
+        model.merge_results(component_results)
+    core.calls.clear()
+    production = model.plant.P1.production.get()
+    assert core.calls['GetTxySeriesY'] == 0
+    np.testing.assert_array_equal(production.values, results[1][('plant', 'P1', 'production')].y)
+    assert model.plant.P1.production.get(output_format='dict')['y'] == production.tolist()
+
+    # Merged results belong to the solve epoch, and are dropped when the inputs change
+    model.plant.P1.outlet_line.set(10.0)
+    assert model.plant.P1.production.get() is None
+
+
+def test_merged_results_in_bulk_reads_and_export(tmp_path):
+    core, model = get_model()
+    core.ExecuteCommand('start sim', [], [])
+    solved = model.plant.P1.production.get(output_format='numpy')
+    model.merge_results({('plant', 'P1', 'production'): solved._replace(y=np.full(solved.y.shape, 42.0))})
+    production = model.plant.P1.production.get()
+    assert (production == 42.0).all()
+    frame = model.plant.get_attribute('production')
+    np.testing.assert_array_equal(frame['P1'].values, production.values)
+    assert not (frame['P0'] == 42.0).any()
+
+    export_results(core, model, str(tmp_path / 'results.npz'), ['plant'], ['production'], format='npz')
+    exported = read_npz_results(str(tmp_path / 'results.npz'))
+    assert exported[exported.object_name == 'P1'].value.tolist() == production.tolist()
+    assert not (exported[exported.object_name == 'P0'].value == 42.0).any()
+
+
+def test_solve_in_processes():
+    core, model = get_model()
+    snapshots = extract_components(core, model)
+    results = solve_components(snapshots, solve, processes=2)
+    expected = [solve(snapshot) for snapshot in snapshots]
+    assert [sorted(r) for r in results] == [sorted(r) for r in expected]
+    np.testing.assert_array_equal(results[1][('plant', 'P1', 'production')].y,
+                                  expected[1][('plant', 'P1', 'production')].y)
@@ -0,0 +1,57 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyshop.helpers.curve_batch import CurveBatch
+
+
+def test_from_series_list():
+    curves = [pd.Series([80.0, 95.0, 90.0], index=[25.0, 90.0, 100.0], name=90),
+              pd.Series([82.0, 98.0], index=[25.0, 100.0], name=100)]
+    batch = CurveBatch.from_curves(curves)
+    assert len(batch) == 2
+    assert (batch.offsets == [0, 3, 5]).all()
+    assert (batch.n_points == [3, 2]).all()
+    assert (batch.refs == [90.0, 100.0]).all()
+    assert (batch.x == [25.0, 90.0, 100.0, 25.0, 100.0]).all()
+    for curve, ser in zip(curves, batch.to_series_list()):
+        assert (curve.index == ser.index).all()
+        assert (curve.values == ser.values).all()
+        assert curve.name == ser.name
+
+
+def test_from_dict_list_matches_series_list():
+    dicts = [dict(ref=90.0, xy=[[25.0, 80.0], [90.0, 95.0]]), dict(ref=100.0, xy=[[25.0, 82.0]])]
+    series = [pd.Series([80.0, 95.0], index=[25.0, 90.0], name=90.0), pd.Series([82.0], index=[25.0], name=100.0)]
+    from_dicts = CurveBatch.from_curves(dicts)
+    from_series = CurveBatch.from_curves(series)
+    assert (from_dicts.offsets == from_series.offsets).all()
+    assert (from_dicts.x == from_series.x).all()
+    assert (from_dicts.y == from_series.y).all()
+    assert (from_dicts.refs == from_series.refs).all()
+    assert [d['xy'] for d in from_dicts.to_dict_list()] == [d['xy'] for d in dicts]
+
+
+def test_dict_list_is_json_friendly():
+    batch = CurveBatch.from_n_points([2, 1], [0.0, 1.0, 0.0], [1.5, 2.5, 3.5], refs=[10.0, 20.0])
+    dicts = batch.to_dict_list()
+    assert dicts == [dict(ref=10.0, xy=[[0.0, 1.5], [1.0, 2.5]]), dict(ref=20.0, xy=[[0.0, 3.5]])]
+    assert type(dicts[0]['xy'][0][0]) is float
+    json.dumps([d['xy'] for d in dicts])
+
+
+def test_time_labels():
+    t0 = pd.Timestamp('2022-01-01 06:00', tz='Europe/Oslo')
+    curves = [pd.Series([1.0, 2.0], index=[0.0, 1.0], name=t0),
+              pd.Series([3.0], index=[0.0], name=t0 + pd.Timedelta(hours=1))]
+    batch = CurveBatch.from_curves(curves, label='time')
+    assert batch.refs is None
+    assert batch.tz_name == 'Europe/Oslo'
+    assert batch.get_shop_timestrings() == ['20220101060000', '20220101070000']
+    assert batch[0].name == t0
+
+
+def test_invalid_offsets():
+    with pytest.raises(ValueError):
+        CurveBatch(np.array([0, 2]), [1.0, 2.0, 3.0], [1.0, 2.0, 3.0])
@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
-from pyshop.helpers.timeseries import remove_consecutive_duplicates, resample_resolution
+from pyshop.helpers.time import get_shop_datetime, get_shop_datetime64
+from pyshop.helpers.timeseries import get_resolution_bin_edges, get_txy_arrays, remove_consecutive_duplicates, \
+    resample_resolution, resample_step_function
 
 def test_remove_consecutive_duplicates_series():
     series = pd.Series([1, 1, 2, 2, 2, 3], index=range(6))
@@ -12,3 +15,50 @@ def test_remove_consecutive_duplicates_dataframe():
     ret_df = remove_consecutive_duplicates(df)
     assert (ret_df.index == [0, 2, 5]).all()
     assert (ret_df.values[:, 0] == [1, 2 ,3]).all()
+
+def test_get_shop_datetime64():
+    for time_string in ['20220304', '2022030412', '202203041230', '20220304123015']:
+        assert get_shop_datetime64(time_string) == get_shop_datetime(time_string, '').to_datetime64()
+
+def test_get_txy_arrays_masks_missing_values():
+    txy = get_txy_arrays(np.datetime64('2022-01-01T00:00'), 'hour', [0, 1, 2], [1.0, 1.0e40, 3.0])
+    assert txy.t.dtype == np.int64
+    assert np.isnan(txy.y[1])
+    assert (txy.get_datetimes() == np.array(['2022-01-01T00', '2022-01-01T01', '2022-01-01T02'],
+                                            dtype='datetime64[ns]')).all()
+
+def test_get_resolution_bin_edges():
+    time_resolution = pd.Series([15, 15, 60], index=[0, 15, 60])
+    edges = get_resolution_bin_edges(150, time_resolution)
+    assert (edges == [0, 15, 30, 45, 60, 120, 150]).all()
+
+def test_resample_step_function_matches_resample_resolution():
+    rng = np.random.default_rng(1)
+    start = pd.Timestamp('2022-01-01')
+    end = start + pd.Timedelta(days=2)
+    time = dict(starttime=start, endtime=end)
+    time_resolution = pd.Series([15, 60, 15, 240], index=[0, 600, 1000, 2000])
+    offsets = np.r_[0, np.sort(rng.choice(np.arange(1, 2*24*60), 99, replace=False))]
+    df = pd.DataFrame(rng.normal(size=(100, 3)), index=start + pd.to_timedelta(offsets, unit='m'))
+
+    # The old implementation expects input upsampled to unit resolution
+    upsampled = pd.concat([df, pd.DataFrame(df[-1:].values, index=[end], columns=df.columns)])
+    upsampled = upsampled.asfreq(freq='T', method='ffill')[:-1]
+    expected = resample_resolution(time, upsampled, 1/60, time_resolution)
+
+    resampled = resample_step_function(time, df, 1/60, time_resolution)
+    assert (resampled.index == expected.index).all()
+    assert np.allclose(resampled.values, expected.values)
+
+    resampled_series = resample_step_function(time, df[1], 1/60, time_resolution)
+    assert np.allclose(resampled_series.values, expected[1].values)
+
+def test_resample_step_function_nan():
+    start = pd.Timestamp('2022-01-01')
+    time = dict(starttime=start, endtime=start + pd.Timedelta(hours=4))
+    series = pd.Series([1.0, np.nan, 3.0], index=[start, start + pd.Timedelta(hours=1), start + pd.Timedelta(hours=2)])
+    resampled = resample_step_function(time, series, 1/3600, pd.Series([1, 2], index=[0, 2]))
+    assert (resampled.index == [0, 1, 2]).all()
+    assert resampled[0] == 1.0
+    assert np.isnan(resampled[1])
+    assert resampled[2] == 3.0
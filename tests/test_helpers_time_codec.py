@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyshop.helpers.time_codec import datetime64_to_shop_timestrings, format_shop_timestring, parse_shop_timestring, \
+    shop_timestrings_to_datetime64, shop_timestrings_to_datetimeindex
+
+
+def test_shop_timestrings_to_datetime64():
+    time_strings = ['20220304', '2022030412', '202203041230', '20220304123015', '20240229235959999']
+    times = shop_timestrings_to_datetime64(time_strings)
+    expected = [parse_shop_timestring(t).to_datetime64() for t in time_strings]
+    assert (times == np.array(expected, dtype='datetime64[ns]')).all()
+
+
+def test_shop_timestrings_to_datetime64_invalid():
+    with pytest.raises(ValueError):
+        shop_timestrings_to_datetime64(['202203041'])
+    with pytest.raises(ValueError):
+        shop_timestrings_to_datetime64(['2022130412'])
+    with pytest.raises(ValueError):
+        shop_timestrings_to_datetime64(['2022O304'])
+
+
+def test_shop_timestrings_to_datetime64_checks_month_length():
+    for time_string in ['20230230', '20230229', '20210431', '1900022912']:
+        with pytest.raises(ValueError):
+            shop_timestrings_to_datetime64(['20230101', time_string])
+        with pytest.raises(ValueError):
+            parse_shop_timestring(time_string)
+    times = shop_timestrings_to_datetime64(['20240229', '20000229', '20230131', '20231231'])
+    assert times.astype('datetime64[D]').astype(str).tolist() == ['2024-02-29', '2000-02-29', '2023-01-31', '2023-12-31']
+
+
+def test_shop_timestrings_to_datetimeindex():
+    times = shop_timestrings_to_datetimeindex(['2022030412', '2022070412'], 'Europe/Oslo')
+    assert times[0] == parse_shop_timestring('2022030412', 'Europe/Oslo')
+    assert times[1] == parse_shop_timestring('2022070412', 'Europe/Oslo')
+
+
+def test_datetime64_to_shop_timestrings():
+    times = pd.date_range('2022-03-26 22:00', periods=6, freq='H', tz='Europe/Oslo')
+    expected = [t.strftime('%Y%m%d%H%M%S') for t in times]
+    assert datetime64_to_shop_timestrings(times).tolist() == expected
+    assert datetime64_to_shop_timestrings(times.tz_localize(None).values).tolist() == expected
+
+
+def test_format_shop_timestring_uses_wall_time():
+    utc = pd.Timestamp('2022-01-01 00:00', tz='UTC')
+    assert format_shop_timestring(utc) == '20220101000000'
+    assert format_shop_timestring(utc.tz_convert('Europe/Oslo')) == '20220101010000'
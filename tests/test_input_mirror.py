@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from pyshop.shopcore.input_mirror import InputMirror, hash_value
+from pyshop.shopcore.model_builder import ModelBuilderType
+from pyshop.shopcore.result_cache import ResultCache
+
+from .mock_core import MockShopCore
+
+
+def get_model():
+    core = MockShopCore()
+    model = ModelBuilderType(core, result_cache=ResultCache(), input_mirror=InputMirror())
+    model.plant.add_object('P1')
+    model.plant.add_object('P2')
+    return core, model
+
+
+def test_unchanged_values_are_skipped():
+    core, model = get_model()
+    mark = model.mark_inputs()
+    core.calls.clear()
+    model.plant.P1.outlet_line.set(100.0)
+    model.plant.P1.outlet_line.set(100.0)
+    model.plant.P2.outlet_line.set(100.0)
+    assert core.calls['SetDoubleValue'] == 2
+    model.plant.P1.outlet_line.set(101.0)
+    assert core.calls['SetDoubleValue'] == 3
+    assert model.changed_since(mark) == [('plant', 'P2', 'outlet_line'), ('plant', 'P1', 'outlet_line')]
+
+    mark = model.mark_inputs()
+    model.plant.P1.outlet_line.set(101.0)
+    assert model.changed_since(mark) == []
+    assert model.get_input_mirror().get_info()['skipped'] == 2
+
+
+def test_skipped_set_keeps_results():
+    core, model = get_model()
+    model.plant.P1.outlet_line.set(100.0)
+    core.ExecuteCommand('start sim', [], [])
+    model.plant.P1.production.get()
+    model.plant.P1.outlet_line.set(100.0)
+    assert len(model.get_result_cache()) == 1
+
+
+def test_series_are_compared_before_fitting():
+    core, model = get_model()
+    time_grid = model.get_time_grid()
+    index = pd.date_range(time_grid.starttime, periods=3, freq='H')
+    model.reservoir.add_object('R1')
+    core.calls.clear()
+    model.reservoir.R1.inflow.set(pd.Series([1.0, 0.0, 1.0], index=index))
+    model.reservoir.R1.inflow.set(pd.Series([1.0, 0.0, 1.0], index=index))
+    assert core.calls['SetTxySeries'] == 1
+    model.reservoir.R1.inflow.set(pd.Series([1.0, 1.0, 1.0], index=index))
+    assert core.calls['SetTxySeries'] == 2
+
+
+def test_same_series_object_is_written_once():
+    core, model = get_model()
+    time_grid = model.get_time_grid()
+    # The series has no point at the start time, so fitting it to the time grid adds one
+    inflow = pd.Series([1.0, 2.0], index=pd.date_range(time_grid.starttime - pd.Timedelta(minutes=30), periods=2,
+                                                       freq='H'))
+    model.reservoir.add_object('R1')
+    core.calls.clear()
+    model.reservoir.R1.inflow.set(inflow)
+    model.reservoir.R1.inflow.set(inflow)
+    assert core.calls['SetTxySeries'] == 1
+    assert len(inflow) == 2
+
+
+def test_hash_value():
+    y = np.arange(6.0)
+    calls = [('SetTxySeries', ('plant', 'P1', 'inflow', '20230101000000', np.arange(6), y))]
+    assert hash_value(calls) == hash_value([('SetTxySeries', ('plant', 'P1', 'inflow', '20230101000000',
+                                                              np.arange(6), y.copy()))])
+    assert hash_value(calls) != hash_value([('SetTxySeries', ('plant', 'P1', 'inflow', '20230101000000',
+                                                              np.arange(6), y.reshape(2, 3)))])
+    assert hash_value([('SetIntValue', ('plant', 'P1', 'a', 1))]) != hash_value([('SetIntValue', ('plant', 'P1', 'a',
+                                                                                                  '1'))])
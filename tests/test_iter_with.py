@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from pyshop.shopcore.model_builder import ModelBuilderType
+from pyshop.shopcore.result_cache import ResultCache
+
+from .mock_core import MockShopCore
+
+
+class BatchingCore(MockShopCore):
+
+    def call_many(self, calls):
+        self.calls['call_many'] += 1
+        return [getattr(self, name)(*args) for name, args in calls]
+
+
+def get_solved_model(core=None):
+    core = MockShopCore() if core is None else core
+    model = ModelBuilderType(core, result_cache=ResultCache())
+    for i in range(5):
+        model.plant.add_object(f'P{i}')
+        model.plant[f'P{i}'].outlet_line.set(float(i))
+    core.ExecuteCommand('start sim', [], [])
+    return core, model
+
+
+def test_iter_with_matches_get():
+    core, model = get_solved_model()
+    objects = []
+    for plant, values in model.plant.iter_with(['outlet_line', 'production'], chunk_size=2):
+        assert list(values) == ['outlet_line', 'production']
+        assert values['outlet_line'] == plant.outlet_line.get()
+        assert values['production'].equals(plant.production.get())
+        objects.append(plant)
+    assert [plant.get_name() for plant in objects] == [f'P{i}' for i in range(5)]
+    assert objects[0] is model.plant.P0
+
+    raw = dict(model.plant.iter_with(['production'], raw=True))
+    np.testing.assert_array_equal(raw[model.plant.P2]['production'].y, model.plant.P2.production.get(raw=True).y)
+    with pytest.raises(ValueError):
+        next(model.plant.iter_with(['unknown']))
+
+
+def test_chunks_are_fetched_together():
+    core, model = get_solved_model(BatchingCore())
+    core.calls.clear()
+    list(model.plant.iter_with(['production', 'discharge'], chunk_size=2))
+    assert core.calls['call_many'] == 3
+    # The outputs are now cached
+    list(model.plant.iter_with(['production'], chunk_size=2))
+    assert core.calls['call_many'] == 3
+    assert core.calls['GetTxySeriesY'] == 10
@@ -0,0 +1,52 @@
+from pyshop.shopcore.model_builder import ModelBuilderType
+from pyshop.shopcore.object_index import ObjectIndex
+
+from .mock_core import MockShopCore
+
+
+def test_sync_appends_new_objects():
+    index = ObjectIndex()
+    assert index.sync(['R1', 'P1'], ['reservoir', 'plant']) == []
+    names = index.get_names('reservoir')
+    assert index.sync(['R1', 'P1', 'R2'], ['reservoir', 'plant', 'reservoir']) == []
+    # The list of names of a type is updated in place
+    assert names == ['R1', 'R2']
+    assert index.get_position('reservoir', 'R2') == 2
+    assert index.get_type_position('reservoir', 'R2') == 1
+    assert ('plant', 'P1') in index
+    assert ('plant', 'R1') not in index
+
+
+def test_sync_rebuilds_after_removal():
+    index = ObjectIndex()
+    index.sync(['R1', 'P1', 'R2'], ['reservoir', 'plant', 'reservoir'])
+    assert index.sync(['R1', 'R2'], ['reservoir', 'reservoir']) == [('plant', 'P1')]
+    assert index.get_position('reservoir', 'R2') == 1
+    assert index.get_names('plant') == []
+
+
+def test_add_object_keeps_proxies():
+    core = MockShopCore()
+    model = ModelBuilderType(core)
+    plant_type = model.plant
+    p1 = model.plant.add_object('P1')
+    core.calls.clear()
+    for i in range(10):
+        model.generator.add_object(f'G{i}')
+    # Objects are added without reading all objects in the system, and the existing proxies are kept
+    assert core.calls['GetObjectNamesInSystem'] == 0
+    assert model.plant is plant_type
+    assert model.plant.P1 is p1
+    assert model.generator.get_object_names() == [f'G{i}' for i in range(10)]
+    assert model.get_object_index().get_position('generator', 'G3') == 4
+
+
+def test_add_object_after_external_change():
+    core = MockShopCore()
+    model = ModelBuilderType(core)
+    core.AddObject('plant', 'P1')
+    model.plant.add_object('P2')
+    # Adding an existing object does not change the index
+    model.plant.add_object('P2')
+    assert model.plant.get_object_names() == ['P1', 'P2']
+    assert model.get_object_index().names == core.GetObjectNamesInSystem()
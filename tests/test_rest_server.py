@@ -0,0 +1,115 @@
+import pandas as pd
+import pytest
+import requests
+
+from pyshop.shop_runner import ShopSession
+from pyshop.shopcore.rest_server import ShopRestServer
+
+from .mock_core import MockShopCore
+
+
+def create_mock_core(session_request):
+    return MockShopCore()
+
+
+@pytest.fixture
+def server():
+    server = ShopRestServer(create_mock_core).start()
+    yield server
+    server.stop()
+
+
+def test_sessions_over_one_connection(server):
+    shop = ShopSession(host='127.0.0.1', port=server.port, wire_format='binary')
+    other = ShopSession(host='127.0.0.1', port=server.port)
+    assert shop.shop_api.get_transport_info()['wire_format'] == 'binary'
+    shop.model.reservoir.add_object('R1')
+    shop.model.reservoir.R1.inflow.set(pd.Series([1.0, 2.0], index=pd.date_range('2022-01-01', periods=2, freq='H')))
+    with shop.shop_api.pipeline():
+        shop.shop_api.SetDoubleValue('reservoir', 'R1', 'max_vol', 5.0)
+    assert shop.model.reservoir.R1.max_vol.get() == 5.0
+    assert shop.model.reservoir.R1.inflow.get().tolist() == [1.0, 2.0]
+    assert other.model.reservoir.get_object_names() == []
+
+    metrics = server.get_metrics()
+    assert metrics['sessions'] == 2
+    assert metrics['connections'] == 2
+    assert metrics['batches'] >= 1
+    assert metrics['errors'] == 0
+    sessions = requests.get(f'http://127.0.0.1:{server.port}/metrics/sessions').json()
+    assert [s['wire_format'] for s in sessions] == ['binary', 'json']
+    assert sessions[0]['calls'] > sessions[1]['calls']
+
+
+@pytest.mark.parametrize('wire_format', ['json', 'binary'])
+def test_model_in_pipeline(server, wire_format):
+    shop = ShopSession(host='127.0.0.1', port=server.port, wire_format=wire_format)
+    with shop.shop_api.pipeline():
+        shop.model.plant.add_object('P1')
+        shop.model.plant.P1.outlet_line.set(3.0)
+        assert shop.model.plant.P1.outlet_line.get() == 3.0
+        shop.model.plant.P1.outlet_line.set(4.0)
+    assert shop.model.plant.P1.outlet_line.get() == 4.0
+
+
+def test_binary_batch_keeps_result_types(server):
+    shop = ShopSession(host='127.0.0.1', port=server.port, wire_format='binary')
+    shop.model.reservoir.add_object('R1')
+    shop.model.reservoir.add_object('R2')
+    inflow = pd.Series([1.0, 2.0], index=pd.date_range('2022-01-01', periods=2, freq='H'))
+    shop.model.reservoir.R1.inflow.set(inflow)
+    shop.model.reservoir.R2.inflow.set(inflow)
+    y = shop.shop_api.call_many([('GetTxySeriesY', ('reservoir', name, 'inflow')) for name in ['R1', 'R2']])
+    assert isinstance(y, list) and [list(a) for a in y] == [[1.0, 2.0], [1.0, 2.0]]
+    calls = [('GetIntValue', ('reservoir', 'R1', 'max_vol')), ('GetDoubleValue', ('reservoir', 'R1', 'max_vol')),
+             ('GetObjectNamesInSystem', ()), ('GetObjectNamesInSystem', ())]
+    results = shop.shop_api.call_many(calls)
+    assert isinstance(results, list)
+    assert [type(r) for r in results[:2]] == [int, float]
+    assert results[2] == results[3] == ['R1', 'R2']
+
+
+def test_commands_write_the_queued_values(server, tmp_path):
+    shop = ShopSession(host='127.0.0.1', port=server.port)
+    reservoir = shop.model.reservoir.add_object('R1')
+    shop.model.plant.add_object('P1')
+    (tmp_path / 'commands.txt').write_text('penalty flag /on\n')
+    with shop.model.batch():
+        reservoir.max_vol.set(5.0)
+        shop.execute_command().set_nseg.set(['up'], [2])
+        assert not shop.model.is_pending('reservoir', 'R1', 'max_vol')
+        assert shop.shop_api.GetDoubleValue('reservoir', 'R1', 'max_vol') == 5.0
+        shop.model.plant.P1.outlet_line.set(3.0)
+        shop.run_command_file(str(tmp_path), 'commands.txt')
+        assert shop.shop_api.GetDoubleValue('plant', 'P1', 'outlet_line') == 3.0
+    assert shop.shop_api.GetExecutedCommands() == ['set nseg /up 2', 'penalty flag /on']
+
+
+def test_errors_and_closing(server):
+    shop = ShopSession(host='127.0.0.1', port=server.port)
+    url = f'http://127.0.0.1:{server.port}'
+    headers = {'session-id': str(shop._id)}
+    response = requests.post(f'{url}/internal/NoSuchCall', json=dict(args=[], kwargs={}), headers=headers)
+    assert response.status_code == 404
+    response = requests.post(f'{url}/internal/GetDoubleValue', json=dict(args=['reservoir'], kwargs={}),
+                             headers=headers)
+    assert response.status_code == 500
+    assert 'TypeError' in response.json()['error']
+    with pytest.raises(RuntimeError):
+        shop.shop_api.call_many([('AddObject', ('reservoir', 'R1')), ('GetDoubleValue', ('reservoir',))])
+
+    assert requests.delete(f'{url}/session', headers=headers).json()['closed']
+    assert server.get_metrics()['sessions'] == 0
+    assert requests.post(f'{url}/internal/GetTimeUnit', json=dict(args=[], kwargs={}), headers=headers).status_code == 404
+
+
+def test_process_workers():
+    server = ShopRestServer(create_mock_core, worker='process').start()
+    try:
+        shop = ShopSession(host='127.0.0.1', port=server.port)
+        shop.model.reservoir.add_object('R1')
+        shop.model.reservoir.R1.max_vol.set(3.0)
+        assert shop.model.reservoir.R1.max_vol.get() == 3.0
+        assert server.get_metrics()['worker'] == 'process'
+    finally:
+        server.stop()
@@ -0,0 +1,54 @@
+from pyshop.shopcore.model_builder import ModelBuilderType
+from pyshop.shopcore.result_cache import MISSING, ResultCache
+
+from .mock_core import MockShopCore
+
+
+def get_solved_model(max_size=256):
+    core = MockShopCore()
+    model = ModelBuilderType(core, result_cache=ResultCache(max_size))
+    model.plant.add_object('P1')
+    model.plant.add_object('P2')
+    core.ExecuteCommand('start sim', [], [])
+    return core, model
+
+
+def test_outputs_are_cached():
+    core, model = get_solved_model()
+    core.calls.clear()
+    first = model.plant.P1.production.get()
+    first.iloc[0] = -1.0
+    second = model.plant.P1.production.get()
+    assert core.calls['GetTxySeriesY'] == 1
+    assert second.iloc[0] != -1.0
+    assert model.get_result_cache().get_info()['hits'] == 1
+
+
+def test_inputs_are_not_cached():
+    core, model = get_solved_model()
+    core.calls.clear()
+    model.plant.P1.outlet_line.get()
+    model.plant.P1.outlet_line.get()
+    assert core.calls['GetDoubleValue'] == 2
+
+
+def test_set_starts_new_epoch():
+    core, model = get_solved_model()
+    model.plant.P1.production.get()
+    model.plant.P1.outlet_line.set(100.0)
+    assert len(model.get_result_cache()) == 0
+    assert model.get_result_cache().epoch == 1
+    core.calls.clear()
+    model.plant.P1.production.get()
+    assert core.calls['GetTxySeriesY'] == 1
+
+
+def test_lru_bound():
+    cache = ResultCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.get('b') is MISSING
+    assert cache.get('a') == 1
+    assert cache.get_info() == dict(hits=2, misses=1, size=2, max_size=2, epoch=0)
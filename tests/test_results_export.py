@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyshop.shopcore.model_builder import ModelBuilderType
+from pyshop.shopcore.results_export import export_results, read_npz_results
+
+from .mock_core import MockShopCore
+
+
+def get_solved_model(n_scenarios=1):
+    core = MockShopCore(n_scenarios=n_scenarios)
+    for name in ['P1', 'P2']:
+        core.AddObject('plant', name)
+    core.AddObject('reservoir', 'R1')
+    model = ModelBuilderType(core)
+    core.ExecuteCommand('start sim', [], [])
+    return core, model
+
+
+def test_export_npz(tmp_path):
+    core, model = get_solved_model(n_scenarios=2)
+    path = str(tmp_path / 'results.npz')
+    n_rows = export_results(core, model, path, format='npz', batch_rows=30)
+    df = read_npz_results(path)
+    assert len(df) == n_rows
+    assert list(df.columns) == ['object_type', 'object_name', 'attribute', 'scenario', 'time', 'value']
+    # Input attributes are never exported
+    assert 'inflow' not in set(df['attribute'])
+
+    production = df[(df['object_name'] == 'P2') & (df['attribute'] == 'production')]
+    expected = core.GetTxySeriesY('plant', 'P2', 'production')
+    assert (production['value'].values == np.asarray(expected).T.reshape(-1)).all()
+    assert set(production['scenario']) == {0, 1}
+    assert production['time'].iloc[0] == pd.Timestamp('2022-01-01')
+
+    with np.load(path) as data:
+        assert len([name for name in data.files if name.startswith('value_')]) > 1
+
+
+def test_export_selection(tmp_path):
+    core, model = get_solved_model()
+    path = str(tmp_path / 'results.npz')
+    export_results(core, model, path, object_types=['plant'], attributes=['production'], format='npz')
+    df = read_npz_results(path)
+    assert set(df['object_name']) == {'P1', 'P2'}
+    assert set(df['attribute']) == {'production'}
+
+    # The attribute info is only fetched once per object type
+    n_info_calls = core.calls['GetAttributeInfo']
+    export_results(core, model, path, object_types=['plant'], format='npz')
+    assert core.calls['GetAttributeInfo'] == n_info_calls
+
+
+def test_export_parquet(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    core, model = get_solved_model()
+    path = str(tmp_path / 'results.parquet')
+    n_rows = export_results(core, model, path, batch_rows=20)
+    parquet_file = pq.ParquetFile(path)
+    assert parquet_file.metadata.num_rows == n_rows
+    assert parquet_file.metadata.num_row_groups > 1
+
+
+def test_export_unknown_format(tmp_path):
+    core, model = get_solved_model()
+    with pytest.raises(ValueError):
+        export_results(core, model, str(tmp_path / 'results.csv'), format='csv')
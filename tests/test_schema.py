@@ -0,0 +1,44 @@
+import pytest
+
+from pyshop.shopcore.model_builder import AttributeBuilderObject, ModelBuilderType
+from pyshop.shopcore.schema import ObjectTypeSchema, SchemaRegistry
+
+from .mock_core import MockShopCore
+
+
+def test_schema():
+    core = MockShopCore()
+    schema = ObjectTypeSchema(core, 'plant')
+    assert 'production' in schema
+    assert schema.get_datatype('main_loss') == 'double_array'
+    assert schema.get_datatype('unknown') is None
+    assert not schema.is_input('production')
+    assert schema.is_input('outlet_line')
+    assert schema.get_license_name('outlet_line') == ''
+    assert dict(schema.get_output_attributes()) == {'num_gen': 'int', 'production': 'txy', 'discharge': 'txy'}
+    with pytest.raises(TypeError):
+        schema.datatypes['production'] = 'double'
+
+
+def test_registry_builds_each_schema_once():
+    core = MockShopCore()
+    registry = SchemaRegistry(core)
+    assert registry.get('plant') is registry.get('plant')
+    assert core.calls['GetObjectTypeAttributeNames'] == 1
+
+
+def test_proxies_share_schema():
+    core = MockShopCore()
+    model = ModelBuilderType(core)
+    for i in range(100):
+        model.generator.add_object(f'G{i}')
+    core.calls.clear()
+    generators = [AttributeBuilderObject(core, 'generator', f'G{i}', model) for i in range(100)]
+    assert core.calls['GetObjectTypeAttributeNames'] == 0
+    assert core.calls['GetObjectTypeAttributeDatatypes'] == 0
+    assert generators[0].datatype_dict is generators[1].datatype_dict
+    assert generators[5]['p_max'].get() == core.GetDoubleValue('generator', 'G5', 'p_max')
+    # The proxies use slots, so they have no instance dict. __getattr__ can not be used to check, since it returns None
+    # for private attributes
+    with pytest.raises(AttributeError):
+        object.__getattribute__(generators[0], '__dict__')
@@ -1,7 +1,14 @@
 import pandas as pd
 import numpy as np
+import pytest
 
-from pyshop.shopcore.shop_api import get_attribute_value, get_time_resolution, set_attribute
+from pyshop.shopcore.shop_api import get_attribute_value, get_attribute_values, get_time_resolution, set_attribute
+from pyshop.shopcore.datatype_codecs import call_shop_api, get_codec, get_output_formats, register_output_format
+
+from pyshop.helpers.curve_batch import CurveBatch
+from pyshop.shopcore.time_grid import TimeGridCache
+
+from .mock_core import MockShopCore
 
 
 class ShopApiMock:
@@ -104,6 +111,14 @@ class TestGetAttribute:
             assert (value[i].values == self.shop_api['GetXyCurveArrayY'][n_sum:n_sum + n]).all()
             assert value[i].name == self.shop_api['GetXyCurveArrayReferences'][i]
 
+    def test_get_xy_array_raw(self):
+        value = get_attribute_value(self.shop_api, 'obj_name', 'obj_type', 'attr_name', 'xy_array', raw=True)
+        assert isinstance(value, CurveBatch)
+        assert (value.n_points == self.shop_api['GetXyCurveArrayNPoints']).all()
+        assert (value.x == self.shop_api['GetXyCurveArrayX']).all()
+        assert (value.y == self.shop_api['GetXyCurveArrayY']).all()
+        assert (value.refs == self.shop_api['GetXyCurveArrayReferences']).all()
+
     def test_get_txy(self):
         value = get_attribute_value(self.shop_api, 'obj_name', 'obj_type', 'attr_name', 'txy')
         if self.shop_api['GetTimeUnit'] == 'hour':
@@ -111,6 +126,115 @@ class TestGetAttribute:
             assert (value.index == [starttime + pd.Timedelta(hours=t) for t in self.shop_api['GetTxySeriesT']]).all()
             assert (value.values == self.shop_api['GetTxySeriesY']).all()
 
+    def test_get_txy_raw(self):
+        value = get_attribute_value(self.shop_api, 'obj_name', 'obj_type', 'attr_name', 'txy', raw=True)
+        assert (value.t == self.shop_api['GetTxySeriesT']).all()
+        assert (value.y == self.shop_api['GetTxySeriesY']).all()
+        assert value.start == np.datetime64('2022-01-01T00:00')
+        assert value.time_unit == self.shop_api['GetTimeUnit']
+        series = get_attribute_value(self.shop_api, 'obj_name', 'obj_type', 'attr_name', 'txy')
+        assert (value.get_datetimes() == series.index.values).all()
+
+
+class TestOutputFormats:
+    shop_api = ShopApiMock()
+
+    def test_dict_format(self):
+        value = get_attribute_value(self.shop_api, 'obj_name', 'obj_type', 'attr_name', 'xy_array', output_format='dict')
+        assert value == {'ref': [0.0, 10.0], 'x': [[0.0, 1.0], [0.0, 1.0, 2.0]], 'y': [[0.0, 1.1], [0.0, 1.1, 2.2]]}
+        value = get_attribute_value(self.shop_api, 'obj_name', 'obj_type', 'attr_name', 'txy', output_format='dict')
+        assert value['time'][:2] == ['2022-01-01T00:00:00', '2022-01-01T00:15:00']
+        assert value['y'] == self.shop_api['GetTxySeriesY']
+        assert get_attribute_value(self.shop_api, 'obj_name', 'obj_type', 'attr_name', 'int', output_format='dict') == 11
+
+    def test_numpy_format(self):
+        value = get_attribute_value(self.shop_api, 'obj_name', 'obj_type', 'attr_name', 'double_array',
+                                    output_format='numpy')
+        assert isinstance(value, np.ndarray)
+        assert (value == self.shop_api['GetDoubleArray']).all()
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            get_attribute_value(self.shop_api, 'obj_name', 'obj_type', 'attr_name', 'int', output_format='unknown')
+
+    def test_register_output_format(self):
+        register_output_format('test_n_points', {'xy_array': lambda batch, attribute_name: batch.n_points.tolist()})
+        assert 'test_n_points' in get_output_formats()
+        value = get_attribute_value(self.shop_api, 'obj_name', 'obj_type', 'attr_name', 'xy_array',
+                                    output_format='test_n_points')
+        assert value == [2, 3]
+        # Datatypes without a formatter are returned as decoded
+        value = get_attribute_value(self.shop_api, 'obj_name', 'obj_type', 'attr_name', 'int_array',
+                                    output_format='test_n_points')
+        assert (value == [11, 22]).all()
+
+    def test_codec_calls(self):
+        # Running the calls of a codec and decoding the results gives the same value as a direct get
+        codec = get_codec('xy_array')
+        results = call_shop_api(self.shop_api, codec.get_calls('obj_type', 'obj_name', 'attr_name'))
+        batch = codec.decode(results)
+        assert (batch.x == codec.get(self.shop_api, 'obj_type', 'obj_name', 'attr_name').x).all()
+
+    def test_set_xy_curve_batch(self):
+        codec = get_codec('xy')
+        calls = codec.set_calls('plant', 'P1', 'a', CurveBatch([0, 3], [0.0, 1.0, 2.0], [1.0, 2.0, 3.0]))
+        assert calls[0][1][3] == 0.0
+        calls = codec.set_calls('plant', 'P1', 'a', CurveBatch([0, 2], [0.0, 1.0], [1.0, 2.0], refs=[5.0]))
+        assert calls[0][1][3] == 5.0
+        with pytest.raises(ValueError):
+            codec.set_calls('plant', 'P1', 'a', CurveBatch([0, 2, 3], [0.0, 1.0, 2.0], [1.0, 2.0, 3.0], refs=[0, 1]))
+
+    def test_arrow_format(self):
+        pytest.importorskip('pyarrow')
+        table = get_attribute_value(self.shop_api, 'obj_name', 'obj_type', 'attr_name', 'xy_array', output_format='arrow')
+        assert table.column_names == ['curve', 'ref', 'x', 'y']
+        assert table.column('curve').to_pylist() == [0, 0, 1, 1, 1]
+
+
+class TestGetAttributeValues:
+
+    def _get_core(self, n_scenarios=1):
+        core = MockShopCore(n_scenarios=n_scenarios)
+        core.SetTimeResolution('20220101000000', '20220101060000', 'hour')
+        for name in ['P1', 'P2', 'P3']:
+            core.AddObject('plant', name)
+        core.ExecuteCommand('start sim', [], [])
+        return core
+
+    def test_get_txy_wide(self):
+        core = self._get_core()
+        value = get_attribute_values(core, ['P1', 'P2', 'P3'], 'plant', 'production', 'txy')
+        assert list(value.columns) == ['P1', 'P2', 'P3']
+        for name in value.columns:
+            single = get_attribute_value(core, name, 'plant', 'production', 'txy')
+            assert (value.index == single.index).all()
+            assert (value[name].values == single.values).all()
+
+    def test_get_txy_wide_different_start(self):
+        core = self._get_core()
+        core.SetTxySeries('plant', 'P2', 'production', '20220101020000', [0, 2], [5.0, 1.0e40])
+        value = get_attribute_values(core, ['P1', 'P2'], 'plant', 'production', 'txy')
+        assert value.shape == (6, 2)
+        assert np.isnan(value['P2'].values[:2]).all()
+        assert (value['P2'].values[2:4] == 5.0).all()
+        assert np.isnan(value['P2'].values[4:]).all()
+
+    def test_get_txy_long_stochastic(self):
+        core = self._get_core(n_scenarios=2)
+        value = get_attribute_values(core, ['P1', 'P2', 'P3'], 'plant', 'production', 'txy')
+        assert list(value.columns) == ['object_name', 'scenario', 'time', 'value']
+        assert value.shape[0] == 3 * 2 * 6
+        single = get_attribute_value(core, 'P3', 'plant', 'production', 'txy')
+        p3 = value[(value.object_name == 'P3') & (value.scenario == 1)]
+        assert (p3['value'].values == single[1].values).all()
+
+    def test_get_double(self):
+        core = self._get_core()
+        core.SetDoubleValue('plant', 'P2', 'outlet_line', 12.5)
+        value = get_attribute_values(core, ['P1', 'P2'], 'plant', 'outlet_line', 'double')
+        assert value['P1'] == 0.0
+        assert value['P2'] == 12.5
+
 
 class TestSetAttribute:
     shop_api = ShopApiMock()
@@ -152,6 +276,27 @@ class TestSetAttribute:
         assert (res[5] == self.shop_api['GetXyCurveArrayX']).all()
         assert (res[6] == self.shop_api['GetXyCurveArrayY']).all()
 
+    def test_set_xy_array_curve_batch(self):
+        batch = CurveBatch.from_n_points([2, 1], [0.0, 1.0, 0.0], [1.0, 2.0, 3.0], refs=[10.0, 20.0])
+        set_attribute(self.shop_api, 'obj_name', 'obj_type', 'attr_name', 'xy_array', batch)
+        res = self.shop_api['SetXyCurveArray']
+        assert (res[3] == [10.0, 20.0]).all()
+        assert (res[4] == [2, 1]).all()
+        assert (res[5] == [0.0, 1.0, 0.0]).all()
+        assert (res[6] == [1.0, 2.0, 3.0]).all()
+
+    def test_set_xyt(self):
+        xyt_val = [
+            dict(time=pd.Timestamp('2022-01-01 01:00'), xy=[[0.0, 1.0], [1.0, 2.0]]),
+            dict(time=pd.Timestamp('2022-01-01 02:00'), xy=[[0.0, 3.0]])
+        ]
+        set_attribute(self.shop_api, 'obj_name', 'obj_type', 'attr_name', 'xyt', xyt_val)
+        res = self.shop_api['SetXyTCurve']
+        assert res[3] == ['20220101010000', '20220101020000']
+        assert (res[4] == [2, 1]).all()
+        assert (res[5] == [0.0, 1.0, 0.0]).all()
+        assert (res[6] == [1.0, 2.0, 3.0]).all()
+
     def test_set_txy(self):
         starttime = pd.Timestamp(self.shop_api['GetStartTime'])
         txy_val = pd.Series(
@@ -164,6 +309,15 @@ class TestSetAttribute:
         assert (res[4] == self.shop_api['GetTxySeriesT']).all()
         assert (res[5] == self.shop_api['GetTxySeriesY']).all()
 
+    def test_set_txy_arrays(self):
+        core = MockShopCore()
+        core.SetTimeResolution('20220101000000', '20220101030000', 'hour')
+        core.AddObject('market', 'M')
+        set_attribute(core, 'M', 'market', 'sale_price', 'txy', pd.Series([1.0, 2.0], index=pd.date_range('2022-01-01', periods=2, freq='H')))
+        value = get_attribute_value(core, 'M', 'market', 'sale_price', 'txy', raw=True)
+        set_attribute(core, 'M', 'market', 'buy_price', 'txy', value)
+        assert core.GetTxySeriesY('market', 'M', 'buy_price') == [1.0, 2.0]
+
     def test_set_constant_txy(self):
         set_attribute(self.shop_api, 'obj_name', 'obj_type', 'attr_name', 'txy', 1.1)
         res = self.shop_api['SetTxySeries']
@@ -180,3 +334,24 @@ class TestTime:
         assert timeres['starttime'] == pd.Timestamp(self.shop_api['GetStartTime'])
         assert timeres['endtime'] == pd.Timestamp(self.shop_api['GetEndTime'])
         assert timeres['timeunit'] == self.shop_api['GetTimeUnit']
+
+    def test_time_grid_cache(self):
+        core = MockShopCore()
+        core.SetTimeResolution('20220101000000', '20220101060000', 'hour', [0, 3], [1, 3])
+        core.AddObject('market', 'M')
+        cache = TimeGridCache(core)
+        grid = cache.get()
+        assert cache.get() is grid
+        assert not grid.has_constant_resolution()
+
+        core.calls.clear()
+        for value in [1.0, 2.0, 3.0]:
+            set_attribute(core, 'M', 'market', 'sale_price', 'txy', value, time_grid=cache.get())
+        assert core.calls['GetStartTime'] == 0
+        assert core.calls['GetTimeResolutionT'] == 0
+        assert core.GetTxySeriesT('market', 'M', 'sale_price') == [0, 1, 2, 3]
+
+        core.SetTimeResolution('20220101000000', '20220101120000', 'hour')
+        cache.invalidate()
+        assert cache.version == 1
+        assert cache.get().endtime == pd.Timestamp('2022-01-01 12:00')
@@ -0,0 +1,173 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from pyshop.shopcore.model_builder import ModelBuilderType
+from pyshop.shopcore.shop_rest import ShopRestNative
+
+from .mock_core import MockShopCore
+
+
+class Response(object):
+
+    def __init__(self, value, status_code=200):
+        self.value = value
+        self.status_code = status_code
+        self.ok = status_code < 400
+
+    def json(self):
+        return self.value
+
+
+class CoreTransport(object):
+    # Answers the requests of ShopRestNative with a mock core, as the server would, and records the paths posted to
+
+    def __init__(self, batch_endpoint=True):
+        self.core = MockShopCore()
+        self.batch_endpoint = batch_endpoint
+        self.paths = []
+
+    def request(self, method, path, **kwargs):
+        return Response([name for name in dir(MockShopCore) if name[0].isupper()])
+
+    def send(self, path, value):
+        self.paths.append(path)
+        name = path[len('/internal/'):]
+        if name != 'batch':
+            return Response(getattr(self.core, name)(*value['args'], **value['kwargs']))
+        if not self.batch_endpoint:
+            return Response(dict(error='Not found'), 404)
+        return Response([getattr(self.core, call['name'])(*call['args'], **call.get('kwargs', {}))
+                         for call in value['calls']])
+
+    def decode(self, response):
+        return response.json()
+
+    def post(self, path, value):
+        return self.decode(self.send(path, value))
+
+
+class ErrorTransport(CoreTransport):
+    # Answers batches with a server error with the given body. Bytes bodies can not be decoded
+
+    def __init__(self, body):
+        super().__init__()
+        self.body = body
+
+    def send(self, path, value):
+        if path == '/internal/batch':
+            return Response(self.body, 500)
+        return super().send(path, value)
+
+    def decode(self, response):
+        if isinstance(response.value, bytes):
+            raise ValueError('The body is not JSON')
+        return response.value
+
+
+def get_api(batch_endpoint=True):
+    transport = CoreTransport(batch_endpoint)
+    return transport, ShopRestNative(SimpleNamespace(_transport=transport))
+
+
+def test_pipeline_sends_one_request():
+    transport, api = get_api()
+    with api.pipeline():
+        added = api.AddObject('reservoir', 'R1')
+        with api.pipeline():
+            api.SetDoubleValue('reservoir', 'R1', 'max_vol', 12.0)
+        with pytest.raises(RuntimeError):
+            added.value
+        assert transport.paths == []
+    assert transport.paths == ['/internal/batch']
+    assert added.done
+    assert api.GetDoubleValue('reservoir', 'R1', 'max_vol') == 12.0
+
+
+def test_reads_in_pipeline_are_sent_at_once():
+    transport, api = get_api()
+    with api.pipeline():
+        api.AddObject('reservoir', 'R1')
+        api.SetDoubleValue('reservoir', 'R1', 'max_vol', 3.0)
+        assert api.GetDoubleValue('reservoir', 'R1', 'max_vol') == 3.0
+        assert transport.paths == ['/internal/batch']
+        lrl = api.SetDoubleValue('reservoir', 'R1', 'lrl', 1.0)
+    assert transport.paths == ['/internal/batch'] * 2
+    assert lrl.done
+
+
+def test_model_in_pipeline():
+    transport, api = get_api()
+    model = ModelBuilderType(api)
+    with api.pipeline():
+        model.plant.add_object('P1')
+        model.plant.P1.outlet_line.set(3.0)
+        model.reservoir.add_object('R1')
+        model.reservoir.R1.inflow.set(pd.Series([1.0, 2.0], index=pd.date_range('2022-01-01', periods=2, freq='H')))
+        assert model.plant.P1.outlet_line.get() == 3.0
+        model.plant.P1.outlet_line.set(4.0)
+    assert model.plant.P1.outlet_line.get() == 4.0
+    assert model.reservoir.R1.inflow.get().tolist() == [1.0, 2.0]
+
+
+def test_call_many_in_pipeline_keeps_the_order():
+    transport, api = get_api()
+    with api.pipeline():
+        api.AddObject('reservoir', 'R1')
+        api.SetDoubleValue('reservoir', 'R1', 'max_vol', 3.0)
+        assert api.call_many([('GetDoubleValue', ('reservoir', 'R1', 'max_vol'))]) == [3.0]
+        lrl = api.SetDoubleValue('reservoir', 'R1', 'lrl', 1.0)
+    assert transport.paths == ['/internal/batch'] * 2
+    assert lrl.done
+
+
+def test_commands_in_pipeline_are_sent_at_once():
+    transport, api = get_api()
+    with api.pipeline():
+        added = api.AddObject('reservoir', 'R1')
+        assert api.ExecuteCommand('start sim', [], ['1']) is True
+        assert transport.paths == ['/internal/batch']
+        assert added.done
+
+
+def test_batch_errors():
+    for body, message in [(dict(error='Core failed'), 'Core failed'), (b'<html>Bad gateway</html>', '500'),
+                          (['unexpected'], '500')]:
+        api = ShopRestNative(SimpleNamespace(_transport=ErrorTransport(body)))
+        with pytest.raises(RuntimeError, match=message):
+            api.call_many([('GetTimeUnit', ()), ('GetTimeZone', ())])
+
+
+def test_server_without_batch_endpoint():
+    transport, api = get_api(batch_endpoint=False)
+    api.AddObject('reservoir', 'R1')
+    assert api.call_many([('SetDoubleValue', ('reservoir', 'R1', 'max_vol', 3.0)),
+                          ('GetDoubleValue', ('reservoir', 'R1', 'max_vol'))]) == [None, 3.0]
+    api.call_many([('GetDoubleValue', ('reservoir', 'R1', 'max_vol'))] * 2)
+    assert transport.paths.count('/internal/batch') == 1
+
+    transport.paths.clear()
+    with api.pipeline():
+        api.SetDoubleValue('reservoir', 'R1', 'max_vol', 4.0)
+        api.SetDoubleValue('reservoir', 'R1', 'lrl', 1.0)
+        assert transport.paths == []
+        assert api.GetDoubleValue('reservoir', 'R1', 'max_vol') == 4.0
+    assert transport.paths == ['/internal/SetDoubleValue', '/internal/SetDoubleValue', '/internal/GetDoubleValue']
+    assert api.GetDoubleValue('reservoir', 'R1', 'lrl') == 1.0
+
+
+def test_model_reads_and_builds_in_few_requests():
+    transport, api = get_api()
+    model = ModelBuilderType(api)
+    model.reservoir.add_object('R0')
+    inflow = model.reservoir.R0.inflow
+    inflow.set(pd.Series([1.0, 2.0], index=pd.date_range('2022-01-01', periods=2, freq='H')))
+    transport.paths.clear()
+    assert inflow.get(output_format='numpy').y.tolist() == [1.0, 2.0]
+    assert transport.paths == ['/internal/batch']
+
+    transport.paths.clear()
+    model.reservoir.bulk_add(pd.DataFrame({'max_vol': [1.0, 2.0, 3.0], 'lrl': [0.5] * 3}, index=['R1', 'R2', 'R3']))
+    assert transport.paths.count('/internal/batch') == 2
+    assert model.reservoir.get_attribute('max_vol').tolist() == [0.0, 1.0, 2.0, 3.0]
@@ -0,0 +1,133 @@
+import asyncio
+import json
+
+import pandas as pd
+import pytest
+
+from pyshop.async_shop_runner import AsyncShopSession
+from pyshop.shopcore.shop_rest_async import AsyncRestTransport
+
+from .mock_core import MockShopCore
+
+
+class ProtocolServer(object):
+    # Serves the REST protocol with one mock core per session on asyncio streams. Responses are sent chunked every
+    # other time, and the connection is closed by the server after close_after requests. The response to the first
+    # request to truncate_path is cut off halfway after the request has been executed, and the connection closed
+
+    def __init__(self, close_after=None, truncate_path=None):
+        self.cores = {}
+        self.close_after = close_after
+        self.truncate_path = truncate_path
+        self.connections = 0
+        self.requests = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    def execute(self, method, path, headers, body):
+        if path == '/internal':
+            return [name for name in dir(MockShopCore) if name[0].isupper()]
+        if path == '/session':
+            self.cores[len(self.cores) + 1] = MockShopCore()
+            return dict(session_id=len(self.cores), session_name=body['session_name'])
+        core = self.cores[int(headers['session-id'])]
+        name = path[len('/internal/'):]
+        if name == 'batch':
+            return [getattr(core, call['name'])(*call['args']) for call in body['calls']]
+        return getattr(core, name)(*body['args'], **body['kwargs'])
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        handled = 0
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, path, _ = request_line.decode().split(' ')
+            headers = {}
+            line = await reader.readline()
+            while line != b'\r\n':
+                key, _, value = line.decode().partition(':')
+                headers[key.strip().lower()] = value.strip()
+                line = await reader.readline()
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+            content = json.dumps(self.execute(method, path, headers, json.loads(body) if body else {})).encode()
+            if path == self.truncate_path:
+                self.truncate_path = None
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n' % len(content) +
+                             content[:len(content) // 2])
+                await writer.drain()
+                break
+            self.requests += 1
+            handled += 1
+            if self.requests % 2:
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n' % len(content) + content)
+            else:
+                middle = len(content) // 2
+                chunks = [content[:middle], content[middle:]]
+                writer.write(b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n' +
+                             b''.join(b'%x\r\n%s\r\n' % (len(chunk), chunk) for chunk in chunks if chunk) + b'0\r\n\r\n')
+            await writer.drain()
+            if self.close_after is not None and handled == self.close_after:
+                break
+        writer.close()
+
+
+def test_sessions_share_a_bounded_transport():
+    async def run():
+        server = ProtocolServer()
+        port = await server.start()
+        transport = AsyncRestTransport('127.0.0.1', port, max_connections=2)
+        sessions = await asyncio.gather(*(AsyncShopSession.create('127.0.0.1', port, transport=transport)
+                                          for _ in range(4)))
+
+        async def build(shop, i):
+            reservoir = await shop.model.reservoir.add_object('R1')
+            await reservoir.max_vol.set(float(i))
+            await reservoir.inflow.set(pd.Series([1.0, 2.0], index=pd.date_range('2022-01-01', periods=2, freq='H')))
+            await shop.start_sim([], ['1'])
+            return await reservoir.max_vol.get(), (await reservoir.inflow.get()).tolist()
+
+        results = await asyncio.gather(*(build(shop, i) for i, shop in enumerate(sessions)))
+        await transport.close()
+        server.server.close()
+        return results, server
+
+    results, server = asyncio.run(run())
+    assert results == [(float(i), [1.0, 2.0]) for i in range(4)]
+    assert server.connections <= 2
+
+
+def test_closed_connections_are_replaced():
+    async def run():
+        server = ProtocolServer(close_after=1)
+        port = await server.start()
+        shop = await AsyncShopSession.create('127.0.0.1', port, transport=AsyncRestTransport('127.0.0.1', port))
+        names = [await shop.model.reservoir.add_object(f'R{i}') for i in range(3)]
+        object_names = await shop.model.reservoir.get_object_names()
+        server.server.close()
+        return names, object_names, server
+
+    names, object_names, server = asyncio.run(run())
+    assert object_names == [r.get_name() for r in names]
+    assert server.connections == server.requests
+
+
+def test_truncated_responses_are_not_sent_again():
+    async def run():
+        server = ProtocolServer(truncate_path='/internal/AddObject')
+        port = await server.start()
+        shop = await AsyncShopSession.create('127.0.0.1', port, transport=AsyncRestTransport('127.0.0.1', port))
+        with pytest.raises(asyncio.IncompleteReadError):
+            await shop.model.reservoir.add_object('R0')
+        await shop.model.reservoir.add_object('R1')
+        object_names = await shop.model.reservoir.get_object_names()
+        server.server.close()
+        return object_names, server
+
+    object_names, server = asyncio.run(run())
+    # R0 was added by the server once, before its response was cut off
+    assert object_names == ['R0', 'R1']
+    assert server.connections == 2
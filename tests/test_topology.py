@@ -0,0 +1,73 @@
+from pyshop.shopcore.model_builder import ModelBuilderType
+
+from .mock_core import MockShopCore
+
+
+def get_model():
+    core = MockShopCore()
+    model = ModelBuilderType(core)
+    r1 = model.reservoir.add_object('R1')
+    r2 = model.reservoir.add_object('R2')
+    p1 = model.plant.add_object('P1')
+    g1 = model.generator.add_object('G1')
+    g2 = model.generator.add_object('G2')
+    pump = model.pump.add_object('U1')
+    gate = model.gate.add_object('S1')
+    group = model.discharge_group.add_object('D1')
+    r1.connect_to(p1)
+    p1.connect_to(g1)
+    p1.connect_to(g2)
+    p1.connect_to(pump)
+    p1.connect_to(r2)
+    r1.connect_to(gate, 'spill')
+    gate.connect_to(r2)
+    r1.connect_to(group)
+    return core, model
+
+
+def get_keys(objects):
+    return [(o.get_type(), o.get_name()) for o in objects]
+
+
+def test_queries():
+    core, model = get_model()
+    topology = model.get_topology()
+    assert topology.downstream(model.reservoir.R1) == [('plant', 'P1'), ('gate', 'S1')]
+    assert topology.upstream(('reservoir', 'R2')) == [('plant', 'P1'), ('gate', 'S1')]
+    assert topology.units_of(('plant', 'P1')) == [('generator', 'G1'), ('generator', 'G2'), ('pump', 'U1')]
+    # Logical relations are listed in both directions
+    assert topology.get_key(topology.get_related(topology.get_position(('discharge_group', 'D1')))[0]) == \
+        ('reservoir', 'R1')
+
+
+def test_relations_match_core():
+    core, model = get_model()
+    r1 = model.reservoir.R1
+    # Input relations first, and logical relations only once
+    assert get_keys(r1.get_relations()) == [('discharge_group', 'D1'), ('plant', 'P1'), ('gate', 'S1')]
+    assert get_keys(r1.get_relations('output', relation_category='logical')) == [('discharge_group', 'D1')]
+    assert get_keys(r1.get_relations('both', relation_category='logical')) == [('discharge_group', 'D1')]
+    assert get_keys(r1.get_relations('output', 'connection_spill')) == [('gate', 'S1')]
+    assert get_keys(model.reservoir.R2.get_relations('input')) == [('plant', 'P1'), ('gate', 'S1')]
+    assert get_keys(model.plant.P1.generators) == [('generator', 'G1'), ('generator', 'G2')]
+    assert get_keys(model.plant.P1.pumps) == [('pump', 'U1')]
+
+
+def test_index_is_reused_and_invalidated():
+    core, model = get_model()
+    model.plant.P1.get_relations()
+    core.calls.clear()
+    for _ in range(5):
+        model.plant.P1.generators
+        model.reservoir.R1.get_relations()
+    model.build_connection_tree()
+    assert core.calls['GetRelations'] == 0
+    assert core.calls['GetInputRelations'] == 0
+    assert core.calls['GetRelationInfo'] == 0
+    assert core.calls['GetObjectNamesInSystem'] == 0
+
+    g3 = model.generator.add_object('G3')
+    model.plant.P1.connect_to(g3)
+    assert get_keys(model.plant.P1.generators) == [('generator', 'G1'), ('generator', 'G2'), ('generator', 'G3')]
+    model.plant.P1.connect().reservoir.R1.add()
+    assert ('reservoir', 'R1') in model.get_topology().downstream(('plant', 'P1'))
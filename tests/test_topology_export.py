@@ -0,0 +1,70 @@
+import json
+import xml.etree.ElementTree as ET
+
+from pyshop.shopcore.model_builder import ModelBuilderType
+
+from .mock_core import MockShopCore
+
+
+def get_model():
+    core = MockShopCore()
+    model = ModelBuilderType(core)
+    model.market.add_object('M1')
+    edges = []
+    for w in range(2):
+        for i in range(4):
+            model.reservoir.add_object(f'R{w}_{i}')
+            model.plant.add_object(f'P{w}_{i}')
+            model.gate.add_object(f'S{w}_{i}')
+            model.generator.add_object(f'G{w}_{i}')
+            edges += [('reservoir', f'R{w}_{i}', 'plant', f'P{w}_{i}'), ('plant', f'P{w}_{i}', 'generator', f'G{w}_{i}'),
+                      ('reservoir', f'R{w}_{i}', 'gate', f'S{w}_{i}', 'spill')]
+        for i in range(3):
+            edges += [('plant', f'P{w}_{i}', 'reservoir', f'R{w}_{i + 1}'),
+                      ('gate', f'S{w}_{i}', 'reservoir', f'R{w}_{i + 1}')]
+    model.connect_many(edges)
+    for i in range(2):
+        model.reservoir[f'R0_{i}'].added_to_network.set(1)
+        model.reservoir[f'R0_{i}'].network_no.set(7)
+    return core, model
+
+
+def test_graphviz():
+    core, model = get_model()
+    source = model.build_connection_tree().source
+    # Edge styles are given per edge instead of as global edge attributes
+    assert 'edge [' not in source
+    assert source.count('->') == 2 * (4 * 2 + 3 * 2)
+    assert source.count('style=dashed') == 2 * 4
+    assert 'generator_G0_0' not in source
+    assert source.count('rank=same') == 1
+    with_units = model.build_connection_tree(display_units=True).source
+    assert with_units.count('->') == 2 * (4 * 3 + 3 * 2)
+
+
+def test_subsets():
+    core, model = get_model()
+    watercourse = model.export_topology(watercourse=('reservoir', 'R1_0'))
+    assert {node['name'][:2] for node in watercourse['nodes']} == {'R1', 'P1', 'S1', 'G1'}
+    assert len(watercourse['edges']) == 4 * 3 + 3 * 2
+
+    # Objects within one relation of P0_1, in either direction
+    nearby = model.export_topology(root=model.plant.P0_1, depth=1)
+    assert sorted(node['name'] for node in nearby['nodes']) == ['G0_1', 'P0_1', 'R0_1', 'R0_2']
+    source = model.build_connection_tree(root=('plant', 'P0_1'), depth=1).source
+    assert source.count('->') == 2
+
+
+def test_json_and_graphml(tmp_path):
+    core, model = get_model()
+    path = tmp_path / 'topology.json'
+    adjacency = model.export_topology(path=str(path))
+    assert json.loads(path.read_text()) == adjacency
+    assert adjacency['nodes'][0] == dict(id=0, type='market', name='M1')
+    spill = [e for e in adjacency['edges'] if e['relation_type'] == 'connection_spill']
+    assert len(spill) == 8 and all(e['category'] == 'physical' for e in spill)
+
+    ns = {'g': 'http://graphml.graphdrawing.org/xmlns'}
+    graph = ET.fromstring(model.export_topology('graphml')).find('g:graph', ns)
+    assert len(graph.findall('g:node', ns)) == len(adjacency['nodes'])
+    assert len(graph.findall('g:edge', ns)) == len(adjacency['edges'])
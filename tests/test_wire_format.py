@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pyshop.shopcore import wire_format
+
+
+def test_round_trip_keeps_dtype_and_shape():
+    arrays = [np.arange(5.0), np.arange(6, dtype=np.int32).reshape(2, 3).T, np.array(2.5), np.zeros(0),
+              np.array([True, False]), np.array([1, 2], dtype='>i8'),
+              pd.date_range('2022-01-01', periods=3, freq='H').to_numpy()]
+    value = dict(args=('plant', 1, arrays, None), kwargs=dict(flag=np.float32(1.5)))
+    result = wire_format.decode(wire_format.encode(value))
+    assert result['args'][:2] == ['plant', 1]
+    assert result['args'][3] is None
+    assert result['kwargs'] == dict(flag=1.5)
+    for a, b in zip(arrays, result['args'][2]):
+        assert a.shape == b.shape
+        assert a.dtype.newbyteorder('=') == b.dtype.newbyteorder('=')
+        np.testing.assert_array_equal(a, b)
+
+
+def test_other_values():
+    value = [np.array(['a', 'b']), pd.Index([1.0, 2.0]), [], {}]
+    result = wire_format.decode(wire_format.encode(value))
+    assert result[0] == ['a', 'b']
+    np.testing.assert_array_equal(result[1], [1.0, 2.0])
+    assert result[2:] == [[], {}]
+
+
+def test_arrays_share_the_payload():
+    payload = wire_format.encode([np.arange(3.0), np.arange(4)])
+    assert not wire_format.decode(payload)[0].flags.writeable
+    result = wire_format.decode(bytearray(payload))
+    result[0][0] = 7.0
+    assert result[0].tolist() == [7.0, 1.0, 2.0]
+
+
+def test_json_is_rejected():
+    with pytest.raises(ValueError):
+        wire_format.decode(b'{"args": []}')